@@ -0,0 +1,247 @@
+# [!] Session History Analytics
+import os # Handle Environment Variable querying for heatmap resolution
+from dotenv import load_dotenv # Handle Environment Variable querying for heatmap resolution
+from datetime import datetime, timezone, timedelta # Handle analysis windows
+import numpy as np # Vectorized session -> time bin accumulation
+import heapq # Keeps the best co-presence candidates across chunks
+from lib.cache import GenerationCache # Results cached until new sessions are ingested
+
+load_dotenv()
+
+# Hour of week bins start Monday 00:00 UTC (the unix epoch was a Thursday, the first Monday is 4 days later)
+WEEK_ORIGIN = 4 * 86400
+DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+# Heatmap bins per hour (1 = 7x24, 4 = 15 minute bins), rendered per hour either way
+BINS_PER_HOUR = int(os.getenv('ACTIVITY_BINS_PER_HOUR', 1))
+
+# Heatmap characters from least to most active
+LEVELS = " .:-=+*#"
+
+# Co-presence time bucket (minutes), candidates scored per chunk & the least time (hours) a candidate
+# needs online in the window to be suggested
+COPRESENCE_BUCKET_MINUTES = int(os.getenv('COPRESENCE_BUCKET_MINUTES', 15))
+COPRESENCE_CHUNK = int(os.getenv('COPRESENCE_CHUNK', 256))
+COPRESENCE_MIN_HOURS = float(os.getenv('COPRESENCE_MIN_HOURS', 4))
+
+# [!] Heatmaps & co-presence results are served from here until the next session ingestion stores new sessions
+_results = GenerationCache(maxsize=256)
+
+# [!] Called after new sessions are stored
+def invalidate():
+    _results.bump()
+
+def stats():
+    return {"activity_cache": _results.stats()}
+
+
+# [!] Hour of week bin (at BINS_PER_HOUR) the current time falls in
+def current_bin():
+    width = 3600 / BINS_PER_HOUR
+    return int(((datetime.now(timezone.utc).timestamp() - WEEK_ORIGIN) % (width * 168 * BINS_PER_HOUR)) // width)
+
+# [!] Internal Function
+# Seconds between the week origin & each time that fall in each hour of week bin, per row
+#   Splitting a time into whole weeks + the bin it lands in means every earlier bin of its week is fully
+#   covered, its own bin is partly covered & later bins aren't. Per row that's a bincount of the bin
+#   indexes (reverse cumsum gives the fully covered bins) & a bincount of the partial seconds, so the
+#   cost is linear in the number of times no matter how long each session is.
+def _coverage(times, rows, row_count: int, width: float, bins: int):
+    weeks, offset = np.divmod(times - WEEK_ORIGIN, width * bins)
+    index = np.minimum((offset // width).astype(np.int64), bins - 1)
+    flat = rows * bins + index
+
+    counts = np.bincount(flat, minlength=row_count * bins).reshape(row_count, bins)
+    partial = np.bincount(flat, weights=offset - index * width, minlength=row_count * bins).reshape(row_count, bins)
+    whole_weeks = np.bincount(rows, weights=weeks, minlength=row_count)
+
+    # Bins before a time's own bin (counted from the end so each row's cumsum gives "times in a later bin")
+    covered = np.cumsum(counts[:, ::-1], axis=1)[:, ::-1] - counts
+    return (whole_weeks[:, None] + covered) * width + partial
+
+# [!] Hour of week occupancy
+#     rows / starts / stops --> arrays describing every session (row = player index, times in unix seconds)
+#     Returns a (row_count x 168 * bins_per_hour) matrix of the fraction of each bin the player was online,
+#     over the bins observed between since & until
+def occupancy(rows, starts, stops, row_count: int, since: float, until: float, bins_per_hour: int = 1):
+    width = 3600 / bins_per_hour
+    bins = 168 * bins_per_hour
+
+    # Clip sessions to the analysis window
+    starts = np.clip(starts, since, until)
+    stops = np.clip(stops, since, until)
+    keep = stops > starts
+    rows, starts, stops = rows[keep], starts[keep], stops[keep]
+
+    # Time online per bin is the coverage up to each stop minus the coverage up to each start
+    online = _coverage(stops, rows, row_count, width, bins) - _coverage(starts, rows, row_count, width, bins)
+    window = np.array([since, until])
+    observed = np.diff(_coverage(window, np.arange(2), 2, width, bins), axis=0)[0]
+
+    share = np.divide(online, observed, out=np.zeros_like(online), where=observed > 0)
+    return np.clip(share, 0, 1) # Overlapping sessions can't put a player online more than 100%
+
+# [!] Hour of week heatmap for players on a server
+#     Returns (matrix of online shares per player (players x 7 x 24 * BINS_PER_HOUR), number of sessions used)
+async def activity_heatmap(db, server_id: str, battle_ids, days: int):
+    battle_ids = list(dict.fromkeys(str(battle_id) for battle_id in battle_ids if battle_id))
+    key = ("heatmap", server_id, tuple(sorted(battle_ids)), days, BINS_PER_HOUR)
+    cached = _results.get(key)
+    if cached is not None:
+        return cached
+
+    until = datetime.now(timezone.utc)
+    since = until - timedelta(days=days)
+    sessions = await db.get_player_sessions(server_id, battle_ids, since)
+    rows, starts, stops = _session_arrays(sessions, battle_ids, until)
+
+    matrix = occupancy(rows, starts, stops, len(battle_ids), since.timestamp(), until.timestamp(), BINS_PER_HOUR)
+    result = (matrix.reshape(len(battle_ids), 7, 24 * BINS_PER_HOUR), len(sessions))
+    _results.set(key, result)
+    return result
+
+# [!] Internal Function
+# Stored sessions [(battle_id, start, stop)] -> (row index, start, stop) arrays in unix seconds
+# (rows follow the order of battle_ids, open sessions run until `until`)
+def _session_arrays(sessions, battle_ids, until: datetime):
+    index = {battle_id: row for row, battle_id in enumerate(battle_ids)}
+    rows = np.fromiter((index[battle_id] for battle_id, _, _ in sessions), dtype=np.int64, count=len(sessions))
+    starts = np.fromiter((start.timestamp() for _, start, _ in sessions), dtype=np.float64, count=len(sessions))
+    stops = np.fromiter(((stop or until).timestamp() for _, _, stop in sessions), dtype=np.float64, count=len(sessions))
+    return rows, starts, stops
+
+# [!] Boolean occupancy matrix (row_count x time buckets): True where the player was online at any point in the bucket
+#     Built from a +1 / -1 difference array per session & one cumsum instead of filling each session's buckets
+def bucket_occupancy(rows, starts, stops, row_count: int, since: float, until: float, bucket: float):
+    buckets = int(np.ceil((until - since) / bucket))
+    first = np.clip(np.floor((starts - since) / bucket), 0, buckets).astype(np.int64)
+    last = np.clip(np.ceil((stops - since) / bucket), 0, buckets).astype(np.int64)
+    keep = last > first
+
+    diff = np.zeros((row_count, buckets + 1), dtype=np.int32)
+    np.add.at(diff, (rows[keep], first[keep]), 1)
+    np.add.at(diff, (rows[keep], last[keep]), -1)
+    return np.cumsum(diff[:, :-1], axis=1) > 0
+
+# [!] Pairwise co-presence between every target & every candidate as one matrix product
+#     Returns (jaccard, shared buckets), both targets x candidates
+def copresence(targets, candidates):
+    targets = targets.astype(np.float32)
+    candidates = candidates.astype(np.float32)
+    shared = targets @ candidates.T
+    union = targets.sum(axis=1)[:, None] + candidates.sum(axis=1)[None, :] - shared
+    jaccard = np.divide(shared, union, out=np.zeros_like(shared), where=union > 0)
+    return jaccard, shared
+
+# [!] Internal Function
+# A player's stored sessions plus their roster sightings (each covering its whole bucket) as [(battle_id, start, stop)]
+async def _presence(db, server_id: str, battle_ids, since: datetime):
+    sessions = await db.get_player_sessions(server_id, battle_ids, since)
+    width = timedelta(minutes=COPRESENCE_BUCKET_MINUTES)
+    return sessions + [(battle_id, bucket, bucket + width) for battle_id, bucket in await db.get_roster_sightings(server_id, battle_ids, since)]
+
+# [!] Likely teammates of a group
+#     Candidates are every other player seen in the server's roster snapshots (server-wide, sampled once per bucket)
+#     or with stored sessions (tracked players), scored against each member in chunks of COPRESENCE_CHUNK
+#     candidates (only one chunk's occupancy matrix is in memory at a time).
+#     Returns list of (candidate battle_id, best jaccard, index of the member they overlap most with,
+#     share of the candidate's online time spent online with that member), best first
+async def teammate_candidates(db, server_id: str, member_ids, days: int, top: int = 10):
+    member_ids = list(dict.fromkeys(str(battle_id) for battle_id in member_ids if battle_id))
+    if not member_ids:
+        return []
+    # Sightings are added every bucket, so results are only reused within the current bucket
+    bucket = COPRESENCE_BUCKET_MINUTES * 60
+    until = datetime.now(timezone.utc)
+    key = ("teammates", server_id, tuple(member_ids), days, COPRESENCE_BUCKET_MINUTES, int(until.timestamp() // bucket))
+    cached = _results.get(key)
+    if cached is not None:
+        return cached
+
+    # Window starts on a bucket boundary so each sighting fills exactly one bucket
+    since = datetime.fromtimestamp((until - timedelta(days=days)).timestamp() // bucket * bucket, timezone.utc)
+    window = (since.timestamp(), until.timestamp(), bucket)
+    min_buckets = COPRESENCE_MIN_HOURS * 60 / COPRESENCE_BUCKET_MINUTES
+
+    member_presence = await _presence(db, server_id, member_ids, since)
+    targets = bucket_occupancy(*_session_arrays(member_presence, member_ids, until), len(member_ids), *window)
+
+    members = set(member_ids)
+    seen = dict.fromkeys(await db.get_sighting_battle_ids(server_id, since) + await db.get_session_battle_ids(server_id, since))
+    candidate_ids = [battle_id for battle_id in seen if battle_id not in members]
+
+    best = []
+    for i in range(0, len(candidate_ids), COPRESENCE_CHUNK):
+        chunk = candidate_ids[i:i + COPRESENCE_CHUNK]
+        presence = await _presence(db, server_id, chunk, since)
+        candidates = bucket_occupancy(*_session_arrays(presence, chunk, until), len(chunk), *window)
+
+        jaccard, shared = copresence(targets, candidates)
+        partner = jaccard.argmax(axis=0)
+        columns = np.arange(len(chunk))
+        best_jaccard = jaccard[partner, columns]
+        online = candidates.sum(axis=1)
+        together = np.divide(shared[partner, columns], online, out=np.zeros(len(chunk), dtype=np.float32), where=online > 0)
+
+        eligible = np.flatnonzero((online >= min_buckets) & (best_jaccard > 0))
+        best = heapq.nlargest(top, best + [(float(best_jaccard[c]), chunk[c], int(partner[c]), float(together[c])) for c in eligible])
+
+    result = [(battle_id, score, partner, together) for score, battle_id, partner, together in best]
+    _results.set(key, result)
+    return result
+
+# [!] Internal Function
+# Most likely windows: runs of consecutive bins (wrapping Sunday -> Monday) at or above half the busiest bin,
+# ranked by their total. Returns list of (first bin, number of bins, average value)
+def _likely_windows(values, top: int = 3):
+    peak = values.max()
+    if peak <= 0:
+        return []
+    active = values >= peak / 2
+    if active.all():
+        return [(0, len(values), float(values.mean()))]
+
+    # Start scanning right after an inactive bin so a run crossing the end of the week isn't split
+    shift = int(np.argmin(active)) + 1
+    rolled = np.roll(active, -shift)
+    edges = np.diff(np.concatenate(([0], rolled.astype(np.int8), [0])))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+    windows = []
+    for start, end in zip(starts, ends):
+        bins = (np.arange(start, end) + shift) % len(values)
+        windows.append((int(bins[0]), int(end - start), float(values[bins].mean()), float(values[bins].sum())))
+    windows.sort(key=lambda window: window[3], reverse=True)
+    return [window[:3] for window in windows[:top]]
+
+# [!] Internal Function
+# Bin index -> "Mon 18:00"
+def _bin_label(bin_index: int, bins_per_hour: int):
+    day, minute = divmod(bin_index * 60 // bins_per_hour, 24 * 60)
+    return f"{DAYS[day % 7]} {minute // 60:02d}:{minute % 60:02d}"
+
+# [!] Renders a 7 x 24 heatmap (UTC) & the most likely online windows as a Discord code block
+#     week --> 7 x (24 * BINS_PER_HOUR) matrix, value_format --> formats one window's average value
+def format_activity(title: str, week, value_format):
+    hourly = week.reshape(7, 24, BINS_PER_HOUR).mean(axis=2)
+    peak = hourly.max()
+
+    header = list(" " * 24)
+    for hour in (0, 6, 12, 18):
+        header[hour:hour + len(str(hour))] = str(hour)
+    lines = ["    " + "".join(header)]
+    for day, values in zip(DAYS, hourly):
+        levels = np.zeros(24, dtype=np.int64) if peak <= 0 else np.ceil(values / peak * (len(LEVELS) - 1)).astype(np.int64)
+        lines.append(f"{day} " + "".join(LEVELS[level] for level in levels))
+
+    lines.append("")
+    windows = _likely_windows(week.reshape(-1))
+    if windows:
+        lines.append("Most likely online (UTC):")
+        for first_bin, length, average in windows:
+            end_label = _bin_label(first_bin + length, BINS_PER_HOUR).split(" ")[1]
+            lines.append(f"  {_bin_label(first_bin, BINS_PER_HOUR)}-{end_label} ({value_format(average)})")
+    else:
+        lines.append("No activity in this window")
+
+    return "```\n" + title + "\n" + "-" * len(title) + "\n" + "\n".join(lines) + "```"
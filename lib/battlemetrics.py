@@ -1,9 +1,16 @@
-import requests  # Handle Web Requests
+import aiohttp  # Handle non-blocking Web Requests
 import os  # Handle loading environment variables
 from dotenv import load_dotenv  # Handle loading environment variables
 from datetime import datetime, timezone  # Handle date time formats
 import pytz  # Handles timezone conversions
 import re
+import json  # Build request keys for POST bodies
+import time  # Handle roster snapshot cache expiry
+import asyncio  # Handle background cache refreshes
+from lib.utils import bounded_gather  # Run batched requests concurrently
+from lib.cache import TTLCache, SingleFlight, MISS, STALE  # Session status cache & request coalescing
+from lib.scheduler import RequestScheduler, background  # Rate limited request scheduling
+from lib.search import PlayerIndex, player_index, server_index  # Local player & server name search
 
 # Class to handle BattleMetrics API Requests & Data Parsing
 class ApiClient:
@@ -20,6 +27,108 @@ class ApiClient:
             "Content-Type": "application/json"
         }
 
+        # Connection pool limits & per-request timeout (seconds), overridable from the environment
+        self.pool_limit = int(os.getenv('BM_POOL_LIMIT', 20))
+        self.timeout = aiohttp.ClientTimeout(total=float(os.getenv('BM_REQUEST_TIMEOUT', 10)))
+
+        # Seconds a server's online player list is reused before it's fetched again
+        self.roster_ttl = float(os.getenv('BM_ROSTER_TTL', 30))
+
+        # Max /sessions pages fetched per chunk of players in one session history ingestion run
+        self.ingest_max_pages = int(os.getenv('INGEST_MAX_PAGES', 20))
+
+        # Latest session cache {(server_id, battle_id): session}, shared by every ApiClient instance:
+        #   BM_SESSION_CACHE_TTL   --> seconds an entry is served as fresh
+        #   BM_SESSION_CACHE_GRACE --> extra seconds a stale entry is served while it's refreshed in the background
+        #   BM_SESSION_CACHE_SIZE  --> max entries before the least recently used are evicted
+        if ApiClient._session_cache is None:
+            ApiClient._session_cache = TTLCache(
+                ttl=float(os.getenv('BM_SESSION_CACHE_TTL', 60)),
+                grace=float(os.getenv('BM_SESSION_CACHE_GRACE', 300)),
+                maxsize=int(os.getenv('BM_SESSION_CACHE_SIZE', 5000))
+            )
+
+        # Server search results {normalized query: servers} (BM_SERVER_SEARCH_TTL seconds, BM_SERVER_SEARCH_CACHE_SIZE queries)
+        if ApiClient._server_search_cache is None:
+            ApiClient._server_search_cache = TTLCache(
+                ttl=float(os.getenv('BM_SERVER_SEARCH_TTL', 3600)),
+                maxsize=int(os.getenv('BM_SERVER_SEARCH_CACHE_SIZE', 256))
+            )
+
+        # Every BattleMetrics request goes through one shared token bucket, sized to the documented
+        # limit of 60 requests per minute with bursts of up to 15 (BM_RATE_LIMIT per second, BM_RATE_BURST)
+        if ApiClient._scheduler is None:
+            ApiClient._scheduler = RequestScheduler(
+                "battlemetrics",
+                rate=float(os.getenv('BM_RATE_LIMIT', 1)),
+                burst=int(os.getenv('BM_RATE_BURST', 15))
+            )
+
+    # Batched /sessions limits (player IDs per request, results per page, batched pages per chunk before the
+    # players still missing a session get their own single session request & the most of those sent per chunk)
+    # Worst case per chunk: SESSION_BATCH_PAGES + SESSION_FALLBACK_LIMIT requests
+    SESSION_BATCH_SIZE = 50
+    SESSION_PAGE_SIZE = 100
+    SESSION_BATCH_PAGES = 2
+    SESSION_FALLBACK_LIMIT = 5
+
+    # [!] Server roster snapshots {server_id: (fetched at (monotonic), {battle_id: player name}, fetched at (UTC))}
+    # Class level so every command group (and every group checked against the same server) shares them
+    _rosters = {}
+
+    # [!] Server search results by normalized query {query: {"Server Name": "Server ID"}}
+    _server_search_cache: TTLCache = None
+
+    # [!] Latest session cache & the (server_id, battle_id) keys currently being refreshed in the background
+    _session_cache: TTLCache = None
+    _revalidating = set()
+    _background_tasks = set()
+
+    # [!] Coalesces identical concurrent requests from every ApiClient instance
+    _single_flight = SingleFlight()
+
+    # [!] Rate limit aware scheduler shared by every ApiClient instance
+    _scheduler: RequestScheduler = None
+
+    # [!] Shared HTTP session
+    # Class level so every ApiClient instance (one per command group) reuses the same
+    # keep-alive connection pool instead of paying a TCP+TLS handshake per request
+    _session: aiohttp.ClientSession = None
+
+    # [!] Internal Method
+    # aiohttp sessions must be created inside the running event loop, so it's built on first use
+    async def _get_session(self):
+        if ApiClient._session is None or ApiClient._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_limit, limit_per_host=self.pool_limit, keepalive_timeout=60)
+            ApiClient._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return ApiClient._session
+
+    # [!] Internal Method
+    # Sends a GET request to the BattleMetrics API, returns (HTTP status, JSON body or None)
+    # Concurrent callers requesting the same (url, params) share a single in-flight request
+    async def _get(self, url, params=None):
+        return await ApiClient._single_flight.do(SingleFlight.request_key(url, params), lambda: self._send_get(url, params))
+
+    # [!] Internal Method
+    # Sends the request through the rate limit scheduler
+    async def _send_get(self, url, params=None):
+        session = await self._get_session()
+        return await ApiClient._scheduler.request(session, "GET", url, headers=self.headers, params=params)
+
+    # [!] Internal Method
+    # Sends a POST request (JSON body) to the BattleMetrics API, returns (HTTP status, JSON body or None)
+    async def _post(self, url, payload):
+        session = await self._get_session()
+        request_key = SingleFlight.request_key(url, {"body": json.dumps(payload, sort_keys=True)})
+        return await ApiClient._single_flight.do(request_key, lambda: ApiClient._scheduler.request(session, "POST", url, headers=self.headers, json=payload))
+
+    # [!] Close the shared HTTP session (on bot shutdown)
+    @classmethod
+    async def close(cls):
+        if cls._session and not cls._session.closed:
+            await cls._session.close()
+        cls._session = None
+
     # [!] Internal Function
     # Handles converting BattleMetrics date/time format into a human-readable format
     @staticmethod
@@ -56,36 +165,75 @@ class ApiClient:
                 return f"{int(minutes)}m ago"
 
     # Searches for target server
-    def find_server(self, server_id: str):
+    # Results are cached by normalized query (BM_SERVER_SEARCH_TTL) & every server found is added to the server index
+    async def find_server(self, server_name: str):
         """Search for a server using the BattleMetrics API given a name parameter and returns the serverID"""
-        updated_url = self.base_url + f"/servers?filter[search]={server_id}"
+        query = PlayerIndex.normalize(server_name)
+        state, cached = ApiClient._server_search_cache.lookup(query)
+        if state != MISS:
+            return dict(cached)
+
+        updated_url = self.base_url + "/servers"
+        search_params = {"filter[search]": server_name}
         servers = {}  # {"Server Name":"Server ID"} Key/Value pairs
         count = 0  # Server result 
         try:
             while count < 25:  # Handling Parsing through results
-                response = requests.get(updated_url, headers=self.headers)
-                response_json = response.json()  # Convert to JSON
+                status, response_json = await self._get(updated_url, params=search_params)
+                if status != 200:
+                    raise ValueError(f"Server search failed (HTTP {status})")
                 for server in response_json['data']:
                     servers[server['attributes']['name']] = server['attributes']['id']
                     count += 1
                 if len(response_json['data']) < 10:  # No pagination
                     break
                 updated_url = response_json['links']['next']  # Pagination next page link
-            return servers
+                search_params = None # Next page link already contains the query string
+            ApiClient._server_search_cache.set(query, servers)
+            server_index.update({server_id: name for name, server_id in servers.items()})
+            return dict(servers)
         except Exception as e:
             return f"```[-] BM_FND_SRV Error: {e}```"
 
 
+    # [!] Server name suggestions (autocomplete): only the first page of a server search, sent at background priority
+    #     so keystrokes never queue paginated searches ahead of slash commands. Pages are cached apart from find_server's
+    #     full results. Returns {"Server Name": "Server ID"} or None if the request failed
+    async def suggest_servers(self, server_name: str):
+        key = ("suggest", PlayerIndex.normalize(server_name))
+        state, cached = ApiClient._server_search_cache.lookup(key)
+        if state != MISS:
+            return dict(cached)
+
+        with background():
+            status, response_json = await self._get(self.base_url + "/servers", params={"filter[search]": server_name})
+        if status != 200:
+            return None
+        servers = {server['attributes']['name']: server['attributes']['id'] for server in response_json.get('data', [])}
+        ApiClient._server_search_cache.set(key, servers)
+        server_index.update({server_id: name for name, server_id in servers.items()})
+        return dict(servers)
+
     # [!] Handles Identifying players based on usernam (either directly or steam ID)
     #      if multiple player name matches found then prints them out with their  
     #      battle IDs and last time seen on the active server.
-    def single_player_check(self, server_id, server_name, trgt_player, trgt_battle_id=None, sort="-lastSeen"):
+    async def single_player_check(self, server_id, server_name, trgt_player, trgt_battle_id=None, sort="-lastSeen"):
         #    If numeric ID => direct get_player_by_id + server session check
         if trgt_battle_id:
-            player_data = self.get_player_by_id(server_id, trgt_battle_id)
+            player_data = await self.get_player_by_id(server_id, trgt_battle_id)
             if not player_data:
                 return [f"```[-] Player with ID \"{trgt_battle_id}\" not found on server {server_name}```"]
-            return self._get_player_status(server_id, player_data)  # server-specific
+            return await self._get_player_status(server_id, player_data)  # server-specific
+
+        # [!] Local player index first: an exact (normalized) name match among players seen on the server resolves
+        #     without a BattleMetrics name search. Prefix & similar matches could be someone else, so they're only
+        #     suggested when BattleMetrics finds nobody
+        match_type, local_matches = player_index.search(trgt_player, server_id)
+        if match_type == "exact":
+            if len(local_matches) == 1:
+                battle_id, player_name = local_matches[0]
+                return await self._get_player_status(server_id, {"id": battle_id, "attributes": {"name": player_name}})
+            return await self._candidate_statuses(server_id, local_matches)
 
         #    Name-based searching if no numeric ID
         search_url = self.base_url + "/players"
@@ -95,108 +243,111 @@ class ApiClient:
             "filter[servers]": server_id,
             "sort": sort
         }
-        search_response = requests.get(search_url, headers=self.headers, params=search_params)
-        players = search_response.json().get('data', [])
+        _, search_json = await self._get(search_url, params=search_params)
+        players = (search_json or {}).get('data', [])
+
+        # Every player BattleMetrics found has played on the server, remember them for the next lookup
+        player_index.update({player['id']: self.sanitize_player_name(player['attributes']['name']) for player in players}, server_id)
 
         if not players:
+            # Suggest similar names from the local index when BattleMetrics found nobody
+            if local_matches:
+                return await self._candidate_statuses(server_id, local_matches)
             return [f"```[ ] {trgt_player} : not found on server {server_name}```"]
 
         # Attempt Ensure accounts with dates greater than a month or year we filter out
-        recent_players = [
-            p for p in players
-            if ("mth" not in self._format_datetime(p['attributes']['updatedAt']))
-            and ("yr" not in self._format_datetime(p['attributes']['updatedAt']))
-        ]
+        recent_players = []
+        for player in players:
+            last_updated = self._format_datetime(player['attributes']['updatedAt'])
+            if "mth" not in last_updated and "yr" not in last_updated:
+                recent_players.append(player)
+
+        # Every match is older than a month
+        if not recent_players:
+            return [f"```[ ] {trgt_player} : not found on server {server_name} (no match seen in the last month)```"]
 
         #    If we have multiple matches, do a server-specific session check for each
         if len(recent_players) > 1:
-            results_list = []
-            for i, player in enumerate(recent_players[:5], start=1):
-                #   For each matched player, do a separate /sessions call
-                p_id = player['id']
-                p_name = self.sanitize_player_name(player['attributes']['name'])
-
-                session_url = f"{self.base_url}/sessions"
-                session_params = {
-                    "filter[players]": p_id,
-                    "filter[servers]": server_id
-                }
-                resp = requests.get(session_url, headers=self.headers, params=session_params)
-                if resp.status_code != 200:
-                    # If request fails, show an error line
-                    results_list.append(
-                        f"{i}. {p_name} (battle id: {p_id}) : ```[-] session query failed ({resp.status_code})```"
-                    )
-                    continue
-
-                session_data = resp.json().get('data', [])
-                if not session_data:
-                    # No session data => never joined or BM doesn't have record
-                    results_list.append(
-                        f"{i}. {p_name} (battle id: {p_id}) : no session data available"
-                    )
-                    continue
-
-                #   If we have session data, check the latest session's stop time
-                latest_session = session_data[0]
-                stop_time = latest_session['attributes'].get('stop')
-                if stop_time is None:
-                    # Active
-                    results_list.append(
-                        f"{i}. {p_name} (battle id: {p_id}) : ACTIVE"
-                    )
-                else:
-                    # Last seen => format
-                    formatted = self._format_datetime(stop_time)
-                    results_list.append(
-                        f"{i}. {p_name} (battle id: {p_id}) : last seen {formatted}"
-                    )
-
-            return [
-                None, 
-                None, 
-                "```[+] Multiple players found:\n" 
-                + "-" * 27 + "\n" 
-                + "\n".join(results_list) 
-                + "```***\*** Use the battlemettric id for the correct player.*"
-            ]
+            return await self._candidate_statuses(server_id, [(player['id'], self.sanitize_player_name(player['attributes']['name'])) for player in recent_players[:5]])
         
         # If only one "recent" match, return the final active/last-seen message
-        return self._get_player_status(server_id, recent_players[0])
+        return await self._get_player_status(server_id, recent_players[0])
+
+    # [!] Internal Method
+    # Lists several matched players (up to 5 [(battle_id, player name)]) with their status on the server,
+    # using one batched /sessions call for every candidate
+    async def _candidate_statuses(self, server_id, candidates):
+        latest_sessions, failed, stale = await self.get_latest_sessions(server_id, [p_id for p_id, _ in candidates])
+
+        results_list = []
+        for i, (p_id, p_name) in enumerate(candidates, start=1):
+            if p_id in failed:
+                # If request fails, show an error line
+                results_list.append(
+                    f"{i}. {p_name} (battle id: {p_id}) : ```[-] session query failed ({failed[p_id]})```"
+                )
+                continue
+
+            latest_session = latest_sessions.get(p_id)
+            if not latest_session:
+                # No session data => never joined or BM doesn't have record
+                results_list.append(
+                    f"{i}. {p_name} (battle id: {p_id}) : no session data available"
+                )
+                continue
+
+            #   If we have session data, check the latest session's stop time
+            stop_time = latest_session['attributes'].get('stop')
+            stale_note = self._stale_note(p_id in stale)
+            if stop_time is None:
+                # Active
+                results_list.append(
+                    f"{i}. {p_name} (battle id: {p_id}) : ACTIVE{stale_note}"
+                )
+            else:
+                # Last seen => format
+                formatted = self._format_datetime(stop_time)
+                results_list.append(
+                    f"{i}. {p_name} (battle id: {p_id}) : last seen {formatted}{stale_note}"
+                )
+
+        return [
+            None, 
+            None, 
+            "```[+] Multiple players found:\n" 
+            + "-" * 27 + "\n" 
+            + "\n".join(results_list) 
+            + "```***\*** Use the battlemettric id for the correct player.*"
+        ]
     
     # [!] Handles identifying activity status for a player when a battlemetrics ID is passeed as input
-    def server_player_check_single(self, server_id: str, bm_player_id: str, fallback_name: str) -> str:
+    async def server_player_check_single(self, server_id: str, bm_player_id: str, fallback_name: str) -> str:
         try:
             if not bm_player_id:
                 return f"[ ] {fallback_name} : BattleMetrics ID not found"
 
-            session_url = f"{self.base_url}/sessions"
-            session_params = {
-                "filter[players]": bm_player_id,
-                "filter[servers]": server_id
-            }
-            resp = requests.get(session_url, headers=self.headers, params=session_params)
-            if resp.status_code != 200:
-                return f"[-] BM_CHK_SGL Error: Sessions request failed (HTTP {resp.status_code})."
+            latest_sessions, failed, stale = await self.get_latest_sessions(server_id, [bm_player_id])
+            if failed:
+                return f"[-] BM_CHK_SGL Error: Sessions request failed (HTTP {failed[str(bm_player_id)]})."
 
-            data = resp.json().get('data', [])
-            if not data:
+            latest_sess = latest_sessions.get(str(bm_player_id))
+            if not latest_sess:
                 return f"[ ] {fallback_name} : no session data available"
 
-            latest_sess = data[0]
             stop_time = latest_sess['attributes'].get('stop')
+            stale_note = self._stale_note(stale)
             if stop_time is None:
-                return f"[X] {fallback_name} : ACTIVE"
+                return f"[X] {fallback_name} : ACTIVE{stale_note}"
             else:
                 last_seen_str = self._format_datetime(stop_time)
-                return f"[ ] {fallback_name} : last seen {last_seen_str}"
+                return f"[ ] {fallback_name} : last seen {last_seen_str}{stale_note}"
 
         except Exception as e:
             return f"[-] server_player_check_single Error: {e}"
 
 
     # [!] Executed when checking player status
-    def _get_player_status(self, server_id, player_data):
+    async def _get_player_status(self, server_id, player_data):
         """
         Server-specific status check for one user (called by single_player_check if exactly one match).
         Replaces usage of 'updatedAt' with sessions for accurate 'ACTIVE' or 'last seen X'.
@@ -204,30 +355,22 @@ class ApiClient:
         player_id = player_data['id']
         player_name = self.sanitize_player_name(player_data['attributes']['name'])
 
-        sessions_url = f"{self.base_url}/sessions"
-        sessions_params = {
-            "filter[players]": player_id,
-            "filter[servers]": server_id,
-            #   Optionally sort by latest sessions first if it's a valid field:
-            # "sort": "-start"
-        }
-
-        sessions_response = requests.get(sessions_url, headers=self.headers, params=sessions_params)
-        if sessions_response.status_code != 200:
-            return [player_id, player_name, f"```[-] Unable to get session data (HTTP {sessions_response.status_code}).```"]
+        latest_sessions, failed, stale = await self.get_latest_sessions(server_id, [player_id])
+        if failed:
+            return [player_id, player_name, f"```[-] Unable to get session data (HTTP {failed[str(player_id)]}).```"]
 
-        session_data = sessions_response.json().get('data', [])
-        if not session_data:
+        latest_session = latest_sessions.get(str(player_id))
+        if not latest_session:
             return [player_id, player_name, f"```[ ] {player_name} : no session data available```"]
 
-        latest_session = session_data[0]
         stop_time = latest_session['attributes'].get('stop')
+        stale_note = self._stale_note(stale)
 
         if stop_time is None:
-            return [player_id, player_name, f"```[X] {player_name} : ACTIVE```"]
+            return [player_id, player_name, f"```[X] {player_name} : ACTIVE{stale_note}```"]
         else:
             formatted_last_seen = self._format_datetime(stop_time)
-            return [player_id, player_name, f"```[ ] {player_name} : last seen {formatted_last_seen}```"]
+            return [player_id, player_name, f"```[ ] {player_name} : last seen {formatted_last_seen}{stale_note}```"]
 
     # Handle names that contain unprintable characters
     # BattleeMetrics the bytes that make up the encoded string (Ex: '\u1cbc')
@@ -250,12 +393,12 @@ class ApiClient:
         return f"Player_{user_bytes}"
     
     # [!] Queries Sessions based on BattleMetrics Player ID
-    def get_player_by_id(self, server_id, battle_id):
+    async def get_player_by_id(self, server_id, battle_id):
         """Query the BattleMetrics API to get player details by ID."""
         player_url = f"{self.base_url}/players/{battle_id}"
-        response = requests.get(player_url, headers=self.headers)
-        if response.status_code == 200:
-            player_data = response.json().get('data', {})
+        status, player_json = await self._get(player_url)
+        if status == 200:
+            player_data = player_json.get('data', {})
 
             # Ensure no unprintable encodiing characters in string
             player_data['attributes']['name'] = self.sanitize_player_name(player_data['attributes']['name'])
@@ -263,46 +406,407 @@ class ApiClient:
         else:
             return None
 
-    def group_player_check(self, server_id: str, player_name: str, player_battle_id: str):
+    async def group_player_check(self, server_id: str, player_name: str, player_battle_id: str):
         """Check if a player is active or when they were last seen using their session data."""
         try:
             if not player_battle_id:
                 # Return message when BattleMetrics ID is not found
                 return [0, f"[ ] {player_name} : BattleMetrics ID not found"]
 
-            session_url = f"{self.base_url}/sessions"
-            session_params = {
-                "filter[players]": player_battle_id,
-                "filter[servers]": server_id
-            }
-
             # Perform the API request to get session data
-            response = requests.get(session_url, headers=self.headers, params=session_params)
-            if response.status_code != 200:
+            latest_sessions, failed, stale = await self.get_latest_sessions(server_id, [player_battle_id])
+            if failed:
                 # Handle error if API request fails
-                return [0, f"[-] BM_CHK_GRP Error: Failed to retrieve sessions ({response.status_code})"]
-
-            # Extract session data from response
-            session_data = response.json().get('data', [])
-            if not session_data:
-                # No session data available for the player
-                return [0, f"[ ] {player_name} : no session data available"]
+                return [0, f"[-] BM_CHK_GRP Error: Failed to retrieve sessions ({failed[str(player_battle_id)]})"]
 
             # Extract the most recent session from the data
-            latest_session = session_data[0]
-            stop_time = latest_session['attributes'].get('stop')
-
-            # Check if the player's latest session is active
-            if stop_time is None:
-                # Return active player status
-                return [1, f"[X] {player_name} : ACTIVE"]
-            else:
-                # Format the last seen time
-                formatted_duration = self._format_datetime(stop_time)
-                
-                # Added newline in the formatted string to ensure proper spacing and readability
-                return [2, f"[ ] {player_name} : last seen {formatted_duration}"]
+            return self.format_group_status(player_name, latest_sessions.get(str(player_battle_id)), stale=bool(stale))
 
         except Exception as e:
             # Handle any exceptions during the process
             return [0, f"[-] BM_CHK_GRP Error: {e}"]
+
+    # [!] Turns a player's latest session into the /group check status code & message
+    #     code 1 = active, code 2 = not active (with last seen), code 0 = unknown status
+    #     multi_server adds the server the session was played on (for checks across several servers)
+    def format_group_status(self, player_name: str, latest_session, stale: bool = False, multi_server: bool = False):
+        if not latest_session:
+            # No session data available for the player
+            return [0, f"[ ] {player_name} : no session data available"]
+
+        stop_time = latest_session['attributes'].get('stop')
+        server_note = f" on {self.get_server_name(self.session_server_id(latest_session))}" if multi_server else ""
+
+        # Check if the player's latest session is active
+        if stop_time is None:
+            # Return active player status
+            return [1, f"[X] {player_name} : ACTIVE{server_note}{self._stale_note(stale)}"]
+        else:
+            # Format the last seen time
+            formatted_duration = self._format_datetime(stop_time)
+            return [2, f"[ ] {player_name} : last seen {formatted_duration}{server_note}{self._stale_note(stale)}"]
+
+    # [!] Internal Function
+    # Marks statuses served from a stale cache entry (being refreshed in the background)
+    @staticmethod
+    def _stale_note(stale):
+        return " (stale)" if stale else ""
+
+    # [!] Batched & cached version of group_player_check's session query
+    #     Each (server_id, battle_id) is served from the session cache when possible. Stale entries (past their TTL
+    #     but inside the grace window) are returned immediately & refreshed in the background, only misses are fetched.
+    #     Returns ({battle_id: latest session or None}, {battle_id: HTTP status for failed requests}, {stale battle_ids})
+    async def get_latest_sessions(self, server_id: str, battle_ids):
+        latest_sessions, failed, stale, _ = await self._lookup_latest_sessions(server_id, battle_ids)
+        return latest_sessions, failed, stale
+
+    # [!] Internal Method
+    # get_latest_sessions that also returns the battle_ids fetched from BattleMetrics (not served from the cache)
+    async def _lookup_latest_sessions(self, server_id: str, battle_ids):
+        battle_ids = list(dict.fromkeys(str(battle_id) for battle_id in battle_ids if battle_id))  # De-duplicate, keep order
+
+        latest_sessions = {}
+        stale = set()
+        missing = []
+        for battle_id in battle_ids:
+            state, session = ApiClient._session_cache.lookup((server_id, battle_id))
+            if state == MISS:
+                missing.append(battle_id)
+                continue
+            latest_sessions[battle_id] = session
+            if state == STALE:
+                stale.add(battle_id)
+
+        # Serve stale values now, refresh them after
+        if stale:
+            self._revalidate_sessions(server_id, stale)
+
+        fetched_sessions, failed, _ = await self._fetch_latest_sessions(server_id, missing)
+        latest_sessions.update(fetched_sessions)
+        return latest_sessions, failed, stale, set(missing)
+
+    # [!] Fetch players' latest sessions skipping the cache lookup (used by the adaptive poller),
+    #     the fetched sessions are cached for every other caller
+    #     Returns ({battle_id: latest session or None}, {battle_id: HTTP status for failed requests}, number of requests sent)
+    async def refresh_latest_sessions(self, server_id: str, battle_ids):
+        return await self._fetch_latest_sessions(server_id, list(dict.fromkeys(str(battle_id) for battle_id in battle_ids if battle_id)))
+
+    # [!] Internal Method
+    # BattleMetrics filters accept comma separated IDs, so a whole group's sessions on the server are fetched
+    # in a handful of paginated requests (chunks of SESSION_BATCH_SIZE IDs) instead of one per player.
+    # Successful results are stored in the session cache (None only for players known to have no sessions).
+    async def _fetch_latest_sessions(self, server_id: str, battle_ids):
+        chunks = [battle_ids[i:i + self.SESSION_BATCH_SIZE] for i in range(0, len(battle_ids), self.SESSION_BATCH_SIZE)]
+
+        latest_sessions = {battle_id: None for battle_id in battle_ids}
+        failed = {}
+        requests = 0
+        for chunk_sessions, chunk_failed, chunk_requests in await bounded_gather([self._get_latest_sessions_chunk(server_id, chunk) for chunk in chunks], self.pool_limit):
+            latest_sessions.update(chunk_sessions)
+            failed.update(chunk_failed)
+            requests += chunk_requests
+
+        # Failed IDs have no usable session data
+        for battle_id in failed:
+            latest_sessions.pop(battle_id, None)
+
+        for battle_id, session in latest_sessions.items():
+            ApiClient._session_cache.set((server_id, battle_id), session)
+        return latest_sessions, failed, requests
+
+    # [!] Internal Method
+    # Refreshes stale session cache entries in a background task (skipping any already being refreshed)
+    def _revalidate_sessions(self, server_id: str, battle_ids):
+        battle_ids = [battle_id for battle_id in battle_ids if (server_id, battle_id) not in ApiClient._revalidating]
+        if not battle_ids:
+            return
+        ApiClient._revalidating.update((server_id, battle_id) for battle_id in battle_ids)
+
+        async def _refresh():
+            try:
+                await self._fetch_latest_sessions(server_id, battle_ids)
+            except Exception as e:
+                print(f"[-] BM_RFRSH_SESS Error: {e}")
+            finally:
+                ApiClient._revalidating.difference_update((server_id, battle_id) for battle_id in battle_ids)
+
+        # Hold a reference so the task isn't garbage collected before it finishes
+        # (queued behind interactive requests since it's created as background work)
+        with background():
+            task = asyncio.create_task(_refresh())
+        ApiClient._background_tasks.add(task)
+        task.add_done_callback(ApiClient._background_tasks.discard)
+
+    # [!] Client statistics (cache, coalescing & scheduler metrics) for /server stats
+    def stats(self):
+        return {
+            "session_cache": ApiClient._session_cache.stats(),
+            "server_search_cache": ApiClient._server_search_cache.stats(),
+            "request_coalescing": ApiClient._single_flight.stats(),
+            "request_scheduler": ApiClient._scheduler.stats(),
+        }
+
+    # [!] Internal Method
+    # Pages through /sessions for one chunk of player IDs (up to SESSION_BATCH_PAGES pages), keeping each player's
+    # most recent session. Players whose last session is older than their chunk's newest pages get their own
+    # one session request (or come back empty), at most SESSION_FALLBACK_LIMIT per chunk. Players past the limit are
+    # returned as failed with HTTP 429 (nothing is cached for them, so the next call picks them up).
+    # Returns ({battle_id: latest session}, {battle_id: failed HTTP status}, number of requests sent)
+    async def _get_latest_sessions_chunk(self, server_id: str, battle_ids):
+        session_url = f"{self.base_url}/sessions"
+        session_params = {
+            "filter[players]": ",".join(battle_ids),
+            "filter[servers]": server_id,
+            "page[size]": str(self.SESSION_PAGE_SIZE)
+        }
+
+        latest_sessions = {}
+        pages = 0
+        while session_url and pages < self.SESSION_BATCH_PAGES:
+            status, response_json = await self._get(session_url, params=session_params)
+            pages += 1
+            if status != 200:
+                return latest_sessions, {battle_id: status for battle_id in battle_ids if battle_id not in latest_sessions}, pages
+
+            for session in response_json.get('data', []):
+                player_id = session['relationships']['player']['data']['id']
+                # Sessions come back newest first, but compare start times in case a page isn't ordered
+                current = latest_sessions.get(player_id)
+                if current is None or session['attributes']['start'] > current['attributes']['start']:
+                    latest_sessions[player_id] = session
+
+            # Stop paging once every player in the chunk has their latest session
+            if all(battle_id in latest_sessions for battle_id in battle_ids):
+                break
+
+            # Pagination next page link (already contains the query string)
+            session_url = response_json.get('links', {}).get('next')
+            session_params = None
+
+        # Every session of the chunk was paged through, players without one have no sessions on the server
+        missing = [battle_id for battle_id in battle_ids if battle_id not in latest_sessions]
+        if not missing or not session_url:
+            return latest_sessions, {}, pages
+
+        fallback = missing[:self.SESSION_FALLBACK_LIMIT]
+        failed = {battle_id: 429 for battle_id in missing[self.SESSION_FALLBACK_LIMIT:]}
+        for battle_id, (status, session) in zip(fallback, await bounded_gather([self._get_player_latest_session(server_id, battle_id) for battle_id in fallback], self.pool_limit)):
+            if status != 200:
+                failed[battle_id] = status
+            else:
+                latest_sessions[battle_id] = session
+        return latest_sessions, failed, pages + len(fallback)
+
+    # [!] Internal Method
+    # A single player's most recent session on the server (one page of one session)
+    # Returns (HTTP status, latest session or None)
+    async def _get_player_latest_session(self, server_id: str, battle_id: str):
+        status, response_json = await self._get(f"{self.base_url}/sessions", params={
+            "filter[players]": battle_id,
+            "filter[servers]": server_id,
+            "page[size]": "1"
+        })
+        if status != 200:
+            return status, None
+        sessions = response_json.get('data', [])
+        return status, sessions[0] if sessions else None
+
+    # [!] Flattens a BattleMetrics session into the fields stored by session ingestion
+    @staticmethod
+    def parse_session(session):
+        def _parse_time(value):
+            return datetime.fromisoformat(value.replace("Z", "+00:00")) if value else None
+        return {
+            "id": session['id'],
+            "battle_id": session['relationships']['player']['data']['id'],
+            "start": _parse_time(session['attributes']['start']),
+            "stop": _parse_time(session['attributes'].get('stop')),
+        }
+
+    # [!] Session history ingestion
+    #     Pages through the players' sessions on one server (chunks of SESSION_BATCH_SIZE IDs, newest first).
+    #     cursors --> {battle_id: start of the newest session already stored (None if they had none)}, players
+    #     missing from cursors have never been ingested & are chunked separately so their backfill (up to
+    #     ingest_max_pages pages) doesn't drag already ingested players through their whole history.
+    #     Paging stops once a page reaches sessions older than the chunk's oldest cursor.
+    #     Returns (list of parsed sessions, {battle_id: HTTP status for failed chunks})
+    async def get_session_history(self, server_id: str, battle_ids, cursors: dict):
+        battle_ids = list(dict.fromkeys(str(battle_id) for battle_id in battle_ids if battle_id))
+        known = [battle_id for battle_id in battle_ids if battle_id in cursors]
+        new = [battle_id for battle_id in battle_ids if battle_id not in cursors]
+
+        requests = []
+        for group in (known, new):
+            for i in range(0, len(group), self.SESSION_BATCH_SIZE):
+                chunk = group[i:i + self.SESSION_BATCH_SIZE]
+                chunk_cursors = [cursors[battle_id] for battle_id in chunk if cursors.get(battle_id)]
+                requests.append(self._get_session_history_chunk(server_id, chunk, min(chunk_cursors) if chunk_cursors else None))
+
+        sessions = []
+        failed = {}
+        for chunk_sessions, chunk_failed in await bounded_gather(requests, self.pool_limit):
+            sessions.extend(chunk_sessions)
+            failed.update(chunk_failed)
+        return sessions, failed
+
+    # [!] Internal Method
+    # Pages through /sessions for one chunk of player IDs, keeping sessions that started at or after the cursor
+    # (a failed page drops the whole chunk so its cursors aren't moved past history that was never stored)
+    async def _get_session_history_chunk(self, server_id: str, battle_ids, cursor):
+        session_url = f"{self.base_url}/sessions"
+        session_params = {
+            "filter[players]": ",".join(battle_ids),
+            "filter[servers]": server_id,
+            "page[size]": str(self.SESSION_PAGE_SIZE)
+        }
+
+        sessions = []
+        pages = 0
+        while session_url and pages < self.ingest_max_pages:
+            status, response_json = await self._get(session_url, params=session_params)
+            if status != 200:
+                return [], {battle_id: status for battle_id in battle_ids}
+            pages += 1
+
+            page = [self.parse_session(session) for session in response_json.get('data', [])]
+            sessions.extend(session for session in page if cursor is None or session['start'] >= cursor)
+
+            # Sessions come back newest first, anything past the cursor is already stored
+            if cursor is not None and any(session['start'] < cursor for session in page):
+                break
+
+            # Pagination next page link (already contains the query string)
+            session_url = response_json.get('links', {}).get('next')
+            session_params = None
+
+        return sessions, {}
+
+    # [!] Server roster snapshot
+    #     One request returns every player currently online on the server (server endpoint with players included),
+    #     cached for roster_ttl seconds so several group checks against the same server cost a single request.
+    #     Returns {battle_id: player name} or None if the request failed
+    async def get_server_roster(self, server_id: str):
+        cached = ApiClient._rosters.get(server_id)
+        if cached and time.monotonic() - cached[0] < self.roster_ttl:
+            return cached[1]
+
+        server_url = f"{self.base_url}/servers/{server_id}"
+        status, response_json = await self._get(server_url, params={"include": "player"})
+        if status != 200:
+            return None
+
+        roster = {
+            player['id']: self.sanitize_player_name(player['attributes']['name'])
+            for player in response_json.get('included', [])
+            if player.get('type') == "player"
+        }
+        ApiClient._rosters[server_id] = (time.monotonic(), roster, datetime.now(timezone.utc))
+        player_index.update(roster, server_id)
+        server_index.add(server_id, response_json.get('data', {}).get('attributes', {}).get('name'))
+        return roster
+
+    # [!] Server name seen in the server's last roster snapshot (falls back to the server ID)
+    def get_server_name(self, server_id: str):
+        return server_index.get_name(server_id) or server_id
+
+    # [!] Group status using roster snapshots
+    #     Online members come from intersecting the group's battle IDs with each server's roster (fetched concurrently),
+    #     only the offline members need a /sessions query for their last seen time (a session that started after the
+    #     roster snapshot also counts as online). Sessions on every server come
+    #     from the same batched query (comma separated server IDs), so each member's latest session is their most
+    #     recent sighting across the servers. Falls back to querying every member's sessions if a roster request failed.
+    #     Returns ({online battle_id: server_id}, {battle_id: latest session or None}, {battle_id: failed HTTP status}, {stale battle_ids})
+    async def get_group_status(self, server_ids, battle_ids):
+        battle_ids = [str(battle_id) for battle_id in battle_ids if battle_id]
+        server_ids = list(dict.fromkeys(str(server_id).strip() for server_id in server_ids))
+        sessions_key = ",".join(sorted(server_ids))
+
+        rosters = await asyncio.gather(*(self.get_server_roster(server_id) for server_id in server_ids))
+        if any(roster is None for roster in rosters):
+            latest_sessions, failed, stale = await self.get_latest_sessions(sessions_key, battle_ids)
+            online = {
+                battle_id: self.session_server_id(session)
+                for battle_id, session in latest_sessions.items()
+                if session and session['attributes'].get('stop') is None
+            }
+            return online, latest_sessions, failed, stale
+
+        online = {}
+        for server_id, roster in zip(server_ids, rosters):
+            for battle_id in battle_ids:
+                if battle_id in roster:
+                    online.setdefault(battle_id, server_id)
+        latest_sessions, failed, stale, fetched = await self._lookup_latest_sessions(sessions_key, [battle_id for battle_id in battle_ids if battle_id not in online])
+
+        # The rosters say these members are offline but their latest session is open. Rosters are cached for up to
+        # roster_ttl, so whichever was fetched last wins: a session that started after its server's roster snapshot
+        # means the member joined since (ACTIVE), otherwise the session is out of date (cached before they left or not
+        # closed by BattleMetrics yet). Sessions served from the cache are fetched again first, sessions that were
+        # just fetched are judged as they are.
+        roster_times = {server_id: ApiClient._rosters[server_id][2] for server_id in server_ids if server_id in ApiClient._rosters}
+        still_open = [battle_id for battle_id, session in latest_sessions.items() if self._is_open(session)]
+        cached_open = [battle_id for battle_id in still_open if battle_id not in fetched]
+        if cached_open:
+            refreshed, refresh_failed, _ = await self._fetch_latest_sessions(sessions_key, cached_open)
+            latest_sessions.update(refreshed)
+            stale.difference_update(refreshed)
+            still_open = [battle_id for battle_id in still_open if battle_id in refresh_failed or self._is_open(latest_sessions[battle_id])]
+
+        for battle_id in still_open:
+            session = latest_sessions[battle_id]
+            server_id = self.session_server_id(session)
+            roster_time = roster_times.get(server_id)
+            started = datetime.fromisoformat(session['attributes']['start'].replace("Z", "+00:00"))
+            if roster_time is None or started > roster_time:
+                online[battle_id] = server_id
+            else:
+                latest_sessions[battle_id] = self._closed_session(session, roster_time)
+        return online, latest_sessions, failed, stale
+
+    # [!] Internal Function
+    # True for a session BattleMetrics hasn't ended yet
+    @staticmethod
+    def _is_open(session):
+        return bool(session) and session['attributes'].get('stop') is None
+
+    # [!] Internal Function
+    # Copy of an open session ended at stop (for members a newer roster snapshot shows offline)
+    @staticmethod
+    def _closed_session(session, stop: datetime):
+        return {**session, "attributes": {**session['attributes'], "stop": stop.strftime('%Y-%m-%dT%H:%M:%S.%fZ')}}
+
+    # [!] Server a session was played on
+    @staticmethod
+    def session_server_id(session):
+        return session['relationships']['server']['data']['id']
+
+    # [!] Identifier lookup
+    #     Resolves steam IDs to BattleMetrics player IDs with one /players/match request (exact identifier match,
+    #     no name searching). Returns {steam_id: battle_id} for every steam ID BattleMetrics knows
+    async def match_steam_ids(self, steam_ids):
+        steam_ids = list(dict.fromkeys(steam_id for steam_id in steam_ids if steam_id))
+        if not steam_ids:
+            return {}
+
+        match_url = f"{self.base_url}/players/match"
+        payload = {
+            "data": [
+                {"type": "identifier", "attributes": {"type": "steamID", "identifier": steam_id}}
+                for steam_id in steam_ids
+            ]
+        }
+        try:
+            status, response_json = await self._post(match_url, payload)
+            if status != 200:
+                print(f"[-] BM_MTCH_STM Error: Identifier match failed (HTTP {status})")
+                return {}
+
+            matches = {}
+            for identifier in response_json.get('data', []):
+                player = identifier.get('relationships', {}).get('player', {}).get('data')
+                if player:
+                    matches[identifier['attributes']['identifier']] = player['id']
+            return matches
+        except Exception as e:
+            print(f"[-] BM_MTCH_STM Error: {e}")
+            return {}
@@ -0,0 +1,154 @@
+# [!] Handle In-Process Caching
+import time # Handle cache entry expiry
+import asyncio # Handle sharing in-flight requests between callers
+from collections import OrderedDict # Keeps entries in least -> most recently used order
+
+# Cache lookup states
+FRESH = "fresh"  # Within TTL
+STALE = "stale"  # Past TTL but within the grace window (serve it, but refresh it)
+MISS = "miss"    # Not cached (or past the grace window)
+
+# [!] TTL + LRU cache with a stale-while-revalidate grace window
+#     Entries younger than ttl are FRESH, entries younger than ttl + grace are STALE,
+#     anything older is dropped. The least recently used entry is evicted once maxsize is reached.
+class TTLCache:
+    def __init__(self, ttl: float, maxsize: int, grace: float = 0):
+        self.ttl = ttl
+        self.grace = grace
+        self.maxsize = maxsize
+        self._entries = OrderedDict() # {key: (stored at, value)}
+
+        # Metrics
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    # [!] Returns (state, value) where state is FRESH, STALE or MISS (value is None on a MISS)
+    def lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return MISS, None
+
+        age = time.monotonic() - entry[0]
+        if age > self.ttl + self.grace:
+            # Past the grace window, too old to serve
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return MISS, None
+
+        # Mark as most recently used
+        self._entries.move_to_end(key)
+        if age > self.ttl:
+            self.stale_hits += 1
+            return STALE, entry[1]
+        self.hits += 1
+        return FRESH, entry[1]
+
+    def set(self, key, value):
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        # Evict least recently used entries once over the size limit
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key):
+        self._entries.pop(key, None)
+
+    def stats(self):
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+# [!] Single-flight request coalescing
+#     Concurrent callers asking for the same key wait on one in-flight call and share its result
+#     (or its exception) instead of each sending an identical request.
+class SingleFlight:
+    def __init__(self):
+        self._in_flight = {} # {key: asyncio.Task}
+
+        # Metrics
+        self.calls = 0
+        self.deduplicated = 0
+
+    # [!] factory is a zero argument function returning the coroutine to run when no call for key is in-flight
+    async def do(self, key, factory):
+        self.calls += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.deduplicated += 1
+        # Shielded so one caller being cancelled doesn't cancel the request for everyone else waiting on it
+        return await asyncio.shield(task)
+
+    # [!] Builds a hashable key for an HTTP request
+    @staticmethod
+    def request_key(url, params=None):
+        return (url, tuple(sorted((params or {}).items())))
+
+    def stats(self):
+        return {
+            "calls": self.calls,
+            "deduplicated": self.deduplicated,
+            "in_flight": len(self._in_flight),
+        }
+
+
+# [!] Cache for results computed from stored data
+#     Entries stay valid until the data they were built from changes: bump() (called once new data is stored)
+#     invalidates every entry at once. The least recently used entry is evicted once maxsize is reached.
+class GenerationCache:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.generation = 0
+        self._entries = OrderedDict() # {key: (generation, value)}
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+
+    # [!] Returns the cached value or None (missing or built before the last bump)
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != self.generation:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key, value):
+        self._entries[key] = (self.generation, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    # [!] Invalidate every entry
+    def bump(self):
+        self.generation += 1
+        self._entries.clear()
+
+    def stats(self):
+        return {
+            "size": len(self._entries),
+            "generation": self.generation,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
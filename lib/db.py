@@ -1,21 +1,29 @@
 # import psycopg2 # Handles Heroku postgres URL (not utilized)
 import os # Handle Environment Variable querying for script secrets
 from dotenv import load_dotenv # Handle Environment Variable querying for script secrets
-from datetime import datetime
+from datetime import datetime, timezone, timedelta
 import unicodedata
+import functools # Build sync & async versions of each database operation
 
 # Defined Necessary Imports for SQLAlchemy's ORM:
 # SOURCE: https://docs.sqlalchemy.org/en/20/orm/quickstart.html
 from sqlalchemy import create_engine # Handles connection to database
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker # Handles non-blocking connections to database
 from typing import Optional # Necessary for specifying optional table entries
 from sqlalchemy.orm import sessionmaker # Session # One or the other 
 from sqlalchemy.sql import func # Handles querying encoded member name rows
-from sqlalchemy import String
+from sqlalchemy import String, Integer, Boolean
+from sqlalchemy import DateTime, ForeignKey, UniqueConstraint, Index
+from sqlalchemy import or_, case, literal, insert
+from sqlalchemy import inspect, text # Handles migrating legacy tables
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects import postgresql, sqlite # Handles INSERT ... ON CONFLICT DO UPDATE (upserts)
 from sqlalchemy.orm import DeclarativeBase
 from sqlalchemy.orm import Mapped
 from sqlalchemy.orm import mapped_column
 from sqlalchemy.orm import relationships
 from sqlalchemy import select
+from sqlalchemy import event # Applies group name cache changes once a session commits
 
 # Decalarative Base Class 
 class Base(DeclarativeBase):
@@ -28,22 +36,32 @@ class Group(Base):
 
     # [!] COLUMNS   
     # id --> Unique ID Value
-    # name --> Group Name 
-    # member --> Player username
-    # steam_id --> Player steam ID (unique)
-    # battle_id --> Player BattleMetric ID (unique && nullable)
-    # date --> Timestamp when added
+    # name --> Group Name (unique)
+    # date --> Timestamp when created
     # Nullability derives from whether or not the Optional[] type modifier is used
     id: Mapped[int] = mapped_column(primary_key=True)
-    name: Mapped[str] = mapped_column(String(255), unique=False, nullable=False)
-    member: Mapped[str] = mapped_column(String(255), unique=False, nullable=False)
-    steam_id: Mapped[str] = mapped_column(String(64), unique=False, nullable=False)
-    battle_id: Mapped[Optional[str]] = mapped_column(String(64), unique=False, nullable=True)
-    date: Mapped[str] = mapped_column(String(255), nullable=True)
+    name: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
+    date: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
 
     # Define __repr__ function for python interpreter & usage
     def __repr__(self):
-         return f"Group(id={self.id!r}, name={self.name!r}, member={self.member!r}, steam_id={self.steam_id}, battle_id={self.battle_id!r}, date={self.date!r})"
+         return f"Group(id={self.id!r}, name={self.name!r}, date={self.date!r})"
+
+# group_members Table's Declarative Mapping (defines the table)
+class GroupMember(Base):
+    # Table Name
+    __tablename__ = 'group_members'
+    __table_args__ = (UniqueConstraint('group_id', 'player_id'),)
+
+    # [!] Membership join table (a player in many groups is stored once in players)
+    # id --> Unique ID Value (also keeps members in the order they were added)
+    # group_id --> groups.id
+    # player_id --> players.id
+    # date --> Timestamp when added
+    id: Mapped[int] = mapped_column(primary_key=True)
+    group_id: Mapped[int] = mapped_column(ForeignKey('groups.id', ondelete="CASCADE"), nullable=False)
+    player_id: Mapped[int] = mapped_column(ForeignKey('players.id', ondelete="CASCADE"), nullable=False, index=True)
+    date: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
 
 # last_checked Table's Declarative Mapping (defines the table)
 class LastCheck(Base):
@@ -51,27 +69,485 @@ class LastCheck(Base):
     __tablename__ = 'last_checked'
     # [!]
     # id --> Unique ID Value
-    # group --> Group name (unique)
+    # group_id --> groups.id (unique, one row per group)
     # active --> Count of active players when last chcked
     # totla_player --> Totla count of players when last checked
-    # date --> last date group was scanned for active players
+    # date --> last time (UTC) group was scanned for active players
     id: Mapped[int] = mapped_column(primary_key=True)
-    group_name: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
-    active_count: Mapped[str] = mapped_column(String(5), nullable=False)
-    total_count: Mapped[str] = mapped_column(String(5), nullable=False)
-    date: Mapped[str] = mapped_column(String(255), nullable=True)
-    
+    group_id: Mapped[int] = mapped_column(ForeignKey('groups.id', ondelete="CASCADE"), unique=True, nullable=False)
+    active_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    total_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    date: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+# players Table's Declarative Mapping (defines the table)
+class Player(Base):
+    # Table name
+    __tablename__ = 'players'
+    # [!] Identity resolution table, filled once per player through BattleMetrics identifier lookups
+    #     & the player side of group memberships
+    # id --> Unique ID Value
+    # steam_id --> Player steam ID (unique && nullable)
+    # battle_id --> Player BattleMetric ID (unique && nullable)
+    # name --> Last known player name
+    # updated --> Timestamp the identity was last resolved
+    id: Mapped[int] = mapped_column(primary_key=True)
+    steam_id: Mapped[Optional[str]] = mapped_column(String(64), unique=True, nullable=True)
+    battle_id: Mapped[Optional[str]] = mapped_column(String(64), unique=True, nullable=True)
+    name: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    updated: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+         return f"Player(id={self.id!r}, steam_id={self.steam_id!r}, battle_id={self.battle_id!r}, name={self.name!r})"
+
+# Member names are matched case-insensitively
+Index('ix_players_name_lower', func.lower(Player.name))
+
+# player_names Table's Declarative Mapping (defines the table)
+class PlayerName(Base):
+    # Table name
+    __tablename__ = 'player_names'
+    __table_args__ = (UniqueConstraint('player_id', 'name'),)
+    # [!]
+    # id --> Unique ID Value
+    # player_id --> players.id the name belongs to
+    # name --> A name the player has been seen using
+    # first_seen --> Timestamp the name was first recorded
+    id: Mapped[int] = mapped_column(primary_key=True)
+    player_id: Mapped[int] = mapped_column(ForeignKey('players.id', ondelete="CASCADE"), nullable=False, index=True)
+    name: Mapped[str] = mapped_column(String(255), nullable=False)
+    first_seen: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+# active_servers Table's Declarative Mapping (defines the table)
+class ActiveServer(Base):
+    # Table name
+    __tablename__ = 'active_servers'
+    # [!] Each Discord server's (guild's) active BattleMetrics server
+    # guild_id --> Discord guild ID ("direct" for direct messages)
+    # server_id --> BattleMetrics server ID
+    # server_name --> BattleMetrics server name
+    # updated --> Timestamp when set
+    guild_id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    server_id: Mapped[str] = mapped_column(String(32), nullable=False)
+    server_name: Mapped[str] = mapped_column(String(255), nullable=False)
+    updated: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+# server_lists Table's Declarative Mapping (defines the table)
+class ServerList(Base):
+    # Table name
+    __tablename__ = 'server_lists'
+    # [!] Named sets of BattleMetrics servers saved per Discord server (guild), checked together by /group check
+    # guild_id --> Discord guild ID ("direct" for direct messages)
+    # name --> List name (unique per guild)
+    # server_ids --> Comma separated BattleMetrics server IDs (the format BattleMetrics filters take)
+    # updated --> Timestamp when saved
+    guild_id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    name: Mapped[str] = mapped_column(String(100), primary_key=True)
+    server_ids: Mapped[str] = mapped_column(String(1024), nullable=False)
+    updated: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+# steam_vanity Table's Declarative Mapping (defines the table)
+class SteamVanity(Base):
+    # Table name
+    __tablename__ = 'steam_vanity'
+    # [!] Steam vanity URL resolutions (kept indefinitely, they almost never change)
+    # vanity --> Vanity URL name (lowercase)
+    # steam_id --> 64-bit steam ID it resolves to
+    # resolved --> Timestamp it was resolved
+    vanity: Mapped[str] = mapped_column(String(64), primary_key=True)
+    steam_id: Mapped[str] = mapped_column(String(64), nullable=False)
+    resolved: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+# steam_profiles Table's Declarative Mapping (defines the table)
+class SteamProfile(Base):
+    # Table name
+    __tablename__ = 'steam_profiles'
+    # [!] Steam profile summaries (refreshed once older than the steam client's profile TTL)
+    # steam_id --> 64-bit steam ID
+    # personaname --> Steam display name
+    # fetched --> Timestamp the profile was last fetched from the Steam Web API
+    steam_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    personaname: Mapped[str] = mapped_column(String(255), nullable=False)
+    fetched: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+# group_check_history Table's Declarative Mapping (defines the table)
+class GroupCheckHistory(Base):
+    # Table name
+    __tablename__ = 'group_check_history'
+    __table_args__ = (Index('ix_group_check_history_group_checked', 'group_id', 'checked'),)
+    # [!] Append-only record of every /group check, one row per member
+    #     (rolled up into group_activity by the history compaction job)
+    # group_id --> groups.id
+    # player_id --> players.id
+    # checked --> Time (UTC) of the group check
+    # online --> Whether the member was online (NULL when their status couldn't be determined)
+    id: Mapped[int] = mapped_column(primary_key=True)
+    group_id: Mapped[int] = mapped_column(ForeignKey('groups.id', ondelete="CASCADE"), nullable=False)
+    player_id: Mapped[int] = mapped_column(ForeignKey('players.id', ondelete="CASCADE"), nullable=False)
+    checked: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    online: Mapped[Optional[bool]] = mapped_column(Boolean, nullable=True)
+
+# group_watches Table's Declarative Mapping (defines the table)
+class GroupWatch(Base):
+    # Table name
+    __tablename__ = 'group_watches'
+    __table_args__ = (UniqueConstraint('group_id', 'channel_id'),)
+    # [!] Groups watched for members logging on / off (alerts posted by the watch job)
+    # group_id --> groups.id
+    # guild_id --> Discord server the watch was created in
+    # channel_id --> Discord channel alerts are posted to
+    # server_id --> BattleMetrics server the group is watched on
+    # date --> Timestamp when created
+    id: Mapped[int] = mapped_column(primary_key=True)
+    group_id: Mapped[int] = mapped_column(ForeignKey('groups.id', ondelete="CASCADE"), nullable=False)
+    guild_id: Mapped[str] = mapped_column(String(32), nullable=False)
+    channel_id: Mapped[str] = mapped_column(String(32), nullable=False)
+    server_id: Mapped[str] = mapped_column(String(32), nullable=False)
+    date: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+# group_activity Table's Declarative Mapping (defines the table)
+class GroupActivity(Base):
+    # Table name
+    __tablename__ = 'group_activity'
+    __table_args__ = (UniqueConstraint('group_id', 'resolution', 'bucket'),)
+    # [!] Hourly & daily group activity aggregates built from group_check_history
+    # group_id --> groups.id
+    # resolution --> "hour" or "day"
+    # bucket --> Start (UTC) of the hour / day
+    # checks --> Number of group checks in the bucket
+    # online --> Members online summed over those checks
+    # members --> Members with a known status summed over those checks
+    id: Mapped[int] = mapped_column(primary_key=True)
+    group_id: Mapped[int] = mapped_column(ForeignKey('groups.id', ondelete="CASCADE"), nullable=False)
+    resolution: Mapped[str] = mapped_column(String(5), nullable=False)
+    bucket: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    checks: Mapped[int] = mapped_column(Integer, nullable=False)
+    online: Mapped[int] = mapped_column(Integer, nullable=False)
+    members: Mapped[int] = mapped_column(Integer, nullable=False)
+
+# player_sessions Table's Declarative Mapping (defines the table)
+class PlayerSession(Base):
+    # Table name
+    __tablename__ = 'player_sessions'
+    __table_args__ = (Index('ix_player_sessions_player_server_start', 'battle_id', 'server_id', 'start'),)
+    # [!] BattleMetrics session history for tracked players, stored once per session by the ingestion job
+    # id --> BattleMetrics session ID
+    # battle_id --> Player BattleMetric ID
+    # server_id --> BattleMetrics server ID
+    # start --> Session start (UTC)
+    # stop --> Session end (UTC, NULL while the player is still online)
+    id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    battle_id: Mapped[str] = mapped_column(String(64), nullable=False)
+    server_id: Mapped[str] = mapped_column(String(32), nullable=False)
+    start: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    stop: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+# session_cursors Table's Declarative Mapping (defines the table)
+class SessionCursor(Base):
+    # Table name
+    __tablename__ = 'session_cursors'
+    # [!] Per player & server ingestion progress
+    # battle_id --> Player BattleMetric ID
+    # server_id --> BattleMetrics server ID
+    # cursor --> Start of the newest session stored (NULL if the player had no sessions when ingested),
+    #            later runs only fetch sessions starting at or after it
+    # updated --> Time (UTC) of the last successful ingestion
+    battle_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    server_id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    cursor: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    updated: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+# roster_sightings Table's Declarative Mapping (defines the table)
+class RosterSighting(Base):
+    # Table name
+    __tablename__ = 'roster_sightings'
+    # [!] Every player seen in a server's roster, once per co-presence bucket (stored by the roster sampling job)
+    #     Covers everyone on the server, not only tracked players, so /group teammates can suggest untracked players
+    # server_id --> BattleMetrics server ID
+    # bucket --> Start (UTC) of the COPRESENCE_BUCKET_MINUTES bucket the roster snapshot was taken in
+    # battle_id --> Player BattleMetric ID
+    server_id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    bucket: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    battle_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+
+
+# [!] Process-wide cache of group names & each group's members (backs group / member name autocomplete)
+#     Group names are loaded on first use & a group's members the first time they're asked for. After that the
+#     write operations keep it in sync: each change is queued on the session & applied once the session commits
+#     (dropped on rollback), so autocomplete never queries the database & never shows a change that wasn't kept.
+class GroupNameCache:
+    def __init__(self):
+        self._groups = None # {group name: {player id: member name} or None until the group's members are loaded}
+
+    @property
+    def loaded(self):
+        return self._groups is not None
+
+    def set_groups(self, group_names):
+        self._groups = {group_name: None for group_name in group_names}
+
+    def set_members(self, group_name: str, members: dict):
+        if self._groups is not None and group_name in self._groups:
+            self._groups[group_name] = members
+
+    def group_names(self):
+        return list(self._groups or ())
+
+    # [!] A group's member names (None if the group's members aren't loaded yet)
+    def member_names(self, group_name: str):
+        members = (self._groups or {}).get(group_name)
+        return None if members is None else list(members.values())
+
+    # [!] Queue a change to apply once the session commits
+    @staticmethod
+    def on_commit(session, change, *args):
+        session.info.setdefault("group_name_cache", []).append((change, args))
+
+    # Changes made by the write operations
+    def add_member(self, group_name: str, player_id: int, member_name: str):
+        if self._groups is None:
+            return
+        if group_name not in self._groups:
+            self._groups[group_name] = {player_id: member_name} # New group, this is its only member
+        elif self._groups[group_name] is not None:
+            self._groups[group_name][player_id] = member_name
+
+    def remove_member(self, group_name: str, player_id: int):
+        members = (self._groups or {}).get(group_name)
+        if members is not None:
+            members.pop(player_id, None)
+
+    def delete_group(self, group_name: str):
+        if self._groups is not None:
+            self._groups.pop(group_name, None)
+
+    def rename_group(self, current_name: str, new_name: str):
+        if self._groups is not None and current_name in self._groups:
+            self._groups[new_name] = self._groups.pop(current_name)
+
+    def rename_player(self, player_id: int, member_name: str):
+        for members in (self._groups or {}).values():
+            if members is not None and player_id in members:
+                members[player_id] = member_name
+
+    def merge_players(self, keep_id: int, duplicate_id: int, member_name: str):
+        for members in (self._groups or {}).values():
+            if members is not None and duplicate_id in members:
+                members.pop(duplicate_id)
+                members[keep_id] = member_name
+
+_group_names = GroupNameCache()
+
+@event.listens_for(Session, "after_commit")
+def _apply_group_name_changes(session):
+    for change, args in session.info.pop("group_name_cache", []):
+        change(*args)
+
+@event.listens_for(Session, "after_rollback")
+def _drop_group_name_changes(session):
+    session.info.pop("group_name_cache", None)
+
+
+# [!] Find (or create) the players row for a steam ID / BattleMetrics ID & record the name as a known name
+#     When both IDs match different rows they belong to the same player, so the rows are merged
+def _get_or_create_player(session, steam_id: str = None, battle_id: str = None, name: str = None):
+    by_battle_id = session.query(Player).filter(Player.battle_id == battle_id).first() if battle_id else None
+    by_steam_id = session.query(Player).filter(Player.steam_id == steam_id).first() if steam_id else None
+    if by_battle_id and by_steam_id and by_battle_id.id != by_steam_id.id:
+        _merge_players(session, keep=by_battle_id, duplicate=by_steam_id)
+
+    player = by_battle_id or by_steam_id
+    if not player:
+        player = Player()
+        session.add(player)
+    player.steam_id = steam_id or player.steam_id
+    player.battle_id = battle_id or player.battle_id
+    player.name = name or player.name
+    player.updated = datetime.now(timezone.utc)
+    session.flush() # Assigns player.id for new players
+    GroupNameCache.on_commit(session, _group_names.rename_player, player.id, player.name)
+
+    # Record the name in the player's known names
+    if name and not session.query(PlayerName).filter_by(player_id=player.id, name=name).first():
+        session.add(PlayerName(player_id=player.id, name=name, first_seen=datetime.now(timezone.utc)))
+    return player
+
+# [!] Moves a duplicate player's memberships & known names onto the player being kept, then deletes the duplicate
+def _merge_players(session, keep, duplicate):
+    for membership in session.query(GroupMember).filter_by(player_id=duplicate.id).all():
+        if session.query(GroupMember).filter_by(group_id=membership.group_id, player_id=keep.id).first():
+            session.delete(membership)
+        else:
+            membership.player_id = keep.id
+    for known_name in session.query(PlayerName).filter_by(player_id=duplicate.id).all():
+        if session.query(PlayerName).filter_by(player_id=keep.id, name=known_name.name).first():
+            session.delete(known_name)
+        else:
+            known_name.player_id = keep.id
+    session.query(GroupCheckHistory).filter_by(player_id=duplicate.id).update({GroupCheckHistory.player_id: keep.id})
+    keep.name = keep.name or duplicate.name
+    GroupNameCache.on_commit(session, _group_names.merge_players, keep.id, duplicate.id, keep.name)
+    session.delete(duplicate)
+    session.flush()
+
+# [!] Deletes a group along with everything that references it (players are kept in the identity table)
+def _delete_group_rows(session, group_id: int):
+    for model in (GroupMember, LastCheck, GroupCheckHistory, GroupActivity, GroupWatch):
+        session.query(model).filter(model.group_id == group_id).delete()
+    session.query(Group).filter(Group.id == group_id).delete()
+
+# [!] INSERT ... ON CONFLICT (index_elements) DO UPDATE statement for the session's database
+#     values --> {column: value} (or a list of them) to insert
+#     update --> columns overwritten when the row already exists, increment --> columns added to the existing value
+#     (neither --> existing rows are left as they are, ON CONFLICT DO NOTHING)
+def _upsert(session, model, values, index_elements: list, update: list = (), increment: list = ()):
+    dialect = postgresql if session.get_bind().dialect.name == "postgresql" else sqlite
+    stmt = dialect.insert(model).values(values)
+    set_ = {column: stmt.excluded[column] for column in update}
+    set_.update({column: getattr(model, column) + stmt.excluded[column] for column in increment})
+    if not set_:
+        return stmt.on_conflict_do_nothing(index_elements=index_elements)
+    return stmt.on_conflict_do_update(index_elements=index_elements, set_=set_)
+
+# [!] Internal Function
+# Runs a multi-row upsert UPSERT_BATCH_SIZE rows at a time (one statement per batch keeps each statement's bind
+# parameters well under asyncpg's 32,767 limit & SQLite's variable limit)
+UPSERT_BATCH_SIZE = 1000
+def _upsert_rows(session, model, rows: list, index_elements: list, update: list = (), increment: list = ()):
+    for i in range(0, len(rows), UPSERT_BATCH_SIZE):
+        session.execute(_upsert(session, model, rows[i:i + UPSERT_BATCH_SIZE], index_elements, update=update, increment=increment))
+
+# [!] Internal Function
+# SQLite hands back naive datetimes, stored values are always UTC
+def _as_utc(value: datetime):
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+# [!] Group check history retention windows (overridable from the environment)
+#   HISTORY_RAW_HOURS --> member by member check rows kept before they're rolled up into hourly aggregates
+#   HISTORY_HOURLY_DAYS --> hourly aggregates kept before they're rolled up into daily aggregates
+#   HISTORY_RETENTION_DAYS --> daily aggregates kept before they're deleted
+def _history_windows():
+    return (
+        timedelta(hours=float(os.getenv('HISTORY_RAW_HOURS', 48))),
+        timedelta(days=float(os.getenv('HISTORY_HOURLY_DAYS', 35))),
+        timedelta(days=float(os.getenv('HISTORY_RETENTION_DAYS', 365))),
+    )
+
+# [!] Days of history kept by the hour (the longest window an hour of day trend can cover)
+def hourly_history_days():
+    return _history_windows()[1] / timedelta(days=1)
+
+# [!] Internal Function
+# True when table exists in its legacy layout (has legacy_column)
+def _is_legacy_table(inspector, table: str, legacy_column: str):
+    return table in inspector.get_table_names() and legacy_column in {column["name"] for column in inspector.get_columns(table)}
+
+# [!] Bring the database schema up to date (run once at startup, before the bot uses the database)
+#     Legacy databases stored one denormalized groups row per (group name, member) & last_checked rows keyed by
+#     group name with string counters/dates. The old tables are renamed to groups_legacy / last_checked_legacy
+#     (kept as a backup) & their rows are moved into the current tables.
+def _prepare_schema(connection):
+    inspector = inspect(connection)
+    legacy_groups = _is_legacy_table(inspector, "groups", "member")
+    if legacy_groups:
+        connection.execute(text("ALTER TABLE groups RENAME TO groups_legacy"))
+    legacy_last_checked = _is_legacy_table(inspector, "last_checked", "group_name")
+    if legacy_last_checked:
+        connection.execute(text("ALTER TABLE last_checked RENAME TO last_checked_legacy"))
+
+    # Create any tables that don't exist yet (existing tables are left untouched)
+    Base.metadata.create_all(connection)
+
+    if legacy_groups:
+        _migrate_legacy_groups(connection)
+    if legacy_last_checked:
+        _migrate_legacy_last_checked(connection)
+
+# [!] One-shot migration of groups_legacy rows into the normalized tables
+def _migrate_legacy_groups(connection):
+    with Session(bind=connection) as session:
+        rows = session.execute(text("SELECT name, member, steam_id, battle_id, date FROM groups_legacy ORDER BY id")).all()
+
+        groups = {}
+        for group_name, member, steam_id, battle_id, date in rows:
+            if group_name not in groups:
+                try:
+                    created = datetime.strptime(date, '%Y-%m-%d').replace(tzinfo=timezone.utc) if date else None
+                except ValueError:
+                    created = None
+                groups[group_name] = Group(name=group_name, date=created)
+                session.add(groups[group_name])
+                session.flush()
+
+            group = groups[group_name]
+            player = _get_or_create_player(session, steam_id=steam_id or None, battle_id=battle_id or None, name=member)
+            if not session.query(GroupMember).filter_by(group_id=group.id, player_id=player.id).first():
+                session.add(GroupMember(group_id=group.id, player_id=player.id, date=group.date))
+                session.flush()
+
+        session.commit()
+    print(f"[+] Migrated {len(rows)} legacy group rows into {len(groups)} groups")
+
+# [!] One-shot migration of last_checked_legacy rows (string counters & local time dates)
+def _migrate_legacy_last_checked(connection):
+    with Session(bind=connection) as session:
+        rows = session.execute(text("SELECT group_name, active_count, total_count, date FROM last_checked_legacy")).all()
+        group_ids = dict(session.query(Group.name, Group.id).all())
+
+        migrated = 0
+        for group_name, active_count, total_count, date in rows:
+            if group_name not in group_ids:
+                continue
+            try:
+                checked = datetime.strptime(date, '%Y-%m-%d %H:%M:%S').astimezone(timezone.utc) if date else None
+                active_count, total_count = int(active_count), int(total_count)
+            except (TypeError, ValueError):
+                continue
+            session.add(LastCheck(group_id=group_ids[group_name], active_count=active_count, total_count=total_count, date=checked))
+            migrated += 1
+
+        session.commit()
+    print(f"[+] Migrated {migrated} legacy last_checked rows")
+
+# [!] Reads DATABASE_URL (Heroku's postgres:// scheme is renamed to postgresql://)
+def _database_url():
+    load_dotenv()
+    db_conn = os.getenv('DATABASE_URL')
+    if not db_conn:
+        raise EnvironmentError("[-] DATABASE_URL not found")
+
+    if db_conn.startswith("postgres://"):
+        db_conn = db_conn.replace("postgres://", "postgresql://", 1)
+    return db_conn
+
+# [!] Engine settings shared by the sync & async engines
+#   DATABASE_ECHO --> log every SQL statement to standard out (off by default)
+#   DATABASE_POOL_SIZE / DATABASE_MAX_OVERFLOW --> connection pool sizing (ignored for SQLite)
+#   pool_pre_ping --> test pooled connections before use so dropped Heroku connections are replaced
+def _engine_options(db_conn: str):
+    options = {
+        "echo": os.getenv('DATABASE_ECHO', 'false').lower() in ("1", "true", "yes"),
+        "pool_pre_ping": True,
+    }
+    if not db_conn.startswith("sqlite"):
+        options["pool_size"] = int(os.getenv('DATABASE_POOL_SIZE', 5))
+        options["max_overflow"] = int(os.getenv('DATABASE_MAX_OVERFLOW', 10))
+    return options
+
+# [!] Database operations are written once against a session:
+#     database opens a sync session per call, asyncDatabase runs the same operation
+#     on an AsyncSession (through run_sync) and exposes it as a coroutine
+def session_operation(operation):
+    @functools.wraps(operation)
+    def run(self, *args, **kwargs):
+        with self.Session() as session:
+            return operation(self, session, *args, **kwargs)
+    run.operation = operation
+    return run
 
 class database():
     def __init__(self):
         # Get secrets from environment  variables
-        load_dotenv()       
-        self.db_conn = os.getenv('DATABASE_URL')
-        if not self.db_conn:
-            raise EnvironmentError("[-] DATABASE_URL not found")
-        
-        if self.db_conn.startswith("postgres://"):
-            self.db_conn = self.db_conn.replace("postgres://", "postgresql://", 1)
+        self.db_conn = _database_url()
 
         # [!] Heroku Standard connection method (using SQLAlchemy instead):
         #   Unnecessary since SQLAlchamey handles all of this for us
@@ -79,221 +555,835 @@ class database():
         #       self.conn = psycopg2.connect(self.db_url, sslmode='require')       
         
         # Connect to Heroku PostgreSQL Instance
-        # The echo=True parameter indicates that SQL emitted by connections will be logged to standard out.
-        self.engine = create_engine(self.db_conn, echo = True, client_encoding="utf8")
+        # Statement logging is controlled by DATABASE_ECHO (see _engine_options)
+        connect_args = {"client_encoding": "utf8"} if self.db_conn.startswith("postgresql") else {}
+        self.engine = create_engine(self.db_conn, connect_args=connect_args, **_engine_options(self.db_conn))
 
         # Define the session class
         self.Session = sessionmaker(bind=self.engine)
-    
-    # [!] GET GROUP NAMES
-    def get_all_groups(self):
-        with self.Session() as session:
-            # Return iterable item of groups
-            try:
-                # filter() offers more flexability when filtering, should use this as standard filtering method employed:
-                # https://docs.sqlalchemy.org/en/20/orm/queryguide/query.html#sqlalchemy.orm.Query.filter
-                #   distinct() --> ensure no duplicate results
-                #   all() --> returns the result of the query as a list of tuples.
-                #   .scalars() --> returns list of strings 
-                stmt = select(Group.name).distinct()
-                results = session.execute(stmt).scalars().all() 
-                return results
-            except Exception as e:
-                print(f"[-] get_grps Error: {e}")
 
+        # Migrate legacy tables & create any tables that don't exist yet
+        with self.engine.begin() as connection:
+            _prepare_schema(connection)
+    
     # [!] Find what group member is a part of --> used in previous version
-    def get_member_group(self, steam_id: str):
-        # Context Manager to Handle PostgreSQL Operations
-        with self.Session() as session:
-            try:
-                results = session.query(Group).filter_by(steam_id=steam_id).one()
-                if not results:
-                    return None
-                else:
-                    return results
-            except Exception as e:
-                print(f"[-] get_mem_grp Error: {e}")
+    @session_operation
+    def get_member_group(self, session, steam_id: str):
+        try:
+            results = (
+                session.query(Group)
+                .join(GroupMember, GroupMember.group_id == Group.id)
+                .join(Player, Player.id == GroupMember.player_id)
+                .filter(Player.steam_id == steam_id)
+                .first()
+            )
+            if not results:
                 return None
+            else:
+                return results
+        except Exception as e:
+            print(f"[-] get_mem_grp Error: {e}")
+            return None
     
     # [!] ADD GROUP MEMBER METHOD
-    # *args is handling optional battlemetric's ID && future optional params
-    def add_group_member(self, group_name, group_member, member_steam_id, member_battle_id):
+    # Creates the group on its first member, the player is stored once no matter how many groups they're in
+    @session_operation
+    def add_group_member(self, session, group_name, group_member, member_steam_id, member_battle_id):
         # Extract Additional Optional param(s):
-        timestamp = f"{datetime.now().strftime('%Y-%m-%d')}"
-
-        # Context Manager to Handle PostgreSQL Operations
-        with self.Session() as session: 
-            # Prepare INSERT statement parameters:
-            user = Group(
-                    name=group_name,
-                    member=group_member,
-                    steam_id=member_steam_id,
-                    battle_id=member_battle_id,
-                    date=timestamp
-                )
-            
-            # Add this to session
-            session.add(user)
+        timestamp = datetime.now(timezone.utc)
 
-            # Commit to DB
-            session.commit()
+        # Get (or create) the group
+        group = session.query(Group).filter(Group.name == group_name).first()
+        if not group:
+            group = Group(name=group_name, date=timestamp)
+            session.add(group)
+            session.flush()
+
+        # Get (or create) the player
+        player = _get_or_create_player(session, steam_id=member_steam_id, battle_id=member_battle_id, name=group_member)
+
+        # Prepare INSERT statement parameters:
+        if not session.query(GroupMember).filter_by(group_id=group.id, player_id=player.id).first():
+            session.add(GroupMember(group_id=group.id, player_id=player.id, date=timestamp))
+            GroupNameCache.on_commit(session, _group_names.add_member, group_name, player.id, player.name)
+
+        # Commit to DB
+        session.commit()
     
     # [!] CLEAR GROUP MEMBER METHOD
-    def delete_group(self, group_name: str):
-        with self.Session() as session:
-            try:
-                # Delete all members from the group
-                group_members_deleted = session.query(Group).filter(Group.name == group_name).delete()
-
-                # Delete the entry from group_last_checked
-                last_checked_deleted = session.query(LastCheck).filter(LastCheck.group_name == group_name).delete()
+    @session_operation
+    def delete_group(self, session, group_name: str):
+        try:
+            # Delete the group, its memberships, last_checked entry & history (players are kept in the identity table)
+            group = session.query(Group).filter(Group.name == group_name).first()
+            if group:
+                _delete_group_rows(session, group.id)
+                GroupNameCache.on_commit(session, _group_names.delete_group, group_name)
 
-                # Commit the transaction if any rows were deleted
-                if group_members_deleted or last_checked_deleted:
-                    # Push the changes the database
-                    session.commit()
-                    return f"```[+] Group '{group_name}' removed```"
-                else:
-                    return f"```[-] Group '{group_name}' not found```"
-            except Exception as e:
-                # If an error occurred make sure to rollback to previous state
-                session.rollback()
-                print(f"[-] del_all_grp_mem Error: {e}")
-                return f"[-] Error deleting group '{group_name}'."
+            # Commit the transaction if any rows were deleted
+            if group:
+                # Push the changes the database
+                session.commit()
+                return f"```[+] Group '{group_name}' removed```"
+            else:
+                return f"```[-] Group '{group_name}' not found```"
+        except Exception as e:
+            # If an error occurred make sure to rollback to previous state
+            session.rollback()
+            print(f"[-] del_all_grp_mem Error: {e}")
+            return f"[-] Error deleting group '{group_name}'."
     
     # [!] GET GROUP MEMBERS
-    def check_group_members(self, group_name: str):
-        with self.Session() as session:
-            return session.query(Group.member, Group.steam_id, Group.battle_id).filter(Group.name == group_name).all()
+    # Returns list of tuples [(member name, steam_id, battle_id)] in the order members were added
+    @session_operation
+    def check_group_members(self, session, group_name: str):
+        return (
+            session.query(Player.name, Player.steam_id, Player.battle_id)
+            .join(GroupMember, GroupMember.player_id == Player.id)
+            .join(Group, Group.id == GroupMember.group_id)
+            .filter(Group.name == group_name)
+            .order_by(GroupMember.id)
+            .all()
+        )
 
     # [!] ENSURE USER IS NOT ALREADY IN THE GRUOP ATTEMPTING TO ADD THEM TO
-    def check_duplicate_group_member(self, group_name: str, member_name: str = None, steam_id: str = None, battle_id: str = None):
-        with self.Session() as session:
-            try:
-                # Filter by group name
-                query = session.query(Group).filter(Group.name == group_name)
-
-                if member_name:
-                    normalized_name = unicodedata.normalize("NFKC", member_name.strip())  # Normalize Unicode & remove spaces
-                    query = query.filter(func.lower(Group.member) == func.lower(normalized_name))
-
-                # Handle steam_id and battle_id conditions
-                if steam_id:
-                    query = query.filter(Group.steam_id == steam_id)
-                if battle_id:
-                    query = query.filter(Group.battle_id == battle_id)
-                if not steam_id and not battle_id:
-                    return None  # No identifiers to check against
-
-                # Execute the query and return the result
-                result = query.first()
-                return result
-            except Exception as e:
-                print(f"[-] chk_dup_grp_mem Error: {e}")
-                return None
+    @session_operation
+    def check_duplicate_group_member(self, session, group_name: str, member_name: str = None, steam_id: str = None, battle_id: str = None):
+        try:
+            # Filter by group name (result has .member & .name like the original member rows)
+            query = (
+                session.query(Player.name.label("member"), Group.name.label("name"))
+                .join(GroupMember, GroupMember.player_id == Player.id)
+                .join(Group, Group.id == GroupMember.group_id)
+                .filter(Group.name == group_name)
+            )
+
+            if member_name:
+                normalized_name = unicodedata.normalize("NFKC", member_name.strip())  # Normalize Unicode & remove spaces
+                query = query.filter(func.lower(Player.name) == func.lower(normalized_name))
+
+            # Handle steam_id and battle_id conditions
+            # Either ID matching counts as a duplicate (member may have been added with only one of them)
+            id_filters = []
+            if steam_id:
+                id_filters.append(Player.steam_id == steam_id)
+            if battle_id:
+                id_filters.append(Player.battle_id == battle_id)
+            if not id_filters:
+                return None  # No identifiers to check against
+            query = query.filter(or_(*id_filters))
+
+            # Execute the query and return the result
+            result = query.first()
+            return result
+        except Exception as e:
+            print(f"[-] chk_dup_grp_mem Error: {e}")
+            return None
     
     # [!] REMOVE A SINGLE GROUP MEMBER METHOD
-    def rem_group_member(self, group_name: str, member_name: str):
-        with self.Session() as session:
-            try:
-                # Trim whitespace & normalize casing
-                member_name = member_name.strip()
-                member_name = unicodedata.normalize("NFKC", member_name)  # Normalize Unicode
-                
-                # GET THE ROW TO DELETE
-                # [!] This does assume that the first occurrence of the first user in the group will be deleted
-                member_to_delete = session.query(Group).filter(Group.name == group_name, Group.member == member_name).first()
-                
-                # If member found then delete
-                if member_to_delete:
-                    session.delete(member_to_delete)
-                    # Commit the changes the database:
-                    session.commit()
-                    return(False) # Returns False since the error output will return True (since its not an empty string), easy way to tell the outcome
-                # else error
-                else:
-                    return f"```markdown\n[-] '{member_name}' not found '{group_name}'```"
-            except Exception as e:
-                print(f"[-] rem_grp_mem Error: {e}")
+    @session_operation
+    def rem_group_member(self, session, group_name: str, member_name: str):
+        try:
+            # Trim whitespace & normalize casing
+            member_name = member_name.strip()
+            member_name = unicodedata.normalize("NFKC", member_name)  # Normalize Unicode
+            
+            # GET THE MEMBERSHIP TO DELETE
+            # [!] This does assume that the first occurrence of the first user in the group will be deleted
+            member_to_delete = (
+                session.query(GroupMember)
+                .join(Group, Group.id == GroupMember.group_id)
+                .join(Player, Player.id == GroupMember.player_id)
+                .filter(Group.name == group_name, func.lower(Player.name) == func.lower(member_name))
+                .first()
+            )
+            
+            # If member found then delete
+            if member_to_delete:
+                # The group itself (with its history & watches) is kept even once it's empty, only /group del removes it
+                GroupNameCache.on_commit(session, _group_names.remove_member, group_name, member_to_delete.player_id)
+                session.delete(member_to_delete)
+
+                # Commit the changes the database:
+                session.commit()
+                return(False) # Returns False since the error output will return True (since its not an empty string), easy way to tell the outcome
+            # else error
+            else:
+                return f"```markdown\n[-] '{member_name}' not found '{group_name}'```"
+        except Exception as e:
+            print(f"[-] rem_grp_mem Error: {e}")
+
+
+    # [!] Update Group Members' Display Names
+    # Takes {steam_id: current steam name} and updates any group member whose stored name is out of date
+    # (the name is stored once per player, so it's updated in every group they're a part of)
+    @session_operation
+    def update_member_names(self, session, group_name: str, steam_names: dict):
+        try:
+            members = (
+                session.query(Player)
+                .join(GroupMember, GroupMember.player_id == Player.id)
+                .join(Group, Group.id == GroupMember.group_id)
+                .filter(Group.name == group_name, Player.steam_id.in_(steam_names.keys()))
+                .all()
+            )
+
+            updated = []
+            for member in members:
+                current_name = steam_names[member.steam_id]
+                if member.name != current_name:
+                    updated.append((member.name, current_name))
+                    _get_or_create_player(session, steam_id=member.steam_id, name=current_name)
+
+            # Only write when a name actually changed
+            if updated:
+                session.commit()
+            return updated # list of (old name, new name) tuples
+        except Exception as e:
+            print(f"[-] upd_mem_nms Error: {e}")
+            session.rollback()
+            return []
 
 
     # [!] Update Group's Last Checked Value
-    def update_group_last_checked(self, group_name: str, active_player_count, total_player_count):
+    # A single INSERT ... ON CONFLICT (group_id) DO UPDATE statement, the group ID comes from a subquery
+    @session_operation
+    def update_group_last_checked(self, session, group_name: str, active_player_count: int, total_player_count: int):
         """Takes parameters from /group command(s) to update a groups's variables in the group_last_check table"""
-        with self.Session() as session:
-            try:
-                # Retreieve the group's current values
-                entry = session.query(LastCheck).filter_by(group_name=group_name).first()
-
-                # Get the current time stamp
-                current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
-                # Check if the group exists
-                if entry:
-                    # Update currently set values
-                    entry.active_count = str(active_player_count)
-                    entry.total_count = str(total_player_count)
-                    entry.date = current_time
-                else:
-                    # Add new values
-                    new_entry = LastCheck(
-                        group_name = group_name,
-                        active_count = str(active_player_count),
-                        total_count = str(total_player_count),
-                        date = current_time
-                    )
-
-                    # Add this to the table
-                    session.add(new_entry)
-                
-                # Commit the changes
+        try:
+            stmt = _upsert(
+                session, LastCheck,
+                values={
+                    "group_id": select(Group.id).where(Group.name == group_name).scalar_subquery(),
+                    "active_count": active_player_count,
+                    "total_count": total_player_count,
+                    "date": datetime.now(timezone.utc),
+                },
+                index_elements=[LastCheck.group_id],
+                update=["active_count", "total_count", "date"],
+            )
+            session.execute(stmt)
+            
+            # Commit the changes
+            session.commit()
+        except Exception as e:
+            print(f"[-] grp_lst_chk Error: {e}")
+            session.rollback()
+
+
+    # [!] Append a group check to the group's history
+    # One INSERT ... SELECT adds a row per member: online_ids / offline_ids are the BattleMetrics IDs
+    # whose status was determined, every other member is stored with an unknown (NULL) status
+    @session_operation
+    def record_group_check(self, session, group_name: str, online_ids, offline_ids):
+        try:
+            status = case(
+                (Player.battle_id.in_(list(online_ids)), True),
+                (Player.battle_id.in_(list(offline_ids)), False),
+                else_=None
+            )
+            members = (
+                select(GroupMember.group_id, GroupMember.player_id, literal(datetime.now(timezone.utc), DateTime(timezone=True)), status)
+                .select_from(GroupMember)
+                .join(Group, Group.id == GroupMember.group_id)
+                .join(Player, Player.id == GroupMember.player_id)
+                .where(Group.name == group_name)
+            )
+            session.execute(insert(GroupCheckHistory).from_select(["group_id", "player_id", "checked", "online"], members))
+            session.commit()
+        except Exception as e:
+            print(f"[-] rcd_grp_chk Error: {e}")
+            session.rollback()
+
+    # [!] Roll group check history up & enforce the retention window (run by the history compaction job)
+    #     raw rows older than HISTORY_RAW_HOURS --> hourly aggregates
+    #     hourly aggregates older than HISTORY_HOURLY_DAYS --> daily aggregates
+    #     daily aggregates older than HISTORY_RETENTION_DAYS --> deleted
+    # Cutoffs are aligned to whole hours / days so each bucket is rolled up in a single pass
+    @session_operation
+    def compact_group_history(self, session):
+        try:
+            raw_window, hourly_window, retention = _history_windows()
+            now = datetime.now(timezone.utc)
+            raw_cutoff = (now - raw_window).replace(minute=0, second=0, microsecond=0)
+            hourly_cutoff = (now - hourly_window).replace(hour=0, minute=0, second=0, microsecond=0)
+
+            # [1] Raw rows --> hourly aggregates (the database collapses members into one row per check)
+            checks = session.execute(
+                select(GroupCheckHistory.group_id, GroupCheckHistory.checked, func.sum(case((GroupCheckHistory.online, 1), else_=0)), func.count(GroupCheckHistory.online))
+                .where(GroupCheckHistory.checked < raw_cutoff)
+                .group_by(GroupCheckHistory.group_id, GroupCheckHistory.checked)
+            ).all()
+            hourly = {}
+            for group_id, checked, online, members in checks:
+                bucket = hourly.setdefault((group_id, _as_utc(checked).replace(minute=0, second=0, microsecond=0)), [0, 0, 0])
+                bucket[0] += 1
+                bucket[1] += online or 0
+                bucket[2] += members
+            self._add_activity(session, "hour", hourly)
+            session.query(GroupCheckHistory).filter(GroupCheckHistory.checked < raw_cutoff).delete()
+
+            # [2] Hourly aggregates --> daily aggregates
+            hours = session.query(GroupActivity).filter(GroupActivity.resolution == "hour", GroupActivity.bucket < hourly_cutoff).all()
+            daily = {}
+            for hour in hours:
+                bucket = daily.setdefault((hour.group_id, _as_utc(hour.bucket).replace(hour=0)), [0, 0, 0])
+                bucket[0] += hour.checks
+                bucket[1] += hour.online
+                bucket[2] += hour.members
+            self._add_activity(session, "day", daily)
+            session.query(GroupActivity).filter(GroupActivity.resolution == "hour", GroupActivity.bucket < hourly_cutoff).delete()
+
+            # [3] Drop daily aggregates past the retention window
+            expired = session.query(GroupActivity).filter(GroupActivity.resolution == "day", GroupActivity.bucket < now - retention).delete()
+
+            session.commit()
+            return len(checks), len(hours), expired
+        except Exception as e:
+            print(f"[-] cmpct_grp_hst Error: {e}")
+            session.rollback()
+
+    # [!] Internal Method
+    # Adds {(group_id, bucket): [checks, online, members]} onto the existing aggregates (upsert with increments)
+    def _add_activity(self, session, resolution: str, buckets: dict):
+        if not buckets:
+            return
+        values = [
+            {"group_id": group_id, "resolution": resolution, "bucket": bucket, "checks": checks, "online": online, "members": members}
+            for (group_id, bucket), (checks, online, members) in buckets.items()
+        ]
+        _upsert_rows(
+            session, GroupActivity, values,
+            index_elements=[GroupActivity.group_id, GroupActivity.resolution, GroupActivity.bucket],
+            increment=["checks", "online", "members"],
+        )
+
+    # [!] Average members online by hour of day (UTC) since a point in time
+    #     Reads the hourly aggregates plus the raw rows that haven't been rolled up yet
+    #     Returns list of 24 tuples [(checks, average online, average members with a known status)] or None
+    @session_operation
+    def get_group_trend(self, session, group_name: str, since: datetime):
+        try:
+            group = session.query(Group).filter(Group.name == group_name).first()
+            if not group:
+                return None
+
+            hours = [[0, 0, 0] for _ in range(24)]
+            aggregates = session.execute(
+                select(GroupActivity.bucket, GroupActivity.checks, GroupActivity.online, GroupActivity.members)
+                .where(GroupActivity.group_id == group.id, GroupActivity.resolution == "hour", GroupActivity.bucket >= since)
+            ).all()
+            raw_checks = session.execute(
+                select(GroupCheckHistory.checked, literal(1), func.sum(case((GroupCheckHistory.online, 1), else_=0)), func.count(GroupCheckHistory.online))
+                .where(GroupCheckHistory.group_id == group.id, GroupCheckHistory.checked >= since)
+                .group_by(GroupCheckHistory.checked)
+            ).all()
+            for bucket, checks, online, members in [*aggregates, *raw_checks]:
+                hour = hours[_as_utc(bucket).hour]
+                hour[0] += checks
+                hour[1] += online or 0
+                hour[2] += members
+
+            return [(checks, online / checks if checks else 0, members / checks if checks else 0) for checks, online, members in hours]
+        except Exception as e:
+            print(f"[-] get_grp_trnd Error: {e}")
+            return None
+
+    # [!] Get Every Group's Member Count & Last Checked Values
+    # One aggregate query (groups LEFT JOIN group_members & last_checked, GROUP BY group) instead of a query per group
+    # Returns list of tuples [(group name, member count, active count, total count, last checked date)]
+    @session_operation
+    def get_group_list_stats(self, session):
+        try:
+            stmt = (
+                select(Group.name, func.count(GroupMember.id), LastCheck.active_count, LastCheck.total_count, LastCheck.date)
+                .outerjoin(GroupMember, GroupMember.group_id == Group.id)
+                .outerjoin(LastCheck, LastCheck.group_id == Group.id)
+                .group_by(Group.id, Group.name, LastCheck.active_count, LastCheck.total_count, LastCheck.date)
+                .order_by(Group.name)
+            )
+            return session.execute(stmt).all()
+        except Exception as e:
+            print(f"[-] get_grp_lst_stats Error: {e}")
+            return []
+
+    # [!] Watch a group for members logging on / off on a server, alerts are posted to channel_id
+    # (watching an already watched group in the same channel moves the watch to server_id)
+    @session_operation
+    def add_group_watch(self, session, group_name: str, guild_id: str, channel_id: str, server_id: str):
+        try:
+            group = session.query(Group).filter(Group.name == group_name).first()
+            if not group:
+                return f"[-] Group '{group_name}' not found"
+
+            session.execute(_upsert(
+                session, GroupWatch,
+                values={"group_id": group.id, "guild_id": guild_id, "channel_id": channel_id, "server_id": server_id, "date": datetime.now(timezone.utc)},
+                index_elements=[GroupWatch.group_id, GroupWatch.channel_id],
+                update=["server_id"],
+            ))
+            session.commit()
+            return False # Same convention as rem_group_member, False means no error
+        except Exception as e:
+            print(f"[-] add_grp_wtch Error: {e}")
+            session.rollback()
+            return f"[-] Error watching group '{group_name}'"
+
+    # [!] Stop watching a group (in one channel or, when channel_id isn't passed, everywhere in the guild)
+    # Returns the number of watches removed
+    @session_operation
+    def remove_group_watch(self, session, group_name: str, guild_id: str, channel_id: str = None):
+        try:
+            watches = (
+                session.query(GroupWatch.id)
+                .join(Group, Group.id == GroupWatch.group_id)
+                .filter(Group.name == group_name, GroupWatch.guild_id == guild_id)
+            )
+            if channel_id:
+                watches = watches.filter(GroupWatch.channel_id == channel_id)
+            watch_ids = [watch_id for watch_id, in watches.all()]
+
+            if watch_ids:
+                session.query(GroupWatch).filter(GroupWatch.id.in_(watch_ids)).delete()
                 session.commit()
-            except Exception as e:
-                print(f"[-] grp_lst_chk Error: {e}")
-                session.rollback()
+            return len(watch_ids)
+        except Exception as e:
+            print(f"[-] rem_grp_wtch Error: {e}")
+            session.rollback()
+            return 0
 
+    # [!] Every watch with its group's members
+    # Returns list of tuples [(watch id, group name, channel_id, server_id, member name, battle_id)], one per member
+    @session_operation
+    def get_group_watches(self, session):
+        try:
+            return (
+                session.query(GroupWatch.id, Group.name, GroupWatch.channel_id, GroupWatch.server_id, Player.name, Player.battle_id)
+                .join(Group, Group.id == GroupWatch.group_id)
+                .join(GroupMember, GroupMember.group_id == Group.id)
+                .join(Player, Player.id == GroupMember.player_id)
+                .filter(Player.battle_id.isnot(None))
+                .order_by(GroupWatch.id, GroupMember.id)
+                .all()
+            )
+        except Exception as e:
+            print(f"[-] get_grp_wtchs Error: {e}")
+            return []
 
-    # [!] Get Group's Last Checked Value(s)
-    def get_group_last_checked(self, group_name: str):
-        """Takes parameters from /group command(s) to retrieves a groups's variables in the group_last_check table"""
-        with self.Session() as session:
-            try:
-                # Retreieve the group's current values
-                entry = session.query(LastCheck).filter_by(group_name=group_name).first()
-                return entry # list of tuples [(column_name, column, value)]
-            except Exception as e:
-                print(f"[-] grp_lst_chk Error: {e}")
-                return f"[-] grp_lst_chk Error: {e}"
-    
     # [!] Change a group's name 
-    # changed in both groups & last_checked tables
-    def change_group_name(self, current_name: str, new_name: str):
-        with self.Session() as session:
-            try:
-                # Update group name in the groups table
-                group_update_count = (
-                    session.query(Group)
-                    .filter(Group.name == current_name)
-                    .update({Group.name: new_name})
-                )
+    # a single groups row (last_checked references the group by ID)
+    @session_operation
+    def change_group_name(self, session, current_name: str, new_name: str):
+        try:
+            # Group names are unique
+            if session.query(Group).filter(Group.name == new_name).first():
+                return f"[-] Group '{new_name}' already exists"
 
-                # Update group name in the last_checked table
-                last_checked_update_count = (
-                    session.query(LastCheck)
-                    .filter(LastCheck.group_name == current_name)
-                    .update({LastCheck.group_name: new_name})
-                )
+            # Update group name in the groups table
+            group_update_count = (
+                session.query(Group)
+                .filter(Group.name == current_name)
+                .update({Group.name: new_name})
+            )
+
+            # Commit if the group was renamed
+            if group_update_count > 0:
+                GroupNameCache.on_commit(session, _group_names.rename_group, current_name, new_name)
+                session.commit()
+                return f"[+] Group name changed from '{current_name}' to '{new_name}'"
+            else:
+                return f"[-] Group '{current_name}' not found"
+        except Exception as e:
+            print(f"[-] chng_grp_nme Error: {e}")
+            return
+
+    # [!] Load every group name into the group name cache
+    @session_operation
+    def load_group_names(self, session):
+        try:
+            _group_names.set_groups(session.execute(select(Group.name)).scalars().all())
+        except Exception as e:
+            print(f"[-] ld_grp_nms Error: {e}")
+
+    # [!] Load a group's member names into the group name cache
+    @session_operation
+    def load_group_member_names(self, session, group_name: str):
+        try:
+            rows = (
+                session.query(Player.id, Player.name)
+                .join(GroupMember, GroupMember.player_id == Player.id)
+                .join(Group, Group.id == GroupMember.group_id)
+                .filter(Group.name == group_name)
+                .order_by(GroupMember.id)
+                .all()
+            )
+            _group_names.set_members(group_name, dict(rows))
+        except Exception as e:
+            print(f"[-] ld_grp_mem_nms Error: {e}")
+
+    # [!] Get BattleMetrics IDs for steam IDs from the identity table
+    # Returns {steam_id: battle_id} for every steam ID with a resolved BattleMetrics ID
+    @session_operation
+    def get_battle_ids(self, session, steam_ids):
+        try:
+            rows = session.query(Player.steam_id, Player.battle_id).filter(Player.steam_id.in_(list(steam_ids)), Player.battle_id.isnot(None)).all()
+            return {steam_id: battle_id for steam_id, battle_id in rows}
+        except Exception as e:
+            print(f"[-] get_btl_ids Error: {e}")
+            return {}
+
+    # [!] Store (or update) a player's identity & record their name as a known name
+    @session_operation
+    def save_identity(self, session, battle_id: str = None, steam_id: str = None, name: str = None):
+        try:
+            # Match an existing identity on either ID
+            if not steam_id and not battle_id:
+                return None
+            player = _get_or_create_player(session, steam_id=steam_id, battle_id=battle_id, name=name)
+
+            session.commit()
+            return player.battle_id
+        except Exception as e:
+            print(f"[-] sve_idnt Error: {e}")
+            session.rollback()
+            return None
+
+    # [!] BattleMetrics IDs of every player in a group (the players tracked by session ingestion)
+    @session_operation
+    def get_tracked_battle_ids(self, session):
+        try:
+            rows = (
+                session.query(Player.battle_id)
+                .join(GroupMember, GroupMember.player_id == Player.id)
+                .filter(Player.battle_id.isnot(None))
+                .distinct()
+                .all()
+            )
+            return [battle_id for battle_id, in rows]
+        except Exception as e:
+            print(f"[-] get_trkd_ids Error: {e}")
+            return []
 
-                # Commit if any rows were updated
-                if group_update_count > 0 or last_checked_update_count > 0:
-                    session.commit()
-                    return f"[+] Group name changed from '{current_name}' to '{new_name}'"
+    # [!] Session ingestion cursors for players on a server
+    # Returns {battle_id: cursor} for every player ingested before (cursor is None if they had no sessions)
+    @session_operation
+    def get_session_cursors(self, session, server_id: str, battle_ids):
+        try:
+            rows = session.query(SessionCursor.battle_id, SessionCursor.cursor).filter(SessionCursor.server_id == server_id, SessionCursor.battle_id.in_(list(battle_ids))).all()
+            return {battle_id: _as_utc(cursor) if cursor else None for battle_id, cursor in rows}
+        except Exception as e:
+            print(f"[-] get_sess_crsrs Error: {e}")
+            return {}
+
+    # [!] Store ingested sessions & move each ingested player's cursor up to their newest session
+    # sessions --> list of {"id", "battle_id", "start", "stop"} dicts (already stored sessions have their stop time updated)
+    # battle_ids --> every player whose sessions were fetched successfully
+    @session_operation
+    def save_player_sessions(self, session, server_id: str, sessions, battle_ids):
+        try:
+            if sessions:
+                values = [{"id": s["id"], "battle_id": s["battle_id"], "server_id": server_id, "start": s["start"], "stop": s["stop"]} for s in sessions]
+                _upsert_rows(session, PlayerSession, values, index_elements=[PlayerSession.id], update=["stop"])
+
+            # Sessions are only fetched from the cursor on, so the newest start is always >= the stored cursor
+            newest = {}
+            for s in sessions:
+                newest[s["battle_id"]] = max(newest.get(s["battle_id"], s["start"]), s["start"])
+            now = datetime.now(timezone.utc)
+            for battle_id in battle_ids:
+                cursor = session.get(SessionCursor, (battle_id, server_id))
+                if cursor is None:
+                    session.add(SessionCursor(battle_id=battle_id, server_id=server_id, cursor=newest.get(battle_id), updated=now))
                 else:
-                    return f"[-] Group '{current_name}' not found"
-            except Exception as e:
-                print(f"[-] chng_grp_nme Error: {e}")
-                return
-    
-        
+                    cursor.cursor = newest.get(battle_id, cursor.cursor)
+                    cursor.updated = now
+
+            session.commit()
+        except Exception as e:
+            print(f"[-] sve_plyr_sess Error: {e}")
+            session.rollback()
+
+    # [!] Stored sessions on a server for a set of players that were still running at or after since
+    # Returns list of tuples [(battle_id, start, stop or None)] with UTC datetimes
+    @session_operation
+    def get_player_sessions(self, session, server_id: str, battle_ids, since: datetime):
+        try:
+            rows = (
+                session.query(PlayerSession.battle_id, PlayerSession.start, PlayerSession.stop)
+                .filter(
+                    PlayerSession.server_id == server_id,
+                    PlayerSession.battle_id.in_(list(battle_ids)),
+                    or_(PlayerSession.stop.is_(None), PlayerSession.stop >= since)
+                )
+                .all()
+            )
+            return [(battle_id, _as_utc(start), _as_utc(stop) if stop else None) for battle_id, start, stop in rows]
+        except Exception as e:
+            print(f"[-] get_plyr_sess Error: {e}")
+            return []
+
+    # [!] BattleMetrics IDs of every player with a stored session on a server still running at or after since
+    @session_operation
+    def get_session_battle_ids(self, session, server_id: str, since: datetime):
+        try:
+            rows = (
+                session.query(PlayerSession.battle_id)
+                .filter(PlayerSession.server_id == server_id, or_(PlayerSession.stop.is_(None), PlayerSession.stop >= since))
+                .distinct()
+                .all()
+            )
+            return [battle_id for battle_id, in rows]
+        except Exception as e:
+            print(f"[-] get_sess_ids Error: {e}")
+            return []
+
+    # [!] Store a roster snapshot's players in its co-presence bucket (players already seen in the bucket are skipped)
+    @session_operation
+    def save_roster_sightings(self, session, server_id: str, bucket: datetime, battle_ids):
+        try:
+            values = [{"server_id": server_id, "bucket": bucket, "battle_id": battle_id} for battle_id in battle_ids]
+            if values:
+                _upsert_rows(session, RosterSighting, values, index_elements=[RosterSighting.server_id, RosterSighting.bucket, RosterSighting.battle_id])
+            session.commit()
+        except Exception as e:
+            print(f"[-] sve_rstr_sght Error: {e}")
+            session.rollback()
+
+    # [!] Roster sightings on a server for a set of players in buckets starting at or after since
+    # Returns list of tuples [(battle_id, bucket start)] with UTC datetimes
+    @session_operation
+    def get_roster_sightings(self, session, server_id: str, battle_ids, since: datetime):
+        try:
+            rows = (
+                session.query(RosterSighting.battle_id, RosterSighting.bucket)
+                .filter(RosterSighting.server_id == server_id, RosterSighting.battle_id.in_(list(battle_ids)), RosterSighting.bucket >= since)
+                .all()
+            )
+            return [(battle_id, _as_utc(bucket)) for battle_id, bucket in rows]
+        except Exception as e:
+            print(f"[-] get_rstr_sght Error: {e}")
+            return []
+
+    # [!] BattleMetrics IDs of every player seen in a server's roster in buckets starting at or after since
+    @session_operation
+    def get_sighting_battle_ids(self, session, server_id: str, since: datetime):
+        try:
+            rows = (
+                session.query(RosterSighting.battle_id)
+                .filter(RosterSighting.server_id == server_id, RosterSighting.bucket >= since)
+                .distinct()
+                .all()
+            )
+            return [battle_id for battle_id, in rows]
+        except Exception as e:
+            print(f"[-] get_sght_ids Error: {e}")
+            return []
+
+    # [!] Drop roster sightings in buckets older than before (run by the history compaction job)
+    # Returns the number of rows deleted
+    @session_operation
+    def expire_roster_sightings(self, session, before: datetime):
+        try:
+            expired = session.query(RosterSighting).filter(RosterSighting.bucket < before).delete()
+            session.commit()
+            return expired
+        except Exception as e:
+            print(f"[-] exp_rstr_sght Error: {e}")
+            session.rollback()
+            return 0
+
+    # [!] Stored names for BattleMetrics IDs
+    # Returns {battle_id: name}
+    @session_operation
+    def get_player_names_by_battle_id(self, session, battle_ids):
+        try:
+            rows = session.query(Player.battle_id, Player.name).filter(Player.battle_id.in_(list(battle_ids)), Player.name.isnot(None)).all()
+            return dict(rows)
+        except Exception as e:
+            print(f"[-] get_plyr_nms Error: {e}")
+            return {}
+
+    # [!] Stored names of every player with stored sessions, per server (feeds the local player name index)
+    # Returns [(server_id, battle_id, name)]
+    @session_operation
+    def get_session_player_names(self, session):
+        try:
+            return (
+                session.query(PlayerSession.server_id, PlayerSession.battle_id, Player.name)
+                .join(Player, Player.battle_id == PlayerSession.battle_id)
+                .filter(Player.name.isnot(None))
+                .distinct()
+                .all()
+            )
+        except Exception as e:
+            print(f"[-] get_sess_nms Error: {e}")
+            return []
+
+    # [!] Every guild's active server
+    # Returns {guild_id: (server ID, server name)}
+    @session_operation
+    def get_active_servers(self, session):
+        try:
+            rows = session.query(ActiveServer.guild_id, ActiveServer.server_id, ActiveServer.server_name).all()
+            return {guild_id: (server_id, server_name) for guild_id, server_id, server_name in rows}
+        except Exception as e:
+            print(f"[-] get_actv_srvs Error: {e}")
+            return {}
+
+    # [!] Set a guild's active server
+    @session_operation
+    def set_active_server(self, session, guild_id: str, server_id: str, server_name: str):
+        session.execute(_upsert(
+            session, ActiveServer,
+            values={"guild_id": guild_id, "server_id": server_id, "server_name": server_name, "updated": datetime.now(timezone.utc)},
+            index_elements=[ActiveServer.guild_id],
+            update=["server_id", "server_name", "updated"],
+        ))
+        session.commit()
+
+    # [!] Clear a guild's active server
+    @session_operation
+    def clear_active_server(self, session, guild_id: str):
+        session.query(ActiveServer).filter(ActiveServer.guild_id == guild_id).delete()
+        session.commit()
+
+    # [!] Save (or replace) a guild's server list
+    @session_operation
+    def save_server_list(self, session, guild_id: str, list_name: str, server_ids):
+        session.execute(_upsert(
+            session, ServerList,
+            values={"guild_id": guild_id, "name": list_name, "server_ids": ",".join(server_ids), "updated": datetime.now(timezone.utc)},
+            index_elements=[ServerList.guild_id, ServerList.name],
+            update=["server_ids", "updated"],
+        ))
+        session.commit()
+
+    # [!] A guild's server list (list names are matched case-insensitively)
+    # Returns [server IDs] or None if the list doesn't exist
+    @session_operation
+    def get_server_list(self, session, guild_id: str, list_name: str):
+        try:
+            server_ids = session.query(ServerList.server_ids).filter(ServerList.guild_id == guild_id, func.lower(ServerList.name) == list_name.lower()).scalar()
+            return server_ids.split(",") if server_ids else None
+        except Exception as e:
+            print(f"[-] get_srv_lst Error: {e}")
+            return None
+
+    # [!] Every server list saved in a guild
+    # Returns {list name: [server IDs]}
+    @session_operation
+    def get_server_lists(self, session, guild_id: str):
+        try:
+            rows = session.query(ServerList.name, ServerList.server_ids).filter(ServerList.guild_id == guild_id).order_by(ServerList.name).all()
+            return {list_name: server_ids.split(",") for list_name, server_ids in rows}
+        except Exception as e:
+            print(f"[-] get_srv_lsts Error: {e}")
+            return {}
+
+    # [!] Delete a guild's server list, returns the number of lists deleted
+    @session_operation
+    def delete_server_list(self, session, guild_id: str, list_name: str):
+        deleted = session.query(ServerList).filter(ServerList.guild_id == guild_id, func.lower(ServerList.name) == list_name.lower()).delete(synchronize_session=False)
+        session.commit()
+        return deleted
+
+    # [!] Get the persistent steam cache (used to warm the steam client at startup)
+    # Returns ({vanity: steam_id}, {steam_id: (personaname, fetched)})
+    @session_operation
+    def get_steam_cache(self, session):
+        try:
+            vanities = {vanity: steam_id for vanity, steam_id in session.query(SteamVanity.vanity, SteamVanity.steam_id).all()}
+            profiles = {steam_id: (personaname, _as_utc(fetched)) for steam_id, personaname, fetched in session.query(SteamProfile.steam_id, SteamProfile.personaname, SteamProfile.fetched).all()}
+            return vanities, profiles
+        except Exception as e:
+            print(f"[-] get_stm_cche Error: {e}")
+            return {}, {}
+
+    # [!] Store a resolved steam vanity URL
+    @session_operation
+    def save_steam_vanity(self, session, vanity: str, steam_id: str):
+        try:
+            session.merge(SteamVanity(vanity=vanity, steam_id=steam_id, resolved=datetime.now(timezone.utc)))
+            session.commit()
+        except Exception as e:
+            print(f"[-] sve_stm_vnty Error: {e}")
+            session.rollback()
+
+    # [!] Store fetched steam profile summaries
+    # Takes {steam_id: personaname}
+    @session_operation
+    def save_steam_profiles(self, session, profiles: dict, fetched: datetime):
+        try:
+            for steam_id, personaname in profiles.items():
+                session.merge(SteamProfile(steam_id=steam_id, personaname=personaname, fetched=fetched))
+            session.commit()
+        except Exception as e:
+            print(f"[-] sve_stm_prfls Error: {e}")
+            session.rollback()
+
+
+# [!] Non-blocking variant of database for the bot's command handlers
+#     Exposes every database operation as a coroutine, running on an async engine
+#     (asyncpg for PostgreSQL, aiosqlite for a local SQLite stand-in) so queries never block the event loop.
+class asyncDatabase(database):
+    _engines = {}
+
+    def __init__(self):
+        # Get secrets from environment  variables
+        self.db_conn = _database_url()
+
+        # Swap in the async driver for the configured database
+        async_conn = self.db_conn
+        if async_conn.startswith("postgresql://"):
+            async_conn = async_conn.replace("postgresql://", "postgresql+asyncpg://", 1)
+        elif async_conn.startswith("sqlite://"):
+            async_conn = async_conn.replace("sqlite://", "sqlite+aiosqlite://", 1)
+
+        # One engine (connection pool) per database URL, shared by every asyncDatabase instance
+        if async_conn not in asyncDatabase._engines:
+            asyncDatabase._engines[async_conn] = create_async_engine(async_conn, **_engine_options(self.db_conn))
+        self.engine = asyncDatabase._engines[async_conn]
+
+        # Define the session class
+        # (objects stay loaded after commit since they can't lazy load outside the session)
+        self.Session = async_sessionmaker(self.engine, expire_on_commit=False)
+
+    # [!] Migrate legacy tables & create any tables that don't exist yet (called once at startup)
+    async def prepare_schema(self):
+        async with self.engine.begin() as conn:
+            await conn.run_sync(_prepare_schema)
+
+    # [!] Group names for autocomplete (from the group name cache, loaded on first use)
+    async def get_cached_group_names(self):
+        if not _group_names.loaded:
+            await self.load_group_names()
+        return _group_names.group_names()
+
+    # [!] A group's member names for autocomplete (from the group name cache, loaded on first use)
+    #     Returns [] for groups that don't exist
+    async def get_cached_member_names(self, group_name: str):
+        if group_name not in await self.get_cached_group_names():
+            return []
+        if _group_names.member_names(group_name) is None:
+            await self.load_group_member_names(group_name)
+        return _group_names.member_names(group_name) or []
+
+    # [!] Close pooled connections (on bot shutdown)
+    @classmethod
+    async def close(cls):
+        for engine in cls._engines.values():
+            await engine.dispose()
+        cls._engines.clear()
+
 
+# [!] Builds the coroutine version of a database operation
+def _async_operation(operation):
+    @functools.wraps(operation)
+    async def run(self, *args, **kwargs):
+        async with self.Session() as session:
+            return await session.run_sync(lambda sync_session: operation(self, sync_session, *args, **kwargs))
+    return run
 
+for _name, _method in list(vars(database).items()):
+    if hasattr(_method, "operation"):
+        setattr(asyncDatabase, _name, _async_operation(_method.operation))
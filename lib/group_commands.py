@@ -1,21 +1,28 @@
 import asyncio # Handle retrieving any timeout based errors
+import discord # Handles channel parameters
 from discord import app_commands # Handles Discord API Communications with Server (Guild in documentation)
 from discord.ext import commands # Handle Custom Server Commands
 from discord import Interaction
 from lib.battlemetrics import ApiClient # Methods to Query BattleMetrics API
 from lib.steam import steamClient # Methods to Query Steam Web API
-from lib.utils import activeServer # Methods to handle the active server configuration
-from lib.db import database # Methods to handle group database interactions
-from datetime import datetime 
+from lib.utils import activeServer, resolve_battle_ids, parse_server_ids # Methods to handle the active server configuration & steam -> BattleMetrics identities
+from lib.db import asyncDatabase, hourly_history_days # Methods to handle group database interactions (non-blocking)
+from lib import analytics # Session history heatmaps
+from lib.search import player_index # Names of untracked players seen in roster snapshots
+from datetime import datetime, timezone, timedelta
 import unicodedata
 
 # Initialize Battle Metrics API Client (sets BM API Bearer Token)
 battlemettrics = ApiClient()
-steam = steamClient()
-active = activeServer()
 
 # Initializee database's Methods
-db = database()
+db = asyncDatabase()
+
+# Each guild's active server (stored in the database, cached in memory)
+active = activeServer(db)
+
+# Steam client persists its vanity URL & profile caches to the database
+steam = steamClient(db)
 
 # [!] SERVER COMMAND GROUP 
 class ServerCommandGroup(app_commands.Group):
@@ -27,16 +34,36 @@ class ServerCommandGroup(app_commands.Group):
 grpcmds = ServerCommandGroup()
 
 # [!] Internal Function
-# Used in /groups list to convert the stored last_checked_date with the currentimestamp 
+# Autocomplete choices: names containing what's been typed (case-insensitive), names starting with it first
+def _name_choices(names, current: str):
+    current = current.strip().casefold()
+    matches = [name for name in names if name and len(name) <= 100 and current in name.casefold()]
+    matches.sort(key=lambda name: (not name.casefold().startswith(current), name.casefold()))
+    return [app_commands.Choice(name=name, value=name) for name in matches[:25]]
+
+# [!] Group name suggestions (served from the database's in-memory group name cache)
+async def _group_name_autocomplete(interaction: Interaction, current: str):
+    return _name_choices(await db.get_cached_group_names(), current)
+
+# [!] Member name suggestions for the group already entered
+async def _member_name_autocomplete(interaction: Interaction, current: str):
+    group_name = interaction.namespace.group_name
+    if not group_name:
+        return []
+    return _name_choices(await db.get_cached_member_names(group_name), current)
+
+# [!] Internal Function
+# Used in /groups list to compare the stored last checked timestamp with the current timestamp 
 # then print it out into a readable format
-def _format_time_difference(last_checked_date: str) -> str:
+def _format_time_difference(last_checked: datetime) -> str:
     """Formats the time difference between the current time and the last checked time."""
     try:
-        # Convert last_checked string to datetime object
-        last_checked_dt = datetime.strptime(last_checked_date, '%Y-%m-%d %H:%M:%S')
+        # SQLite hands back naive datetimes, stored values are always UTC
+        if last_checked.tzinfo is None:
+            last_checked = last_checked.replace(tzinfo=timezone.utc)
 
         # Get the current timestamp and calculate the difference
-        time_diff = datetime.now() - last_checked_dt
+        time_diff = datetime.now(timezone.utc) - last_checked
 
         # Format based on the time difference
         if time_diff.days >= 1:
@@ -55,24 +82,21 @@ def _format_time_difference(last_checked_date: str) -> str:
 # [!] /group list
 @grpcmds.command(name="list", description="List current groups defined")
 async def list(interaction: Interaction):
-    # Stored as list
-    group_names = db.get_all_groups()
-    if not group_names:
+    # Every group's member count & last checked values from one aggregate query
+    group_stats = await db.get_group_list_stats()
+    if not group_stats:
         await interaction.response.send_message("[-] No groups have been created")
-    # Fetch last checked data for each group and build output
-    group_lines = []
-    for num, group_name in enumerate(group_names):
-        # Get last checked information
-        last_check = db.get_group_last_checked(group_name)
+        return
 
+    # Build output
+    group_lines = []
+    for num, (group_name, member_count, active_count, total_count, last_checked) in enumerate(group_stats):
         # Comapre times
-        if last_check:
-            active_count = last_check.active_count
-            total_count = last_check.total_count
-            last_checked = last_check.date or "Never"
-            time_since_checked = _format_time_difference(last_checked) if last_checked != "Never" else "Never"
+        if last_checked:
+            time_since_checked = _format_time_difference(last_checked)
         else:
-            active_count, total_count, time_since_checked = "0", "0", "Never"
+            # Never checked, show the current member count
+            active_count, total_count, time_since_checked = 0, member_count, "Never"
 
         # Format the output line for this group
         group_line = f"{num+1}. {group_name} ({active_count}/{total_count}) : {time_since_checked}"
@@ -83,19 +107,13 @@ async def list(interaction: Interaction):
     await interaction.response.send_message(all_groups_message)
 
 
-# [!] PROBLEM: 
+# [!] HANDLED: 
 #       catches for user added into a group they're already a part of
-#       the group if they were added using a different method. Right now
-#       if the user was added using battle_id first, then they wont have a SteamID
-#       in the database. There are no checks in place currently to handle that edge case. 
-#    SOLUTION:
-#       At the point where the player's information is checked against the datbase
-#       we already have the player's name and group name at minium. Could therefore
-#       First filter by those two parameters. Then check how many rows are returned.
-#       If more than one do additional filtering. If only one result then check if
-#       either steam_id or battle-id columns are empty for that row. If they are update
-#       the row with whatever parameter was also passed with the user (i.e. steam_id or 
-#       battle_id). 
+#       the group if they were added using a different method. Players added
+#       by steam URL are resolved to their exact BattleMetrics ID through the 
+#       identity table (players) so both IDs are stored, members added with only
+#       a steam ID get their BattleMetrics ID filled in on the next /group check,
+#       and the duplicate check matches on either ID.
 # /group add <group name> <player steam id, battle id, or username>
 @grpcmds.command(name="add", description="Add player to group")
 async def group_add(interaction: Interaction, group_name: str, profile: str):
@@ -107,9 +125,9 @@ async def group_add(interaction: Interaction, group_name: str, profile: str):
         encoding_issue_notif = "" # if encoding issue in player's display name
 
         # Get Active server
-        server_results = await active.get_server()
+        server_results = await active.get_server(interaction.guild_id)
         if server_results:
-            server_id, server_name = server_results.split(":")  # Unused var = server_name
+            server_id, server_name = server_results  # Unused var = server_name
         else:
             await interaction.response.send_message("[-] **no server set**\nset server: `/server set <Server ID>`")
             return
@@ -119,25 +137,32 @@ async def group_add(interaction: Interaction, group_name: str, profile: str):
         if profile.startswith("https://"):
             # Handle URLs
             if "steamcommunity.com" in profile:
-                steam_id, username = steam.get_player_info(profile)
-                results = battlemettrics.single_player_check(server_id.strip(), server_name, username.strip())
+                steam_id, username = await steam.get_player_info(profile)
+                # Exact steam -> BattleMetrics identity (no name search), fall back to searching the steam name
+                battle_ids = await resolve_battle_ids(db, battlemettrics, [steam_id], {steam_id: username})
+                if steam_id in battle_ids:
+                    results = [battle_ids[steam_id], username, None]
+                else:
+                    results = await battlemettrics.single_player_check(server_id.strip(), server_name, username.strip())
             else:
                 await interaction.response.send_message("[-] Invalid URL provided.")
                 return
         # BATTLE ID DIRECTLY
         elif profile.isdigit():
             battle_id = profile
-            player_data = battlemettrics.get_player_by_id(server_id.strip(), battle_id)
+            player_data = await battlemettrics.get_player_by_id(server_id.strip(), battle_id)
             if player_data:
                 username = player_data['attributes']['name']
                 results = [battle_id, username, None]
+                # Record the player's name in the identity table
+                await db.save_identity(battle_id=battle_id, name=username)
             else:
                 await interaction.response.send_message("[-] Player with BattleMetrics ID not found on server.")
                 return
         # USERNAME
         else:
             username = profile
-            results = battlemettrics.single_player_check(server_id.strip(), server_name, username.strip())
+            results = await battlemettrics.single_player_check(server_id.strip(), server_name, username.strip())
 
         if not results:
             await interaction.response.send_message("[-] No matching players found.")
@@ -157,13 +182,13 @@ async def group_add(interaction: Interaction, group_name: str, profile: str):
             encoding_issue_notif = f"***\*** Player's name contains a character that could not be decoded. Storing user as {username}*"
 
         # Ensure the member is not already part of the group
-        exist_check = db.check_duplicate_group_member(group_name, steam_id=steam_id, battle_id=battle_id)
+        exist_check = await db.check_duplicate_group_member(group_name, steam_id=steam_id, battle_id=battle_id)
         if exist_check:
             await interaction.response.send_message(f"```[+] {exist_check.member} is already a member of the {exist_check.name} group.```{encoding_issue_notif}")
             return
 
         # Add User to database
-        db.add_group_member(group_name=group_name, 
+        await db.add_group_member(group_name=group_name, 
                             group_member=battlemettrics.sanitize_player_name(username), # Ensure username has no unprintable encoding characters in the string 
                             member_steam_id=steam_id or None, 
                             member_battle_id=battle_id or None)
@@ -174,73 +199,296 @@ async def group_add(interaction: Interaction, group_name: str, profile: str):
         print(f"[-] grp_add_mem Error: {e}")
 
 
-# /group check <group name>
+# [!] Internal Function
+# Used in /group check & /group update to get every member's current steam name in one bulk Steam request,
+# and update the stored display name of members whose steam name changed
+async def _refresh_member_names(group_name: str, members):
+    # {steam_id: personaname} for every member with a steam ID
+    steam_names = await steam.get_player_names([member_steam_id for _, member_steam_id, _ in members])
+    steam_names = {steam_id: battlemettrics.sanitize_player_name(name) for steam_id, name in steam_names.items()}
+
+    # Update user's member_name attribute if different than whats currently set
+    renamed = await db.update_member_names(group_name, steam_names) if steam_names else []
+
+    # Fall back to the stored name for members without a steam ID or if the Steam lookup failed
+    member_names = [steam_names.get(member_steam_id, member_name) for member_name, member_steam_id, _ in members]
+    return member_names, renamed
+
+# [!] Internal Function
+# Reply for a group without members: groups are kept when their last member is removed, so tell an empty group
+# apart from one that doesn't exist
+async def _no_members_message(group_name: str):
+    if group_name in await db.get_cached_group_names():
+        return f"[-] {group_name} has no members, add one with `/group add`"
+    return "[-] group doesnt exist"
+
+# [!] Internal Function
+# Servers a group check runs against: the active server, a saved server list or comma separated server IDs
+# Returns [server IDs] or an error message
+async def _check_servers(guild_id, servers: str):
+    if not servers:
+        server_results = await active.get_server(guild_id)
+        if not server_results:
+            return "[-] **no server set**\nset server: `/server set <Server Name>`"
+        server_id, _ = server_results  # Unused Variable == server_name
+        return [server_id.strip()]
+
+    server_ids = await db.get_server_list(active.scope(guild_id), servers.strip()) or parse_server_ids(servers)
+    if not server_ids:
+        return "[-] servers must be a saved server list (`/server lists`) or comma separated BattleMetrics server IDs"
+    return server_ids
+
+# /group check <group name> [servers]
 @grpcmds.command(name="check", description="Checks player status for all group members")
-async def group_check(interaction: Interaction, group_name: str):
+@app_commands.describe(servers="Saved server list or comma separated server IDs (defaults to the active server)")
+@app_commands.autocomplete(group_name=_group_name_autocomplete)
+async def group_check(interaction: Interaction, group_name: str, servers: str = None):
     try:
         # Tell discord to wait for the command to process
         await interaction.response.defer()
-        # [!] Get Active Server:
-        server_results = await active.get_server()
-        if server_results:
-            server_id, _ = server_results.split(":")  # Unused Variable == server_name
-            
+        # [!] Get the servers to check (active server by default):
+        server_ids = await _check_servers(interaction.guild_id, servers)
+        if not isinstance(server_ids, str): # Error messages are strings (`list` is the /group list command in this module)
+            multi_server = len(server_ids) > 1
+
             # Queries steam IDs and usernames (member):
-            results = db.check_group_members(group_name)
+            results = await db.check_group_members(group_name)
 
             # Ensure results returned
             if not results:
                 # Method to send messages when using .defer()
-                await interaction.followup.send("[-] group doesnt exist")
-                
-            
-            # For each member check if they're on the active server
-            # results list of tuple [(membername, steam_id)]
+                await interaction.followup.send(await _no_members_message(group_name))
+                return
+
+            # Members added with only a steam ID get their exact BattleMetrics ID from the identity table
+            # (resolved once through BattleMetrics & stored on the player, so later checks skip this step)
+            unresolved = [member_steam_id for _, member_steam_id, member_battle_id in results if member_steam_id and not member_battle_id]
+            if unresolved:
+                resolved = await resolve_battle_ids(db, battlemettrics, unresolved)
+                if resolved:
+                    results = [(member_name, member_steam_id, member_battle_id or resolved.get(member_steam_id)) for member_name, member_steam_id, member_battle_id in results]
+
+            # For each member check if they're on any of the servers
+            # results list of tuple [(membername, steam_id, battle_id)]
+            # Steam names come from one bulk Steam request, online members come from the servers' roster snapshots (fetched concurrently)
+            # & only offline members' last seen sessions are queried (one batched query across every server), all run concurrently
+            (member_names, _), (online, latest_sessions, failed, stale) = await asyncio.gather(
+                _refresh_member_names(group_name, results),
+                battlemettrics.get_group_status(server_ids, [member[2] for member in results])
+            )
+
+            member_results = []
+            for (_, _, member_battle_id), active_name in zip(results, member_names):
+                if not member_battle_id:
+                    member_results.append([member_battle_id, 0, f"[ ] {active_name} : BattleMetrics ID not found"])
+                elif member_battle_id in online:
+                    server_note = f" on {battlemettrics.get_server_name(online[member_battle_id])}" if multi_server else ""
+                    member_results.append([member_battle_id, 1, f"[X] {active_name} : ACTIVE{server_note}"])
+                elif member_battle_id in failed:
+                    member_results.append([member_battle_id, 0, f"[-] BM_CHK_GRP Error: Failed to retrieve sessions ({failed[member_battle_id]})"])
+                else:
+                    member_results.append([member_battle_id, *battlemettrics.format_group_status(active_name, latest_sessions.get(member_battle_id), stale=member_battle_id in stale, multi_server=multi_server)])
+
             active_count = 0
             results_list = []
-            for member in results:
-                active_name = ""
-                member_name, member_steam_id, member_battle_id = member
-
-                if member_steam_id:
-                    # GET STEAM INFO
-                    _, active_name = steam.get_player_info(member_steam_id) # Unused var = steam_id
-
-                    # [!] IMPLEMENT IN FUTURE VER
-                    # Update user's member_name attribute if different than whats currently set
-                    #if member_name != active_name:
-                        # CODE TO UPDATE USER'S DISPLAY NAME IN DATABASE: ----> UPDATE THIS
-                        #await interaction.followup.send(f"[-] User {member_name} updated to {active_name}")
-                else: 
-                    active_name = member_name
-
-                # Call the BattleMetric's API to check if player is active
-                result_code, results_message = battlemettrics.group_player_check(server_id.strip(), active_name, member_battle_id) # send_req(<primary search type>, <server id>, <bm player id>, <active player check search type>)
+            online_ids, offline_ids = [], []
+            for member_battle_id, result_code, results_message in member_results:
                 # code 1 = active
                 if result_code == 1:
                     active_count += 1
-                    results_list.append(results_message) # Append Active Player Message
-                # code 2 = not active, with last seen 
+                    online_ids.append(member_battle_id)
+                # code 2 = not active, with last seen / code 0 = unknown status
                 elif result_code == 2:
-                    results_list.append(results_message) # Append last seen message
-                # code 0 = unknown status
-                else:
-                    results_list.append(results_message) # Append Unknown Player status Message
+                    offline_ids.append(member_battle_id)
+                results_list.append(results_message)
             
-            # Add Group's results to group_last_check Table:
-            db.update_group_last_checked(group_name, active_count, total_player_count=len(results_list)) # 
+            # Add Group's results to group_last_check Table & append them to the group's history:
+            await asyncio.gather(
+                db.update_group_last_checked(group_name, active_count, total_player_count=len(results_list)),
+                db.record_group_check(group_name, online_ids, offline_ids)
+            )
 
             # Print the results
-            length_of_seperator = len(group_name) + 20 # Length of "-" to go under title
-            user_server_prompt = "```\n" + f"[+] {group_name} ACTIVE PLAYERS: ({active_count} / {len(results_list)})\n" + "-"*length_of_seperator + "\n" +  "\n".join(results_list) + "```" + "*\* only as accurate as the last time the BattleMetric's API was updated*"
+            servers_note = f" ON {len(server_ids)} SERVERS" if multi_server else ""
+            length_of_seperator = len(group_name) + len(servers_note) + 20 # Length of "-" to go under title
+            user_server_prompt = "```\n" + f"[+] {group_name} ACTIVE PLAYERS{servers_note}: ({active_count} / {len(results_list)})\n" + "-"*length_of_seperator + "\n" +  "\n".join(results_list) + "```" + "*\* only as accurate as the last time the BattleMetric's API was updated*"
             await interaction.followup.send(user_server_prompt)
         else:
-            await interaction.followup.send("[-] **no server set**\nset server: `/server set <Server Name>`")
+            await interaction.followup.send(server_ids)
     except Exception as e:
         print(f"[-] grp_check_atv Error: {e}")
+        await interaction.followup.send("```[-] Error checking group members```")
+
+# /group trend <group name> <days>
+# Average members online by hour of day, served from the group's check history aggregates
+# (days past HISTORY_HOURLY_DAYS only have daily aggregates, so longer windows are clamped to it)
+@grpcmds.command(name="trend", description="Average group members online by hour of day (UTC)")
+async def group_trend(interaction: Interaction, group_name: str, days: app_commands.Range[int, 1, 365] = 7):
+    try:
+        await interaction.response.defer()
+
+        clamp_note = ""
+        max_days = max(1, int(hourly_history_days()))
+        if days > max_days:
+            clamp_note = f"*\\* hourly history is kept for {max_days}d (`HISTORY_HOURLY_DAYS`), showing the last {max_days}d instead of {days}d*"
+            days = max_days
+
+        trend = await db.get_group_trend(group_name, datetime.now(timezone.utc) - timedelta(days=days))
+        if trend is None:
+            await interaction.followup.send("[-] group doesnt exist")
+            return
+        if not any(checks for checks, _, _ in trend):
+            await interaction.followup.send(f"```[-] {group_name} hasn't been checked in the last {days}d```" + clamp_note)
+            return
+
+        # One line per hour: average online / average members with a known status & a bar scaled to the busiest hour
+        busiest = max(average_online for _, average_online, _ in trend) or 1
+        trend_lines = []
+        for hour, (checks, average_online, average_members) in enumerate(trend):
+            if not checks:
+                trend_lines.append(f"{hour:02d}:00  --")
+                continue
+            bar = "#" * round(average_online / busiest * 20)
+            trend_lines.append(f"{hour:02d}:00  {average_online:4.1f} / {average_members:4.1f}  {bar}")
+
+        title = f"[+] {group_name} AVERAGE ONLINE BY HOUR (UTC, last {days}d):"
+        await interaction.followup.send("```\n" + title + "\n" + "-" * len(title) + "\n" + "\n".join(trend_lines) + "```" + clamp_note)
+    except Exception as e:
+        print(f"[-] grp_trnd_cmd Error: {e}")
+        await interaction.followup.send("```[-] Error building group trend```")
+
+# /group activity <group name> <days>
+# Hour of week heatmap of the expected number of members online, from the members' stored session history
+@grpcmds.command(name="activity", description="Shows when a group is most likely online (from stored session history)")
+async def group_activity(interaction: Interaction, group_name: str, days: app_commands.Range[int, 1, 365] = 30):
+    try:
+        await interaction.response.defer()
+
+        results = await db.check_group_members(group_name)
+        if not results:
+            await interaction.followup.send(await _no_members_message(group_name))
+            return
+
+        server_results = await active.get_server(interaction.guild_id)
+        if not server_results:
+            await interaction.followup.send("[-] **no server set**\nset server: `/server set <Server Name>`")
+            return
+        server_id, _ = server_results
+
+        battle_ids = [member_battle_id for _, _, member_battle_id in results if member_battle_id]
+        matrix, session_count = await analytics.activity_heatmap(db, server_id.strip(), battle_ids, days)
+        if not session_count:
+            await interaction.followup.send(f"```[-] No stored sessions for {group_name} in the last {days}d```")
+            return
+
+        # Summing each member's online share gives the expected number of members online
+        title = f"[+] {group_name} ACTIVITY ({len(battle_ids)} members, {session_count} sessions, last {days}d):"
+        await interaction.followup.send(analytics.format_activity(title, matrix.sum(axis=0), lambda members: f"avg {members:.1f} online"))
+    except Exception as e:
+        print(f"[-] grp_act_cmd Error: {e}")
+        await interaction.followup.send("```[-] Error building group activity```")
+
+# /group teammates <group name> <days>
+# Players seen on the server (roster sightings & stored sessions) who overlap most with the group's members (likely teammates or unlisted members)
+@grpcmds.command(name="teammates", description="Suggests players who are usually online with the group")
+async def group_teammates(interaction: Interaction, group_name: str, days: app_commands.Range[int, 1, 90] = 14):
+    try:
+        await interaction.response.defer()
+
+        results = await db.check_group_members(group_name)
+        if not results:
+            await interaction.followup.send(await _no_members_message(group_name))
+            return
+
+        server_results = await active.get_server(interaction.guild_id)
+        if not server_results:
+            await interaction.followup.send("[-] **no server set**\nset server: `/server set <Server Name>`")
+            return
+        server_id, _ = server_results
+
+        members = [(member_name, str(member_battle_id)) for member_name, _, member_battle_id in results if member_battle_id]
+        candidates = await analytics.teammate_candidates(db, server_id.strip(), [member_battle_id for _, member_battle_id in members], days)
+        if not candidates:
+            await interaction.followup.send(f"```[-] No players overlapping with {group_name} in the last {days}d```")
+            return
+
+        names = await db.get_player_names_by_battle_id([battle_id for battle_id, _, _, _ in candidates])
+        candidate_lines = [
+            f"{num}. {names.get(battle_id) or player_index.get_name(battle_id) or 'unknown'} (battle id: {battle_id}) : {together:.0%} of their time with {members[partner][0]} (jaccard {score:.2f})"
+            for num, (battle_id, score, partner, together) in enumerate(candidates, start=1)
+        ]
+        title = f"[+] {group_name} LIKELY TEAMMATES (last {days}d):"
+        await interaction.followup.send("```\n" + title + "\n" + "-" * len(title) + "\n" + "\n".join(candidate_lines) + "```*\\* players are compared from the server's sampled player lists & stored session history*")
+    except Exception as e:
+        print(f"[-] grp_tmts_cmd Error: {e}")
+        await interaction.followup.send("```[-] Error finding group teammates```")
+
+# /group watch <group name> <channel>
+# Posts to the channel whenever a member of the group logs on / off the active server
+@grpcmds.command(name="watch", description="Alerts a channel when group members log on or off the active server")
+async def group_watch(interaction: Interaction, group_name: str, channel: discord.TextChannel):
+    try:
+        if not interaction.guild_id:
+            await interaction.response.send_message("[-] Watches can only be created in a server")
+            return
+
+        server_results = await active.get_server(interaction.guild_id)
+        if not server_results:
+            await interaction.response.send_message("[-] **no server set**\nset server: `/server set <Server Name>`")
+            return
+        server_id, server_name = server_results
+
+        watch_error = await db.add_group_watch(group_name, str(interaction.guild_id), str(channel.id), server_id.strip())
+        if watch_error:
+            await interaction.response.send_message(f"```{watch_error}```")
+            return
+        await interaction.response.send_message(f"```[+] Watching {group_name} on {server_name.strip()}, alerts are posted to #{channel.name}```")
+    except Exception as e:
+        print(f"[-] grp_wtch_cmd Error: {e}")
+        await interaction.response.send_message("```[-] Error watching group```")
+
+# /group unwatch <group name> <channel>
+# Stops a group's alerts in one channel (or in every channel of this server when no channel is passed)
+@grpcmds.command(name="unwatch", description="Stops group log on / off alerts")
+async def group_unwatch(interaction: Interaction, group_name: str, channel: discord.TextChannel = None):
+    try:
+        removed = await db.remove_group_watch(group_name, str(interaction.guild_id), str(channel.id) if channel else None)
+        if removed:
+            await interaction.response.send_message(f"```[+] Stopped watching {group_name} ({removed} channel{'s' if removed > 1 else ''})```")
+        else:
+            await interaction.response.send_message(f"```[-] {group_name} isn't being watched{' in #' + channel.name if channel else ''}```")
+    except Exception as e:
+        print(f"[-] grp_unwtch_cmd Error: {e}")
+        await interaction.response.send_message("```[-] Error removing group watch```")
+
+# /group update <group name>
+@grpcmds.command(name="update", description="Re-checks & updates each group member's username")
+async def group_update(interaction: Interaction, group_name: str):
+    try:
+        # Tell discord to wait for the command to process
+        await interaction.response.defer()
+
+        # Queries steam IDs and usernames (member):
+        results = await db.check_group_members(group_name)
+        if not results:
+            await interaction.followup.send(await _no_members_message(group_name))
+            return
+
+        # One bulk Steam request for the whole group
+        _, renamed = await _refresh_member_names(group_name, results)
+        if not renamed:
+            await interaction.followup.send(f"```[+] {group_name} member names are up to date```")
+            return
+
+        renamed_lines = [f"{old_name} -> {new_name}" for old_name, new_name in renamed]
+        await interaction.followup.send("```\n" + f"[+] {group_name} UPDATED NAMES:\n" + "-" * (len(group_name) + 18) + "\n" + "\n".join(renamed_lines) + "```")
+    except Exception as e:
+        print(f"[-] grp_upd_cmd Error: {e}")
+        await interaction.followup.send("```[-] Error updating group member names```")
 
 # /group remove <group_name> <member_name>
 @grpcmds.command(name="remove", description="Remove a player from a group")
+@app_commands.autocomplete(group_name=_group_name_autocomplete, member_name=_member_name_autocomplete)
 async def group_remove(interaction: Interaction, group_name: str, member_name: str):
     try:
         # Trim any spaces from input
@@ -250,7 +498,7 @@ async def group_remove(interaction: Interaction, group_name: str, member_name: s
         print(f"[DEBUG] Removing player: '{member_name}' from group: '{group_name}'")
 
         # Call the actual remove function
-        delete_result = db.rem_group_member(group_name, member_name)
+        delete_result = await db.rem_group_member(group_name, member_name)
 
         # Check if deletion was successful
         if delete_result is False:
@@ -264,11 +512,12 @@ async def group_remove(interaction: Interaction, group_name: str, member_name: s
 
 # /group del <group name>
 @grpcmds.command(name="del", description="Deletes entire group (non-recoverable)")
+@app_commands.autocomplete(group_name=_group_name_autocomplete)
 async def group_del(interaction: Interaction, group_name: str):
     # Ensure passing interaction object to prompt for confirmation
     try:
         # Call the database method to delete the group
-        result = db.delete_group(group_name)
+        result = await db.delete_group(group_name)
 
         # Send the result message to the user
         await interaction.response.send_message(result)
@@ -278,10 +527,11 @@ async def group_del(interaction: Interaction, group_name: str):
 
 # /group change <group name> <new group name>
 @grpcmds.command(name="rename", description="Change existing group name")
+@app_commands.autocomplete(current_name=_group_name_autocomplete)
 async def group_rename(interaction: Interaction, current_name: str, new_name: str):
     try:
         # Call the database method to change the group name
-        result = db.change_group_name(current_name, new_name)
+        result = await db.change_group_name(current_name, new_name)
 
         # Send response message
         await interaction.response.send_message(f"```{result}```")
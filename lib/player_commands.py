@@ -4,16 +4,21 @@ from discord.ext import commands # Handle Custom Server Commands
 from discord import Interaction
 from lib.battlemetrics import ApiClient # Methods to Query BattleMetrics API
 from lib.steam import steamClient # Methods to Query Steam Web API
-from lib.utils import activeServer # Methods to handle the active server configuration
-from lib.db import database # Methods to handle group database interactions
+from lib.utils import activeServer, resolve_battle_ids # Methods to handle the active server configuration & steam -> BattleMetrics identities
+from lib.db import asyncDatabase # Methods to handle group database interactions (non-blocking)
+from lib import analytics # Session history heatmaps
 
 # Initialize Battle Metrics API Client (sets BM API Bearer Token)
 battlemettrics = ApiClient()
-steam = steamClient()
-active = activeServer()
 
 # Initializee database's Methods
-db = database()
+db = asyncDatabase()
+
+# Each guild's active server (stored in the database, cached in memory)
+active = activeServer(db)
+
+# Steam client persists its vanity URL & profile caches to the database
+steam = steamClient(db)
 
 # [!] PLAYER COMMAND GROUP 
 class PlayerCommandGroup(app_commands.Group):
@@ -38,26 +43,31 @@ async def player_find(interaction: Interaction, player_input: str):
 
         # [STEP 1] **Determine Input Type (Username, BattleMetrics ID, or Steam ID)**
         if 'https://' in player_input: 
-            _, found_name = steam.get_player_info(player_input) # steam_id = unused variable
-            username = found_name
+            steam_id, found_name = await steam.get_player_info(player_input)
+            # Exact steam -> BattleMetrics identity (no name search), fall back to searching the steam name
+            battle_ids = await resolve_battle_ids(db, battlemettrics, [steam_id], {steam_id: found_name})
+            if steam_id in battle_ids:
+                battle_id = battle_ids[steam_id]
+            else:
+                username = found_name
         elif player_input.isdigit():
             battle_id = player_input
         else:
             username = player_input
 
         # [STEP 2] **Get Active Server**
-        server_results = await active.get_server()
+        server_results = await active.get_server(interaction.guild_id)
         if not server_results:
             await interaction.followup.send("[-] **No server set**\nSet server: `/server set <Server ID>`")
             return
 
-        server_id, server_name = server_results.split(":", 1)
+        server_id, server_name = server_results
         server_id = server_id.strip()
         server_name = server_name.strip()
 
         # [STEP 3A] If we already have a numeric BM ID => skip name-based searching
         if battle_id:
-            player_data = battlemettrics.get_player_by_id(server_id, battle_id)
+            player_data = await battlemettrics.get_player_by_id(server_id, battle_id)
             if not player_data:
                 await interaction.followup.send(
                     f"```[-] Player with ID {battle_id} not found on server {server_name}.```"
@@ -66,13 +76,13 @@ async def player_find(interaction: Interaction, player_input: str):
 
             display_name = player_data['attributes']['name']
             #    Use the new server-specific single check for final output
-            final_str = battlemettrics.server_player_check_single(server_id, battle_id, display_name)
+            final_str = await battlemettrics.server_player_check_single(server_id, battle_id, display_name)
             await interaction.followup.send(f"```{final_str}```")
             return
 
         # [STEP 3B] If we have a username => do name-based searching
         if username:
-            result = battlemettrics.single_player_check(
+            result = await battlemettrics.single_player_check(
                 server_id=server_id,
                 server_name=server_name,
                 trgt_player=username.strip()
@@ -108,4 +118,40 @@ async def player_find(interaction: Interaction, player_input: str):
 
     except Exception as e:
         print(f"[-] ply_fnd_cmd Error: {e}")
-        await interaction.followup.send("```[-] Something went wrong while checking that player.```")
\ No newline at end of file
+        await interaction.followup.send("```[-] Something went wrong while checking that player.```")
+
+# /player activity <steam profile url or battlemetrics id> <days>
+# Hour of week heatmap of the player's stored session history on the active server
+@plyrcmds.command(name="activity", description="Shows when a player is most likely online (from stored session history)")
+async def player_activity(interaction: Interaction, player_input: str, days: app_commands.Range[int, 1, 365] = 30):
+    try:
+        await interaction.response.defer()
+
+        # Session history is stored by BattleMetrics ID
+        battle_id = None
+        if 'https://' in player_input:
+            steam_info = await steam.get_player_info(player_input)
+            if steam_info:
+                battle_id = (await resolve_battle_ids(db, battlemettrics, [steam_info[0]], {steam_info[0]: steam_info[1]})).get(steam_info[0])
+        elif player_input.isdigit():
+            battle_id = player_input
+        if not battle_id:
+            await interaction.followup.send("```[-] Provide a BattleMetrics ID or a Steam profile URL BattleMetrics knows```")
+            return
+
+        server_results = await active.get_server(interaction.guild_id)
+        if not server_results:
+            await interaction.followup.send("[-] **No server set**\nSet server: `/server set <Server ID>`")
+            return
+        server_id, server_name = server_results
+
+        matrix, session_count = await analytics.activity_heatmap(db, server_id.strip(), [battle_id], days)
+        if not session_count:
+            await interaction.followup.send(f"```[-] No stored sessions for {battle_id} on {server_name.strip()} in the last {days}d (only group members' sessions are stored)```")
+            return
+
+        title = f"[+] {battle_id} ACTIVITY ({session_count} sessions, last {days}d):"
+        await interaction.followup.send(analytics.format_activity(title, matrix[0], lambda share: f"{share:.0%} online"))
+    except Exception as e:
+        print(f"[-] ply_act_cmd Error: {e}")
+        await interaction.followup.send("```[-] Something went wrong while building that player's activity.```")
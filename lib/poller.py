@@ -0,0 +1,161 @@
+# [!] Adaptive Player Polling
+import os # Handle Environment Variable querying for poll intervals
+import time # Handle poll due times
+from datetime import datetime, timezone # Handle cron sweep times
+from dotenv import load_dotenv # Handle Environment Variable querying for poll intervals
+import numpy as np # Vectorized poll interval calculation
+from croniter import croniter # Scheduled full sweeps
+from lib import analytics # Predicted online share per player from stored session history
+from lib.scheduler import background # Poll requests queue behind slash command requests
+
+# [!] Polls tracked players' latest sessions on every guild's active server, each on its own interval
+#     A player's interval shrinks with their historical share of time online at the current hour of week:
+#     players likely to be online are polled every POLL_MIN_SECONDS, unlikely ones every POLL_MAX_SECONDS,
+#     players with no sessions in the last POLL_HISTORY_DAYS every POLL_DORMANT_SECONDS & players seen online
+#     every POLL_MIN_SECONDS (to catch them logging off). If the intervals add up to more than POLL_BUDGET
+#     BattleMetrics requests per minute (split evenly between servers, using the requests each poll actually
+#     sent per player) they're all stretched to fit. POLL_SWEEP_CRON schedules full sweeps
+#     that poll every tracked player no matter when they're due.
+#     Polled sessions refresh the session cache (/group check & /player check) & the stored session history.
+class AdaptivePoller:
+    def __init__(self, db, battlemetrics, active):
+        load_dotenv()
+        self.db = db
+        self.battlemetrics = battlemetrics
+        self.active = active
+
+        self.min_interval = float(os.getenv('POLL_MIN_SECONDS', 120))
+        self.max_interval = float(os.getenv('POLL_MAX_SECONDS', 1800))
+        self.dormant_interval = float(os.getenv('POLL_DORMANT_SECONDS', 21600))
+        self.hot_share = float(os.getenv('POLL_HOT_SHARE', 0.5)) # Online share at which a player gets the min interval
+        self.history_days = int(os.getenv('POLL_HISTORY_DAYS', 28))
+        self.budget = float(os.getenv('POLL_BUDGET', 20)) # BattleMetrics requests per minute
+        self.sweep_cron = os.getenv('POLL_SWEEP_CRON', "0 */6 * * *")
+
+        self._next_due = {}  # {(server_id, battle_id): unix time the player is next polled}
+        self._latest = {}    # {(server_id, battle_id): (session id, stop)} as of the last poll
+        self._online = set() # {(server_id, battle_id)}
+        self._next_sweep = None
+
+        # Metrics
+        self.polls = 0
+        self.sweeps = 0
+        self.requests_per_minute = 0.0
+        self.requests_per_server = {} # {server_id: estimated requests per minute}
+        self._request_cost = {} # {server_id: average BattleMetrics requests sent per player polled}
+
+    # [!] Internal Method
+    # Unix time of the next cron sweep
+    def _schedule_sweep(self):
+        return croniter(self.sweep_cron, datetime.now(timezone.utc)).get_next(datetime).timestamp()
+
+    # [!] Internal Method
+    # Poll interval (seconds) for every player on a server, in the order of battle_ids
+    async def _intervals(self, server_id: str, battle_ids, budget: float):
+        matrix, _ = await analytics.activity_heatmap(self.db, server_id, battle_ids, self.history_days)
+        week = matrix.reshape(len(battle_ids), -1)
+        share = week[:, analytics.current_bin()]
+        dormant = week.sum(axis=1) == 0
+        online = np.array([(server_id, battle_id) in self._online for battle_id in battle_ids], dtype=bool)
+
+        intervals = self.max_interval - (self.max_interval - self.min_interval) * np.minimum(1, share / self.hot_share)
+        intervals = np.where(dormant, self.dormant_interval, intervals)
+        intervals = np.where(online, self.min_interval, intervals)
+
+        # Stretch every interval when polling everyone on schedule would go over the request budget
+        # (costed with the requests polls on this server actually sent per player, players are batched
+        # SESSION_BATCH_SIZE to a request but inactive players can need a request of their own)
+        cost = self._request_cost.get(server_id, 1 / self.battlemetrics.SESSION_BATCH_SIZE)
+        requests_per_minute = (60 / intervals).sum() * cost
+        if requests_per_minute > budget:
+            intervals = intervals * (requests_per_minute / budget)
+            requests_per_minute = budget
+        return intervals, float(requests_per_minute)
+
+    # [!] Poll every player that's due (called on every tick of the poll job)
+    async def tick(self):
+        server_ids = await self.active.get_server_ids()
+
+        # Forget servers that are no longer active in any guild
+        self._next_due = {key: due for key, due in self._next_due.items() if key[0] in server_ids}
+        self._latest = {key: state for key, state in self._latest.items() if key[0] in server_ids}
+        self._online = {key for key in self._online if key[0] in server_ids}
+        self.requests_per_server = {server_id: rate for server_id, rate in self.requests_per_server.items() if server_id in server_ids}
+        self._request_cost = {server_id: cost for server_id, cost in self._request_cost.items() if server_id in server_ids}
+        if not server_ids:
+            return
+
+        battle_ids = list(dict.fromkeys(await self.db.get_tracked_battle_ids()))
+        if not battle_ids:
+            return
+
+        now = time.time()
+        if self._next_sweep is None:
+            self._next_sweep = self._schedule_sweep()
+        sweep = now >= self._next_sweep
+        if sweep:
+            self._next_sweep = self._schedule_sweep()
+            self.sweeps += 1
+
+        requests_per_minute = 0.0
+        for server_id in server_ids:
+            requests_per_minute += await self._poll_server(server_id, battle_ids, now, sweep, self.budget / len(server_ids))
+        self.requests_per_minute = round(requests_per_minute, 2)
+
+    # [!] Internal Method
+    # Polls the players due on one server & schedules their next poll, returns the server's estimated requests per minute
+    async def _poll_server(self, server_id: str, battle_ids, now: float, sweep: bool, budget: float):
+        due = battle_ids if sweep else [battle_id for battle_id in battle_ids if self._next_due.get((server_id, battle_id), 0) <= now]
+        if not due:
+            return self.requests_per_server.get(server_id, 0.0)
+
+        with background():
+            latest_sessions, failed, requests = await self.battlemetrics.refresh_latest_sessions(server_id, due)
+        self.polls += len(due) - len(failed)
+
+        # Moving average of the requests sent per player polled (used to keep the intervals within the budget)
+        cost = requests / len(due)
+        previous = self._request_cost.get(server_id)
+        self._request_cost[server_id] = cost if previous is None else 0.7 * previous + 0.3 * cost
+
+        # Store sessions that started or ended since the last poll
+        changed = []
+        for battle_id, session in latest_sessions.items():
+            key = (server_id, battle_id)
+            if not session:
+                self._online.discard(key)
+                continue
+            if session['attributes'].get('stop') is None:
+                self._online.add(key)
+            else:
+                self._online.discard(key)
+            state = (session['id'], session['attributes'].get('stop'))
+            if self._latest.get(key) != state:
+                self._latest[key] = state
+                changed.append(self.battlemetrics.parse_session(session))
+        if changed:
+            await self.db.save_player_sessions(server_id, changed, [])
+            analytics.invalidate()
+
+        # Schedule the next poll for everyone just polled (failed players are retried on the next tick)
+        intervals, requests_per_minute = await self._intervals(server_id, battle_ids, budget)
+        for battle_id, interval in zip(battle_ids, intervals):
+            if battle_id in latest_sessions:
+                self._next_due[(server_id, battle_id)] = now + float(interval)
+        self.requests_per_server[server_id] = requests_per_minute
+        return requests_per_minute
+
+    # [!] Poller statistics for /server stats
+    def stats(self):
+        now = time.time()
+        return {
+            "player_poller": {
+                "tracked": len(self._next_due),
+                "online": len(self._online),
+                "due": sum(1 for due in self._next_due.values() if due <= now),
+                "polls": self.polls,
+                "sweeps": self.sweeps,
+                "next_sweep": datetime.fromtimestamp(self._next_sweep, timezone.utc).strftime('%Y-%m-%d %H:%M UTC') if self._next_sweep else "-",
+                "requests_per_minute": self.requests_per_minute,
+            }
+        }
@@ -0,0 +1,161 @@
+# [!] Handle Rate Limited API Requests
+import asyncio # Handle waiting for request tokens
+import contextvars # Tracks the priority of the task sending a request
+import heapq # Priority queue of waiting requests
+import itertools # Tie-breaker keeping the queue first in, first out per priority
+import random # Jitter retry delays
+import time # Handle token bucket refills & wait times
+import aiohttp # Handle connection errors & timeouts
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime # Handle Retry-After headers sent as HTTP dates
+
+# Request priorities (lower goes first)
+INTERACTIVE = 0 # Slash command requests
+BACKGROUND = 1  # Cache refreshes, ingestion & polling
+
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+# Status returned for requests that got no HTTP response (connection error or timeout)
+NETWORK_ERROR = 599
+
+# Priority of requests sent by the current task (tasks created inside background() inherit it)
+_request_priority = contextvars.ContextVar("request_priority", default=INTERACTIVE)
+
+# [!] Mark every request sent inside this block (and by tasks created inside it) as background work
+@contextmanager
+def background():
+    token = _request_priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        _request_priority.reset(token)
+
+
+# [!] Token bucket request scheduler
+#     Every request waits for a token (refilled at `rate` per second, up to `burst`). Waiting requests are
+#     released by priority, so interactive slash commands jump ahead of queued background work.
+#     A 429 pauses the whole bucket for the Retry-After time (or an exponential backoff) plus jitter, then retries.
+class RequestScheduler:
+    def __init__(self, name: str, rate: float, burst: int, max_retries: int = 3):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+
+        self._tokens = float(burst)
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        self._queue = [] # heap of (priority, sequence, future)
+        self._sequence = itertools.count()
+        self._dispatcher = None
+
+        # Metrics
+        self.dispatched = 0
+        self.throttled = 0
+        self.network_errors = 0
+        self.waits = {priority: [0, 0.0, 0.0] for priority in PRIORITY_NAMES} # {priority: [count, total wait, max wait]}
+
+    # [!] Internal Method
+    # Adds the tokens earned since the last refill
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    # [!] Internal Method
+    # Releases queued requests (highest priority first) as tokens become available
+    async def _dispatch(self):
+        try:
+            while self._queue:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+
+                self._refill(now)
+                if self._tokens < 1:
+                    await asyncio.sleep((1 - self._tokens) / self.rate)
+                    continue
+
+                _, _, future = heapq.heappop(self._queue)
+                # Caller gave up (command cancelled / timed out) before its turn
+                if future.done():
+                    continue
+                self._tokens -= 1
+                future.set_result(None)
+        finally:
+            self._dispatcher = None
+
+    # [!] Wait for permission to send one request
+    async def acquire(self, priority: int = None):
+        if priority is None:
+            priority = _request_priority.get()
+
+        enqueued_at = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._sequence), future))
+        if self._dispatcher is None:
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+        await future
+
+        # Record how long the request waited
+        wait = time.monotonic() - enqueued_at
+        stats = self.waits[priority]
+        stats[0] += 1
+        stats[1] += wait
+        stats[2] = max(stats[2], wait)
+        self.dispatched += 1
+
+    # [!] Internal Method
+    # Seconds to back off after a 429: Retry-After when sent, otherwise exponential, always jittered
+    def _retry_delay(self, retry_after, attempt: int):
+        delay = None
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                try:
+                    delay = (parsedate_to_datetime(retry_after).timestamp() - time.time())
+                except (TypeError, ValueError):
+                    delay = None
+        if delay is None or delay < 0:
+            delay = min(60, 2 ** attempt)
+        return delay + random.uniform(0, max(1.0, delay * 0.25))
+
+    # [!] Send an HTTP request through the scheduler
+    #     Returns (HTTP status, JSON body or None), 429 responses are retried up to max_retries times
+    #     Connection errors & timeouts return (NETWORK_ERROR, None) so callers handle them like any failed request
+    async def request(self, session, method: str, url: str, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            await self.acquire()
+            try:
+                async with session.request(method, url, **kwargs) as response:
+                    if response.status == 429 and attempt < self.max_retries:
+                        self.throttled += 1
+                        # Pause the whole bucket, every queued request is over the same limit
+                        self._paused_until = max(self._paused_until, time.monotonic() + self._retry_delay(response.headers.get("Retry-After"), attempt))
+                        self._tokens = 0
+                        continue
+                    if response.status != 200:
+                        return response.status, None
+                    # Skip aiohttp's content type check (BattleMetrics replies with application/vnd.api+json)
+                    return response.status, await response.json(content_type=None)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.network_errors += 1
+                print(f"[-] {self.name}_req Error: {type(e).__name__} {e}")
+                return NETWORK_ERROR, None
+
+    def stats(self):
+        queued = [entry for entry in self._queue if not entry[2].done()]
+        stats = {
+            "queue_depth": len(queued),
+            "dispatched": self.dispatched,
+            "throttled_429": self.throttled,
+            "network_errors": self.network_errors,
+        }
+        for priority, name in PRIORITY_NAMES.items():
+            count, total_wait, max_wait = self.waits[priority]
+            stats[f"{name}_queued"] = sum(1 for entry in queued if entry[0] == priority)
+            stats[f"{name}_avg_wait_ms"] = round(total_wait / count * 1000) if count else 0
+            stats[f"{name}_max_wait_ms"] = round(max_wait * 1000)
+        return stats
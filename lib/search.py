@@ -0,0 +1,196 @@
+# [!] Local Player Name Search
+import bisect # Prefix matching over the sorted name keys
+import unicodedata # Normalize player names before indexing
+
+# Trigram matches need at least this share (Jaccard) of trigrams in common with the query
+TRIGRAM_THRESHOLD = 0.4
+
+# [!] In-memory index of players seen on tracked servers
+#     Fed by every server roster snapshot, players returned by BattleMetrics name searches & the names of players
+#     with stored sessions (at startup & after every ingestion run). Names are normalized (NFKC, case-folded)
+#     and matched exactly, by prefix or by trigram similarity, so most name lookups never reach BattleMetrics.
+class PlayerIndex:
+    def __init__(self):
+        self._names = {}    # {battle_id: player name}
+        self._keys = {}     # {battle_id: normalized name}
+        self._servers = {}  # {battle_id: {server IDs the player was seen on}}
+        self._exact = {}    # {normalized name: {battle_ids}}
+        self._sorted = []   # [(normalized name, battle_id)] sorted for prefix matching
+        self._trigrams = {} # {trigram: {battle_ids}}
+
+        # Metrics
+        self.lookups = 0
+        self.hits = 0
+
+    # [!] NFKC normalized & case-folded form of a name
+    @staticmethod
+    def normalize(name: str):
+        return " ".join(unicodedata.normalize("NFKC", name).casefold().split())
+
+    # [!] Internal Function
+    # Trigrams of a normalized name (padded so short names & word starts still match)
+    @staticmethod
+    def _trigrams_of(key: str):
+        padded = f"  {key} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    # [!] Add or rename a player seen on a server
+    def add(self, battle_id: str, name: str, server_id: str):
+        battle_id = str(battle_id)
+        self._servers.setdefault(battle_id, set()).add(str(server_id))
+        if not name or self._names.get(battle_id) == name:
+            return
+
+        self._remove_key(battle_id)
+        key = self.normalize(name)
+        self._names[battle_id] = name
+        self._keys[battle_id] = key
+        self._exact.setdefault(key, set()).add(battle_id)
+        bisect.insort(self._sorted, (key, battle_id))
+        for trigram in self._trigrams_of(key):
+            self._trigrams.setdefault(trigram, set()).add(battle_id)
+
+    # [!] Add every player of a roster snapshot or name search ({battle_id: player name})
+    def update(self, players: dict, server_id: str):
+        for battle_id, name in players.items():
+            self.add(battle_id, name, server_id)
+
+    # [!] Internal Method
+    # Drops a player's old name from the name indexes
+    def _remove_key(self, battle_id: str):
+        key = self._keys.pop(battle_id, None)
+        if key is None:
+            return
+        self._names.pop(battle_id, None)
+        self._exact[key].discard(battle_id)
+        if not self._exact[key]:
+            del self._exact[key]
+        position = bisect.bisect_left(self._sorted, (key, battle_id))
+        if position < len(self._sorted) and self._sorted[position] == (key, battle_id):
+            del self._sorted[position]
+        for trigram in self._trigrams_of(key):
+            self._trigrams[trigram].discard(battle_id)
+            if not self._trigrams[trigram]:
+                del self._trigrams[trigram]
+
+    # [!] Last name seen for a player (None if the player was never seen)
+    def get_name(self, battle_id: str):
+        return self._names.get(str(battle_id))
+
+    # [!] Search for players seen on a server
+    #     Returns (match type, [(battle_id, player name)]) using the best match type that found anyone:
+    #     "exact", "prefix" or "trigram" (most similar first), or (None, []) when nobody matched
+    def search(self, query: str, server_id: str, limit: int = 5):
+        self.lookups += 1
+        key = self.normalize(query)
+        if not key:
+            return None, []
+        server_id = str(server_id)
+
+        def _on_server(battle_ids):
+            return [battle_id for battle_id in battle_ids if server_id in self._servers.get(battle_id, ())]
+
+        matches = _on_server(sorted(self._exact.get(key, ())))
+        match_type = "exact"
+
+        if not matches:
+            match_type = "prefix"
+            position = bisect.bisect_left(self._sorted, (key, ""))
+            prefixed = []
+            while position < len(self._sorted) and self._sorted[position][0].startswith(key):
+                prefixed.append(self._sorted[position][1])
+                position += 1
+            matches = _on_server(prefixed)
+
+        if not matches:
+            match_type = "trigram"
+            query_trigrams = self._trigrams_of(key)
+            shared = {}
+            for trigram in query_trigrams:
+                for battle_id in self._trigrams.get(trigram, ()):
+                    shared[battle_id] = shared.get(battle_id, 0) + 1
+            scores = {
+                battle_id: count / (len(query_trigrams) + len(self._trigrams_of(self._keys[battle_id])) - count)
+                for battle_id, count in shared.items()
+            }
+            matches = _on_server(sorted((battle_id for battle_id, score in scores.items() if score >= TRIGRAM_THRESHOLD), key=lambda battle_id: -scores[battle_id]))
+
+        if not matches:
+            return None, []
+        self.hits += 1
+        return match_type, [(battle_id, self._names[battle_id]) for battle_id in matches[:limit]]
+
+    # [!] Index statistics for /server stats
+    def stats(self):
+        return {
+            "player_index": {
+                "players": len(self._names),
+                "lookups": self.lookups,
+                "hits": self.hits,
+            }
+        }
+
+
+# [!] Player index shared by every command group & background job
+player_index = PlayerIndex()
+
+
+# [!] In-memory index of BattleMetrics servers seen before
+#     Fed by server searches, roster snapshots & every guild's active server. Backs /server set's autocomplete
+#     so most suggestions (and server name lookups) never need a paginated BattleMetrics search.
+class ServerIndex:
+    def __init__(self):
+        self._names = {} # {server_id: server name}
+        self._keys = {}  # {server_id: normalized name}
+
+        # Metrics
+        self.lookups = 0
+        self.hits = 0
+
+    # [!] Add or rename a server
+    def add(self, server_id: str, name: str):
+        if not name:
+            return
+        server_id = str(server_id)
+        self._names[server_id] = name
+        self._keys[server_id] = PlayerIndex.normalize(name)
+
+    # [!] Add every server of a search ({server_id: server name})
+    def update(self, servers: dict):
+        for server_id, name in servers.items():
+            self.add(server_id, name)
+
+    # [!] Server name for a server ID (None if the server was never seen)
+    def get_name(self, server_id: str):
+        return self._names.get(str(server_id))
+
+    # [!] Search server names
+    #     Returns [(server_id, server name)] with names starting with the query first, then names containing it
+    def search(self, query: str, limit: int = 25):
+        self.lookups += 1
+        key = PlayerIndex.normalize(query)
+        prefixed, contained = [], []
+        for server_id, server_key in self._keys.items():
+            if server_key.startswith(key):
+                prefixed.append(server_id)
+            elif key in server_key:
+                contained.append(server_id)
+
+        matches = sorted(prefixed, key=self._keys.get) + sorted(contained, key=self._keys.get)
+        if matches:
+            self.hits += 1
+        return [(server_id, self._names[server_id]) for server_id in matches[:limit]]
+
+    # [!] Index statistics for /server stats
+    def stats(self):
+        return {
+            "server_index": {
+                "servers": len(self._names),
+                "lookups": self.lookups,
+                "hits": self.hits,
+            }
+        }
+
+
+# [!] Server index shared by every command group
+server_index = ServerIndex()
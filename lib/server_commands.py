@@ -3,11 +3,25 @@ from discord import app_commands # Handles Discord API Communications with Serve
 from discord.ext import commands # Handle Custom Server Commands
 from discord import Interaction
 from lib.battlemetrics import ApiClient # Methods to Query BattleMetrics API
-from lib.utils import activeServer # Methods to handle the active server configuration
+from lib.steam import steamClient # Methods to Query Steam Web API (stats only)
+from lib.utils import activeServer, parse_server_ids # Methods to handle the active server configuration
+from lib.db import asyncDatabase # Active servers are stored in the database
+from lib import analytics # Activity heatmap cache (stats only)
+from lib.tasks import poller, watcher # Adaptive player poller & group watcher (stats only)
+from lib.search import PlayerIndex, player_index, server_index # Local player name search (stats only) & server suggestions
 
 # Initialize Battle Metrics API Client (sets BM API Bearer Token)
 battlemettrics = ApiClient()
-active = activeServer()
+steam = steamClient()
+
+# /server set autocomplete: max suggestions, local matches needed to skip the BattleMetrics search & seconds to wait on it
+AUTOCOMPLETE_LIMIT = 25
+AUTOCOMPLETE_MIN_LOCAL = 5
+AUTOCOMPLETE_SEARCH_TIMEOUT = 2
+
+# Each guild's active server (stored in the database, cached in memory) & saved server lists
+db = asyncDatabase()
+active = activeServer(db)
 
 # [!] SERVER COMMAND GROUP 
 class ServerCommandGroup(app_commands.Group):
@@ -21,15 +35,16 @@ actsrv = ServerCommandGroup()
 # [!] /server get
 @actsrv.command(name="get", description="Retrieve currently set active server")
 async def get(interaction: Interaction):
-    server_results = await active.get_server()
+    server_results = await active.get_server(interaction.guild_id)
     if server_results:
-        _, server_name = server_results.split(":") # Unused var = server_id
+        _, server_name = server_results # Unused var = server_id
         await interaction.response.send_message(f"[+] **Active Server**: {server_name}")
     else:
         await interaction.response.send_message("[-] **no server set**\nset server: `/server set <Server ID>`")
 
 # /server set <Server Name>
 @actsrv.command(name="set", description="Set's active server")
+@app_commands.describe(server_name="Server name (pick a suggestion) or BattleMetrics server ID")
 async def set(interaction: Interaction, server_name: str):
     # [!] Discord ensures that parameter is set
     #if not server_id:
@@ -37,58 +52,114 @@ async def set(interaction: Interaction, server_name: str):
     #    return
     server_results = await _server_find(interaction, server_name)
     if server_results:
-        server_name, server_id = server_results.split(":")
+        server_name, server_id = server_results
         await active.set_server(interaction, server_name, server_id)
 
+# [!] Suggests servers while /server set's server name is typed (the selected suggestion passes the server ID)
+@set.autocomplete("server_name")
+async def set_autocomplete(interaction: Interaction, current: str):
+    return [app_commands.Choice(name=name[:100], value=server_id) for server_id, name in await _server_suggestions(current)]
+
 # /server clear
 @actsrv.command(name="clear", description="Clear active server")
 async def clear(interaction: Interaction):
-    await interaction.response.send_message(active.clear_server())
+    await interaction.response.send_message(await active.clear_server(interaction.guild_id))
+
+# /server save <list name> <server IDs>
+@actsrv.command(name="save", description="Save a list of server IDs to check groups across (/group check servers)")
+async def save(interaction: Interaction, list_name: str, server_ids: str):
+    server_ids = parse_server_ids(server_ids)
+    if not server_ids:
+        await interaction.response.send_message("[-] server IDs must be comma separated BattleMetrics server IDs")
+        return
+    if parse_server_ids(list_name):
+        await interaction.response.send_message("[-] list name can't be a server ID")
+        return
+    await db.save_server_list(active.scope(interaction.guild_id), list_name.strip(), server_ids)
+    await interaction.response.send_message(f"[+] Saved server list **{list_name.strip()}** ({len(server_ids)} servers)")
+
+# /server lists
+@actsrv.command(name="lists", description="Show saved server lists")
+async def lists(interaction: Interaction):
+    server_lists = await db.get_server_lists(active.scope(interaction.guild_id))
+    if not server_lists:
+        await interaction.response.send_message("[-] no server lists saved\nsave one: `/server save <List Name> <Server IDs>`")
+        return
+    list_lines = [f"{list_name} : {', '.join(server_ids)}" for list_name, server_ids in server_lists.items()]
+    await interaction.response.send_message("```\n" + "[+] SERVER LISTS:\n" + "-" * 17 + "\n" + "\n".join(list_lines) + "```")
+
+# /server unsave <list name>
+@actsrv.command(name="unsave", description="Delete a saved server list")
+async def unsave(interaction: Interaction, list_name: str):
+    if await db.delete_server_list(active.scope(interaction.guild_id), list_name.strip()):
+        await interaction.response.send_message(f"[+] Deleted server list **{list_name.strip()}**")
+    else:
+        await interaction.response.send_message("[-] server list doesnt exist")
+
+# /server stats
+@actsrv.command(name="stats", description="Show BattleMetrics, Steam & activity cache statistics")
+async def stats(interaction: Interaction):
+    stat_lines = []
+    for section, section_stats in {**battlemettrics.stats(), **steam.stats(), **analytics.stats(), **poller.stats(), **watcher.stats(), **player_index.stats(), **server_index.stats()}.items():
+        stat_lines.append(f"[{section}]")
+        stat_lines.extend(f"  {name}: {value}" for name, value in section_stats.items())
+    await interaction.response.send_message("```\n" + "[+] API STATS:\n" + "-" * 14 + "\n" + "\n".join(stat_lines) + "```")
+
+# [!] Internal Function
+# Autocomplete suggestions: servers seen before first, topped up with the first page of a (cached, background priority)
+# BattleMetrics search when the index has few matches. The full paginated search only runs once the command is sent.
+# The page is capped at AUTOCOMPLETE_SEARCH_TIMEOUT seconds to answer inside Discord's 3 second window, a slower
+# request keeps running & fills the cache for the next keystroke.
+async def _server_suggestions(current: str):
+    current = current.strip()
+    suggestions = server_index.search(current, limit=AUTOCOMPLETE_LIMIT)
+    if len(suggestions) >= AUTOCOMPLETE_MIN_LOCAL or len(current) < 3:
+        return suggestions
+
+    try:
+        server_results = await asyncio.wait_for(asyncio.shield(battlemettrics.suggest_servers(current)), timeout=AUTOCOMPLETE_SEARCH_TIMEOUT)
+    except asyncio.TimeoutError:
+        return suggestions
+    if isinstance(server_results, dict):
+        suggested = {server_id for server_id, _ in suggestions}
+        suggestions += [(server_id, name) for name, server_id in server_results.items() if server_id not in suggested]
+    return suggestions[:AUTOCOMPLETE_LIMIT]
 
 # [!] Internal Function to get target server ID and name 
+#     A server ID (what autocomplete suggestions pass) is looked up in the server index, a name is searched for
+#     (cached) & set directly when there's one result or an exact name match, otherwise the matches are listed
+#     Returns (server name, server ID) or None
 async def _server_find(interaction: Interaction, server_name: str):
     if not server_name:
         await interaction.send_help(interaction.command)
         return
 
+    # Defer interaction to prevent timeout errors while searching
+    await interaction.response.defer()
+    query = server_name.strip()
+
+    if query.isdigit():
+        found_name = server_index.get_name(query)
+        if not found_name:
+            # Unknown server ID, the roster request also records the server's name
+            await battlemettrics.get_server_roster(query)
+            found_name = server_index.get_name(query)
+        if not found_name:
+            await interaction.followup.send("[-] No Servers Found")
+            return
+        return found_name, query
+
     # Calls BM API Method to Return Dictionary with Server Name (key) Server ID (value) pairs
-    server_results = battlemettrics.find_server(server_name.strip())
-    if not server_results:
-        await interaction.response.send_message("[-] No Servers Found")
+    server_results = await battlemettrics.find_server(query)
+    if not server_results or not isinstance(server_results, dict):
+        await interaction.followup.send("[-] No Servers Found")
         return
 
-    # Defer interactiion to prevent timeout errors when getting user choice
-    await interaction.response.defer()
+    exact = [name for name in server_results if PlayerIndex.normalize(name) == PlayerIndex.normalize(query)]
+    if len(server_results) == 1 or len(exact) == 1:
+        selected_server = exact[0] if exact else next(iter(server_results))
+        return selected_server, server_results[selected_server]
 
-    server_names = list(server_results.keys())
-    # Get all servers with a # for them to select
-    user_server_prompt = "```\n" + "[+] SELECT A SERVER:\n" + "-"*20 + "\n" +  "\n".join([f"[{i+1}]. {name}" for i, name in enumerate(server_names)]) + "```"
-
-    # Print the servers
-    srv_listing_msg = await interaction.channel.send(user_server_prompt)
-
-    # Ensure Input Meets Critiera (i.e. from command caller, is a number, and only one parameter is passed (i.e. 2 or 24 and not 2 24))
-    def valid_msg(msg):
-        print(f"Received message: {msg.content} from {msg.author}")
-        return (
-            msg.author == interaction.user
-            and msg.channel == interaction.channel
-            and msg.content.isdigit()
-            and 1 <= int(msg.content) <= len(server_names)
-        )
-
-    user_choice = None
-    # Get user's choice to set target server from list
-    # check=valid_msg,
-    try:
-        user_choice = await interaction.client.wait_for("message", check=valid_msg, timeout=30)
-        selected_server = server_names[int(user_choice.content) - 1]
-        return f"{selected_server}:{server_results[selected_server]}"
-    except asyncio.TimeoutError:
-        await interaction.response.send_message("[-] You didn't reply in time. Please try again.")
-    # Ensure that message printing server details is always deleted
-    finally:
-        await srv_listing_msg.delete()
-        if user_choice:
-            # Deltes message if bot timesout
-            await user_choice.delete()
\ No newline at end of file
+    # Several matches, list them so the right one can be picked from the suggestions (or by ID)
+    user_server_prompt = "```\n" + "[+] MULTIPLE SERVERS FOUND:\n" + "-"*26 + "\n" + "\n".join([f"[{i+1}]. {name} (ID: {server_id})" for i, (name, server_id) in enumerate(server_results.items())]) + "```" + "*Pick the server from `/server set`'s suggestions or use its ID: `/server set <Server ID>`*"
+    await interaction.followup.send(user_server_prompt)
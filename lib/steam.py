@@ -1,52 +1,146 @@
 # Handles Querying Steam Web API
-import requests                 # Handle HTTP Requests to Steam Web API
+import aiohttp                  # Handle non-blocking HTTP Requests to Steam Web API
 import os                       # Handle Environment Variable querying for script secrets
 from dotenv import load_dotenv  # Handle Environment Variable querying for script secrets
 import re # Extract IDs from Stean URLs
+from datetime import datetime, timezone, timedelta # Handle profile cache refreshes
+from lib.utils import bounded_gather  # Run batched requests concurrently
+from lib.cache import SingleFlight  # Coalesce identical concurrent requests
+from lib.scheduler import RequestScheduler  # Rate limited request scheduling
 
 class steamClient:
-    def __init__(self):
+    # GetPlayerSummaries accepts up to 100 comma separated steam IDs per request
+    SUMMARY_BATCH_SIZE = 100
+
+    # db --> lib.db asyncDatabase used to persist the vanity & profile caches (in-memory only when not passed)
+    def __init__(self, db=None):
         # Get secrets from environment  variables
-        load_dotenv()       
+        load_dotenv()
         self.steam_key = os.getenv('STEAM_KEY')
         if not self.steam_key:
             raise EnvironmentError("[-] STEAM_KEY not found")
 
         # Content Type Header
         self.headers={"Content-Type":"application/json"}
-    
+        self.base_url = "http://api.steampowered.com/ISteamUser"
+        self.db = db
+
+        # Hours a cached profile summary (persona name) is used before it's fetched again
+        self.profile_ttl = timedelta(hours=float(os.getenv('STEAM_PROFILE_TTL_HOURS', 12)))
+
+        # Connection pool limits & per-request timeout (seconds), overridable from the environment
+        self.pool_limit = int(os.getenv('STEAM_POOL_LIMIT', 10))
+        self.timeout = aiohttp.ClientTimeout(total=float(os.getenv('STEAM_REQUEST_TIMEOUT', 10)))
+
+        # Every Steam request goes through one shared token bucket, sized to the documented
+        # limit of 100,000 calls per day (~1.15 per second, STEAM_RATE_LIMIT) with bursts of STEAM_RATE_BURST
+        if steamClient._scheduler is None:
+            steamClient._scheduler = RequestScheduler(
+                "steam",
+                rate=float(os.getenv('STEAM_RATE_LIMIT', 1.15)),
+                burst=int(os.getenv('STEAM_RATE_BURST', 10))
+            )
+
+    # [!] Shared HTTP session
+    # Class level so every steamClient instance reuses the same keep-alive connection pool
+    _session: aiohttp.ClientSession = None
+
+    # [!] Coalesces identical concurrent requests from every steamClient instance
+    _single_flight = SingleFlight()
+
+    # [!] Rate limit aware scheduler shared by every steamClient instance
+    _scheduler: RequestScheduler = None
+
+    # [!] Steam caches shared by every steamClient instance, persisted to the database & warmed at startup
+    _vanity_cache = {}  # {vanity: steam_id} (kept indefinitely)
+    _profile_cache = {} # {steam_id: (personaname, fetched)}
+
+    # [!] Internal Method
+    # aiohttp sessions must be created inside the running event loop, so it's built on first use
+    async def _get_session(self):
+        if steamClient._session is None or steamClient._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_limit, keepalive_timeout=60)
+            steamClient._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return steamClient._session
+
+    # [!] Internal Method
+    # Sends a GET request to the Steam Web API, returns the JSON body
+    # Concurrent callers requesting the same (url, params) share a single in-flight request
+    async def _get(self, url, params):
+        return await steamClient._single_flight.do(SingleFlight.request_key(url, params), lambda: self._send_get(url, params))
+
+    # [!] Internal Method
+    # Sends the request through the rate limit scheduler
+    async def _send_get(self, url, params):
+        session = await self._get_session()
+        status, response_json = await steamClient._scheduler.request(session, "GET", url, headers=self.headers, params={"key": self.steam_key, **params})
+        if status != 200:
+            raise ValueError(f"Steam request failed (HTTP {status})")
+        return response_json
+
+    # [!] Close the shared HTTP session (on bot shutdown)
+    @classmethod
+    async def close(cls):
+        if cls._session and not cls._session.closed:
+            await cls._session.close()
+        cls._session = None
+
+    # [!] Client statistics (coalescing & scheduler metrics) for /server stats
+    def stats(self):
+        return {
+            "steam_request_coalescing": steamClient._single_flight.stats(),
+            "steam_request_scheduler": steamClient._scheduler.stats(),
+        }
+
+    # [!] Load the persistent vanity & profile caches from the database (at startup)
+    async def warm_cache(self):
+        if not self.db:
+            return
+        vanities, profiles = await self.db.get_steam_cache()
+        steamClient._vanity_cache.update(vanities)
+        steamClient._profile_cache.update(profiles)
+        print(f"[+] Steam cache warmed: {len(vanities)} vanity URLs, {len(profiles)} profiles")
+
     def _valid_steam_id(self, profile_id):
         """Ensure valid steam id provided"""
         return bool(re.match(r"^\d{17}$", profile_id))
-    
+
     def _valid_steam_url(self, profile_url):
         """Ensure valid steam profile URL"""
         return bool(re.match(r"^(?:https?://)?steamcommunity\.com/(?:profiles/|id/)", profile_url))
 
     # [!] Internal Method
     # Resolves Steam vanity URLs into their respective Steam IDs
-    def _resolve_vanity(self, vanityname):
+    # Returns the steam ID (cached indefinitely) or None
+    async def _resolve_vanity(self, vanityname):
+        vanity = vanityname.lower()
+        if vanity in steamClient._vanity_cache:
+            return steamClient._vanity_cache[vanity]
         try:
             # Convery Vanity URL to SteamID
-            request = requests.get(f"http://api.steampowered.com/ISteamUser/ResolveVanityURL/v0001/?key={self.steam_key}&vanityurl={vanityname}", headers=self.headers)
-            return request.json()
+            vanity_response = await self._get(f"{self.base_url}/ResolveVanityURL/v0001/", {"vanityurl": vanityname})
+            steam_id = vanity_response['response']['steamid']
+
+            steamClient._vanity_cache[vanity] = steam_id
+            if self.db:
+                await self.db.save_steam_vanity(vanity, steam_id)
+            return steam_id
         except Exception as e:
             print(f"[-] stm_url_vnty Error: {e}")
-    
+
     # [!] Internal Method
-    # Queries Steam Web API
-    def _send_request(self, profileName):
+    # Queries Steam Web API (profileName can be a single steam ID or up to 100 comma separated IDs)
+    async def _send_request(self, profileName):
         try:
             # Handle Vanity URLs: https://stackoverflow.com/questions/62138380/how-to-resolve-a-steam-custom-vanity-profile-url-to-steamid64
             # b/c we need the 64-bit steamID to query a user's information
-            request = requests.get(f"http://api.steampowered.com/ISteamUser/GetPlayerSummaries/v0002/?key={self.steam_key}&steamids={profileName}", headers=self.headers)
-            return request.json()
+            return await self._get(f"{self.base_url}/GetPlayerSummaries/v0002/", {"steamids": profileName})
         except Exception as e:
             print(f"[-] stm_api_req ERROR: {e}")
 
     # [!] Get steamid and personaname attributes for player
     # [!] Working with https://steamcommunity.com/profiles/76561198067942001 as example
-    def get_player_info(self, profileURL):
+    async def get_player_info(self, profileURL):
         """Returns Steam Profile's 64-bit steam ID and persona name (display name)."""
         # [1] Extract the username
         #       Steam profile URLs use the following format(s):
@@ -67,24 +161,61 @@ class steamClient:
                 # b/c we need the 64-bit steamID to query a user's information
                 if "id" in profile_url_id.group(0):
                     # Get profile's displayname and steamID (used for tracking purposes in the future)
-                    vanity_response = self._resolve_vanity(profile_url_id.group(1))
-                    steam_id = vanity_response['response']['steamid']
+                    steam_id = await self._resolve_vanity(profile_url_id.group(1))
+                    if not steam_id:
+                        raise ValueError("Unable to resolve vanity URL.")
                 else:
                     # Get profile's displayname and steamID (used for tracking purposes in the future)
                     steam_id = profile_url_id.group(1)
             else:
                 raise ValueError("Invalid steam profile URL format.")
-            
-            # With steam ID gathered, now query Steam Web API
-            response = self._send_request(steam_id)
-            player_data = response['response']['players'][0]
+
+            # With steam ID gathered, now query Steam Web API (or the profile cache)
+            player_names = await self.get_player_names([steam_id])
+            if steam_id not in player_names:
+                raise ValueError(f"Steam profile {steam_id} not found.")
             # Store the results in a list
-            results.append(player_data['steamid'])
-            results.append(player_data['personaname'])
-            
-            # Return list of (steamID, username) values 
+            results.append(steam_id)
+            results.append(player_names[steam_id])
+
+            # Return list of (steamID, username) values
             return results
         except Exception as e:
             print(f"[-] stm_url_extrct ERROR: {e}")
-    
-    
+
+    # [!] Bulk version of get_player_info for steam IDs (from database)
+    #     Profiles fetched within profile_ttl come from the profile cache, the rest are resolved to persona names
+    #     with one GetPlayerSummaries request per 100 IDs (falling back to the cached name if Steam fails).
+    #     Returns {steam_id: personaname}, IDs Steam didn't return (and were never cached) are left out
+    async def get_player_names(self, steam_ids):
+        steam_ids = list(dict.fromkeys(steam_id for steam_id in steam_ids if steam_id and self._valid_steam_id(steam_id)))
+
+        now = datetime.now(timezone.utc)
+        player_names = {}
+        refresh = []
+        for steam_id in steam_ids:
+            cached = steamClient._profile_cache.get(steam_id)
+            if cached and now - cached[1] < self.profile_ttl:
+                player_names[steam_id] = cached[0]
+            else:
+                refresh.append(steam_id)
+
+        chunks = [refresh[i:i + self.SUMMARY_BATCH_SIZE] for i in range(0, len(refresh), self.SUMMARY_BATCH_SIZE)]
+        fetched = {}
+        for response in await bounded_gather([self._send_request(",".join(chunk)) for chunk in chunks], self.pool_limit):
+            if not response:
+                continue
+            for player_data in response.get('response', {}).get('players', []):
+                fetched[player_data['steamid']] = player_data['personaname']
+
+        if fetched:
+            steamClient._profile_cache.update({steam_id: (personaname, now) for steam_id, personaname in fetched.items()})
+            if self.db:
+                await self.db.save_steam_profiles(fetched, now)
+        player_names.update(fetched)
+
+        # Stale cached names beat no name when Steam didn't answer
+        for steam_id in refresh:
+            if steam_id not in player_names and steam_id in steamClient._profile_cache:
+                player_names[steam_id] = steamClient._profile_cache[steam_id][0]
+        return player_names
@@ -0,0 +1,96 @@
+# [!] Background jobs (started once the bot is ready)
+import os # Handle Environment Variable querying for job intervals
+import asyncio # Handle fetching every active server's roster concurrently
+from datetime import datetime, timezone, timedelta # Handle roster sighting buckets & retention
+from dotenv import load_dotenv # Handle Environment Variable querying for job intervals
+from discord.ext import tasks # Handles running jobs on an interval
+from lib.group_commands import db, battlemettrics, active # Shared database connection pool, BattleMetrics client & active server
+from lib.scheduler import background # Job requests queue behind slash command requests
+from lib import analytics # Activity heatmaps are rebuilt once new sessions are stored
+from lib.poller import AdaptivePoller # Polls tracked players on intervals predicted from their activity
+from lib.watcher import GroupWatcher # Posts alerts when watched group members log on / off
+from lib.search import player_index # Local player name search (fed with stored session players)
+
+load_dotenv()
+
+# [!] Shared adaptive poller (its stats are shown by /server stats)
+poller = AdaptivePoller(db, battlemettrics, active)
+
+# [!] Shared group watcher (its stats are shown by /server stats)
+watcher = GroupWatcher(db, battlemettrics)
+
+# [!] Roll group check history up into hourly / daily aggregates & drop rows past the retention window
+@tasks.loop(hours=1)
+async def compact_history():
+    try:
+        compacted = await db.compact_group_history()
+        if compacted and any(compacted):
+            raw_rows, hourly_rows, expired_rows = compacted
+            print(f"[+] History compacted: {raw_rows} checks -> hourly, {hourly_rows} hours -> daily, {expired_rows} days expired")
+
+        expired_sightings = await db.expire_roster_sightings(datetime.now(timezone.utc) - timedelta(days=float(os.getenv('ROSTER_SIGHTING_DAYS', 90))))
+        if expired_sightings:
+            print(f"[+] Roster sightings expired: {expired_sightings}")
+    except Exception as e:
+        print(f"[-] cmpct_hst Error: {e}")
+
+# [!] Ingest new BattleMetrics sessions for every tracked player (group members) on every guild's active server
+#     Each player's cursor limits the fetch to sessions newer than the ones already stored,
+#     the stored players' names are then added to the local player name index
+@tasks.loop(minutes=float(os.getenv('INGEST_INTERVAL_MINUTES', 30)))
+async def ingest_sessions():
+    try:
+        battle_ids = await db.get_tracked_battle_ids()
+        if battle_ids:
+            for server_id in await active.get_server_ids():
+                cursors = await db.get_session_cursors(server_id, battle_ids)
+                with background():
+                    sessions, failed = await battlemettrics.get_session_history(server_id, battle_ids, cursors)
+                await db.save_player_sessions(server_id, sessions, [battle_id for battle_id in battle_ids if battle_id not in failed])
+                if sessions:
+                    analytics.invalidate()
+                print(f"[+] Sessions ingested on {server_id}: {len(sessions)} sessions for {len(battle_ids) - len(failed)} players ({len(failed)} failed)")
+
+        for server_id, battle_id, name in await db.get_session_player_names():
+            player_index.add(battle_id, name, server_id)
+    except Exception as e:
+        print(f"[-] ingst_sess Error: {e}")
+
+# [!] Store every active server's roster in the current co-presence bucket (server-wide data for /group teammates)
+#     Runs once per COPRESENCE_BUCKET_MINUTES, so each player costs at most one row per server & bucket
+@tasks.loop(minutes=analytics.COPRESENCE_BUCKET_MINUTES)
+async def sample_rosters():
+    try:
+        server_ids = await active.get_server_ids()
+        width = analytics.COPRESENCE_BUCKET_MINUTES * 60
+        bucket = datetime.fromtimestamp(datetime.now(timezone.utc).timestamp() // width * width, timezone.utc)
+        with background():
+            rosters = await asyncio.gather(*(battlemettrics.get_server_roster(server_id) for server_id in server_ids))
+        for server_id, roster in zip(server_ids, rosters):
+            if roster is not None: # Roster request failed, the bucket stays empty for this server
+                await db.save_roster_sightings(server_id, bucket, list(roster))
+    except Exception as e:
+        print(f"[-] smpl_rstrs Error: {e}")
+
+# [!] Poll tracked players that are due (each player's interval adapts to how likely they are to be online)
+@tasks.loop(seconds=float(os.getenv('POLL_TICK_SECONDS', 60)))
+async def poll_players():
+    try:
+        await poller.tick()
+    except Exception as e:
+        print(f"[-] poll_plyrs Error: {e}")
+
+# [!] Diff watched groups against their servers' rosters & post members logging on / off
+@tasks.loop(seconds=float(os.getenv('WATCH_INTERVAL_SECONDS', 60)))
+async def watch_groups(bot):
+    try:
+        await watcher.sweep(bot)
+    except Exception as e:
+        print(f"[-] wtch_grps Error: {e}")
+
+# [!] Start every background job (called once from on_ready, jobs already running are left alone)
+def start(bot):
+    jobs = {compact_history: (), ingest_sessions: (), sample_rosters: (), poll_players: (), watch_groups: (bot,)}
+    for job, args in jobs.items():
+        if not job.is_running():
+            job.start(*args)
@@ -1,48 +1,142 @@
-# [!] Handle Server File Operations
-import pathlib # Perform file reading operations for the active server configuration file
+# [!] Handle Active Server & Shared Helpers
+import pathlib # Migrate the legacy active server configuration file
 from discord import Interaction # Handles Discord API Communications with Server (Guild in documentation)
 from discord.ext import commands # Handle Custom Server Commands
-import asyncio # Handle retrieving any timeout based errors
+import asyncio # Handle retrieving any timeout based errors & running lookups concurrently
+import time # Handle retrying unmatched identity lookups
+import re # Split server ID lists
+from lib.search import server_index # Active servers are suggested by /server set's autocomplete
 
+# [!] Per-guild active server
+#     Each Discord server (guild) tracks its own BattleMetrics server in the active_servers table.
+#     Every activeServer instance shares one in-memory copy loaded from the database on first use, writes go to
+#     the database first & then to that copy, so reading the active server never touches the database or disk.
 class activeServer:
-    def __init__(self):
-        self.fileName = pathlib.Path(".activeServer")
-        try:
-            if not self.fileName.exists():
-                raise f"[-] Error .activeServer File Not Found"
-        except Exception as e:
-            print(f"[-] actvSrv Error: {e}")
-    
+    # Single global active server file used before active servers were stored per guild
+    LEGACY_FILE = pathlib.Path(".activeServer")
+
+    # {guild_id: (server ID, server name)} shared by every instance
+    _servers = None
+    _loading = asyncio.Lock()
+
+    # db --> lib.db asyncDatabase
+    def __init__(self, db):
+        self.db = db
+
+    # [!] Key for a guild's active server & server lists (commands sent in direct messages share one)
+    @staticmethod
+    def scope(guild_id):
+        return str(guild_id) if guild_id else "direct"
+
+    # [!] Internal Method
+    # Loads every guild's active server once
+    async def _load(self):
+        if activeServer._servers is None:
+            async with activeServer._loading:
+                if activeServer._servers is None:
+                    activeServer._servers = await self.db.get_active_servers()
+                    for server_id, server_name in activeServer._servers.values():
+                        server_index.add(server_id, server_name)
+        return activeServer._servers
+
     # [!] GET ACTIVE SERVER
-    async def get_server(self):
-        server_results = self.fileName.read_text().strip()
-        if server_results: # if not empty
-            return server_results # Let calling function/method handle "<Server ID>:<Server Name>" results
-        else:
-            return None
+    # Returns (server ID, server name) or None when the guild has no active server
+    async def get_server(self, guild_id):
+        servers = await self._load()
+        return servers.get(self.scope(guild_id))
+
+    # [!] Every BattleMetrics server ID that's active in at least one guild (used by background jobs)
+    async def get_server_ids(self):
+        servers = await self._load()
+        return list(dict.fromkeys(server_id for server_id, _ in servers.values()))
     
     # [!] SET ACTIVE SERVER
     async def set_server(self, interaction: Interaction, server_name:str, server_id):
-        active_server = self.fileName
-        active_server_id = ""
-        active_server_server = ""
-        if not active_server.read_text() == "":
-            active_server_id, active_server_server = active_server.read_text().split(":") # Current Active Server (not currently used but you never know)
-
-        active_server.write_text(f"{server_id}:{server_name}")
+        scope = self.scope(interaction.guild_id)
+        await self.db.set_active_server(scope, str(server_id), server_name)
+        (await self._load())[scope] = (str(server_id), server_name)
+        server_index.add(server_id, server_name)
         await interaction.followup.send(f"[+] Server Set to **{server_name}** (Server ID: {server_id})")
 
     # [!] CLEAR ACTIVE SERVER
-    def clear_server(self):
-        active_server = self.fileName.read_text()
-        if active_server: # if not empty
+    async def clear_server(self, guild_id):
+        scope = self.scope(guild_id)
+        servers = await self._load()
+        if scope in servers:
             # [!] Not prompting or confirmation on clearing           
             # Clear active server
-            self.fileName.write_text("") 
+            await self.db.clear_active_server(scope)
+            servers.pop(scope, None)
             return f"[+] Active server cleared"
         else:
             return f"[-] no server set:\nSet Server with: `/server set <Server ID>`"
 
-        
+    # [!] Move the legacy .activeServer file's server to every guild without an active server (at startup)
+    async def migrate_legacy(self, guild_ids):
+        if not self.LEGACY_FILE.exists():
+            return
+        try:
+            legacy_server = self.LEGACY_FILE.read_text().strip()
+            if legacy_server:
+                server_id, server_name = legacy_server.split(":", 1)
+                servers = await self._load()
+                for guild_id in guild_ids:
+                    scope = self.scope(guild_id)
+                    if scope not in servers:
+                        await self.db.set_active_server(scope, server_id, server_name)
+                        servers[scope] = (server_id, server_name)
+                print(f"[+] Migrated active server {server_name} from {self.LEGACY_FILE}")
+            self.LEGACY_FILE.unlink()
+        except Exception as e:
+            print(f"[-] actvSrv Error: {e}")
+
+
+# [!] Split comma / space separated BattleMetrics server IDs (de-duplicated, in order)
+#     Returns [server IDs] or None if anything that isn't a server ID was passed
+def parse_server_ids(server_ids: str):
+    server_ids = [server_id for server_id in re.split(r"[,\s]+", server_ids or "") if server_id]
+    if not server_ids or not all(server_id.isdigit() for server_id in server_ids):
+        return None
+    return list(dict.fromkeys(server_ids))
+
+
+# [!] Run coroutines concurrently with a cap on how many are in-flight at once
+# Results are returned in the same order the coroutines were passed in
+async def bounded_gather(coros, limit: int):
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def _run(coro):
+        async with semaphore:
+            return await coro
+
+    return await asyncio.gather(*(_run(coro) for coro in coros))
+
+
+# [!] Steam IDs BattleMetrics had no match for {steam_id: time looked up}, retried after UNMATCHED_RETRY seconds
+_unmatched_steam_ids = {}
+UNMATCHED_RETRY = 3600
 
+# [!] Resolve steam IDs to BattleMetrics IDs
+#     Known IDs come straight from the database's identity table, unknown IDs are resolved with one
+#     BattleMetrics identifier lookup & stored so they never need a name search again.
+#     names ({steam_id: name}) are recorded as known names for newly resolved players
+#     Returns {steam_id: battle_id}
+async def resolve_battle_ids(db, battlemetrics, steam_ids, names=None):
+    steam_ids = [steam_id for steam_id in steam_ids if steam_id]
+    battle_ids = await db.get_battle_ids(steam_ids)
 
+    now = time.monotonic()
+    unknown = [
+        steam_id for steam_id in steam_ids
+        if steam_id not in battle_ids and now - _unmatched_steam_ids.get(steam_id, -UNMATCHED_RETRY) >= UNMATCHED_RETRY
+    ]
+    if unknown:
+        matched = await battlemetrics.match_steam_ids(unknown)
+        for steam_id in unknown:
+            if steam_id in matched:
+                await db.save_identity(battle_id=matched[steam_id], steam_id=steam_id, name=(names or {}).get(steam_id))
+                _unmatched_steam_ids.pop(steam_id, None)
+            else:
+                _unmatched_steam_ids[steam_id] = now
+        battle_ids.update(matched)
+    return battle_ids
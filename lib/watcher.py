@@ -0,0 +1,70 @@
+# [!] Group Watch Alerts
+import asyncio # Handle fetching every watched server's roster concurrently
+from lib.scheduler import background # Roster requests queue behind slash command requests
+
+# [!] Posts a message when members of a watched group log on or off
+#     Every sweep fetches one roster snapshot per watched server (shared by every watch on that server & by
+#     /group check through the roster cache), diffs each member against their last known state & batches a
+#     watch's transitions into a single message. The first sweep of a watch (or after a restart) only records
+#     the current state.
+class GroupWatcher:
+    def __init__(self, db, battlemetrics):
+        self.db = db
+        self.battlemetrics = battlemetrics
+        self._states = {} # {(watch id, battle_id): online}
+
+        # Metrics
+        self.sweeps = 0
+        self.alerts = 0
+
+    # [!] Check every watch & post its transitions (called on every tick of the watch job)
+    async def sweep(self, bot):
+        watches = {}
+        for watch_id, group_name, channel_id, server_id, member_name, battle_id in await self.db.get_group_watches():
+            watches.setdefault(watch_id, (group_name, channel_id, server_id, []))[3].append((member_name, battle_id))
+
+        # Forget watches that were removed
+        self._states = {key: online for key, online in self._states.items() if key[0] in watches}
+        if not watches:
+            return
+
+        server_ids = list({server_id for _, _, server_id, _ in watches.values()})
+        with background():
+            rosters = dict(zip(server_ids, await asyncio.gather(*(self.battlemetrics.get_server_roster(server_id) for server_id in server_ids))))
+        self.sweeps += 1
+
+        for watch_id, (group_name, channel_id, server_id, members) in watches.items():
+            roster = rosters[server_id]
+            if roster is None:
+                continue # Roster request failed, keep the last known states
+
+            transitions = []
+            for member_name, battle_id in members:
+                online = battle_id in roster
+                previous = self._states.get((watch_id, battle_id))
+                self._states[(watch_id, battle_id)] = online
+                if previous is not None and previous != online:
+                    transitions.append(f"[X] {member_name} : came online" if online else f"[ ] {member_name} : went offline")
+
+            if transitions:
+                await self._send(bot, channel_id, "```\n" + f"[+] {group_name} UPDATE:\n" + "-" * (len(group_name) + 12) + "\n" + "\n".join(transitions) + "```")
+
+    # [!] Internal Method
+    # Posts an alert (channels the bot can't see or post in are skipped)
+    async def _send(self, bot, channel_id: str, message: str):
+        try:
+            channel = bot.get_channel(int(channel_id)) or await bot.fetch_channel(int(channel_id))
+            await channel.send(message)
+            self.alerts += 1
+        except Exception as e:
+            print(f"[-] wtch_snd Error: {e}")
+
+    # [!] Watcher statistics for /server stats
+    def stats(self):
+        return {
+            "group_watches": {
+                "watched_members": len(self._states),
+                "sweeps": self.sweeps,
+                "alerts": self.alerts,
+            }
+        }
@@ -3,6 +3,10 @@ from dotenv import load_dotenv    # Handle Environment Variable querying for scr
 import discord                    # Handles Discord API Communications with Server (Guild in documentation)
 from discord.ext import commands  # Handle Custom Server Commands
 from lib import group_commands, player_commands, server_commands  # Custom Discord bot command groups defined
+from lib import tasks  # Background jobs
+from lib.battlemetrics import ApiClient  # Shared BattleMetrics HTTP session (closed on shutdown)
+from lib.steam import steamClient  # Shared Steam Web API HTTP session (closed on shutdown)
+from lib.db import asyncDatabase  # Shared database connection pool (closed on shutdown)
 
 # Load environment variables
 load_dotenv()
@@ -15,7 +19,32 @@ if not discord_token:
 intents = discord.Intents.default()
 intents.message_content = True # Deprecated only intents.message = True is necessary
 intents.messages = True
-bot = commands.Bot(command_prefix="/", intents=intents)
+
+# Bot subclass so shared HTTP sessions are closed cleanly when the bot shuts down
+class RustOpsBot(commands.Bot):
+    # [!] Runs once after login, before the bot connects to the gateway (unlike on_ready, which fires again on reconnects)
+    async def setup_hook(self):
+        # Migrate legacy tables & create any missing database tables (before any command can reach the database)
+        await group_commands.db.prepare_schema()
+
+        # Load the persistent Steam vanity URL & profile caches into memory
+        await group_commands.steam.warm_cache()
+
+        print("Starting command sync...")
+        try:
+            await self.tree.sync()  # Sync global commands
+            print("Commands synced successfully.")
+        except Exception as e:
+            print(f"Command sync failed: {e}")
+
+    async def close(self):
+        await ApiClient.close()
+        await steamClient.close()
+        await asyncDatabase.close()
+        await super().close()
+
+bot = RustOpsBot(command_prefix="/", intents=intents)
+started = False # on_ready's one time startup work has run
 
 # Register the commands from lib.bot_commands
 #bot.add_command(bot_commands.server_find)
@@ -25,12 +54,15 @@ bot.tree.add_command(group_commands.grpcmds)
 
 @bot.event
 async def on_ready():
-    print("Starting command sync...")
-    try:
-        await bot.tree.sync()  # Sync global commands
-        print("Commands synced successfully.")
-    except Exception as e:
-        print(f"Command sync failed: {e}")
+    global started
+    if not started:
+        started = True
+
+        # Move the legacy .activeServer file's server to every guild without an active server (needs the guild list)
+        await group_commands.active.migrate_legacy([guild.id for guild in bot.guilds])
+
+        # Start background jobs (history compaction, session ingestion, roster sampling, player polling & group watches)
+        tasks.start(bot)
 
     print(f"{bot.user} is ready to query some Rust servers.")
 
@@ -0,0 +1,54 @@
+# [!] Test setup: every test runs against a local SQLite database (aiosqlite for the async engine)
+import os
+import sys
+import tempfile
+import pathlib
+import pytest
+
+# Settings read when the command modules are imported (the API clients only need a token to be set)
+_test_dir = tempfile.mkdtemp(prefix="rustops-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{pathlib.Path(_test_dir) / 'rustops.db'}"
+os.environ.setdefault("BATTLEMETTRIC_TOKEN", "test-token")
+os.environ.setdefault("STEAM_KEY", "test-key")
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from lib import db as db_module # noqa: E402
+from lib.utils import activeServer # noqa: E402
+
+# [!] Fake Discord interaction (records what a command sends back)
+class _Responder:
+    def __init__(self):
+        self.messages = []
+
+    async def send(self, message, **kwargs):
+        self.messages.append(message)
+
+    async def send_message(self, message, **kwargs):
+        self.messages.append(message)
+
+    async def defer(self, **kwargs):
+        pass
+
+
+class _Interaction:
+    def __init__(self, guild_id):
+        self.guild_id = guild_id
+        self.response = _Responder()
+        self.followup = _Responder()
+
+
+# [!] Empty database & in-memory caches for every test
+@pytest.fixture(autouse=True)
+def fresh_db():
+    sync_db = db_module.database() # Migrates & creates the schema
+    db_module.Base.metadata.drop_all(sync_db.engine)
+    db_module.Base.metadata.create_all(sync_db.engine)
+    with sync_db.engine.begin() as connection:
+        for legacy_table in ("groups_legacy", "last_checked_legacy"):
+            connection.exec_driver_sql(f"DROP TABLE IF EXISTS {legacy_table}")
+    sync_db.engine.dispose()
+
+    activeServer._servers = None
+    db_module._group_names._groups = None
+    yield
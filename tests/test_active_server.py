@@ -0,0 +1,29 @@
+# [!] Active server storage & the commands that read it
+import asyncio
+from lib.db import asyncDatabase
+from lib.utils import activeServer
+from lib import group_commands, server_commands
+from conftest import _Interaction
+
+
+def test_server_name_containing_colon():
+    async def run():
+        db = asyncDatabase()
+        active = activeServer(db)
+        await active.set_server(_Interaction(1), "Srv: Main", "9")
+        assert await active.get_server(1) == ("9", "Srv: Main")
+
+        # Reload from the database
+        activeServer._servers = None
+        assert await active.get_server(1) == ("9", "Srv: Main")
+        assert await active.get_server_ids() == ["9"]
+
+        # Every reader unpacks (server ID, server name)
+        interaction = _Interaction(1)
+        await server_commands.get.callback(interaction)
+        assert interaction.response.messages == ["[+] **Active Server**: Srv: Main"]
+        assert await group_commands._check_servers(1, None) == ["9"]
+        assert await group_commands._check_servers(2, None) == "[-] **no server set**\nset server: `/server set <Server Name>`"
+        await asyncDatabase.close()
+
+    asyncio.run(run())
@@ -0,0 +1,30 @@
+# [!] Co-presence analytics against stored roster sightings & sessions
+import asyncio
+from datetime import datetime, timezone, timedelta
+from lib.db import asyncDatabase
+from lib import analytics
+
+
+def test_teammates_include_untracked_roster_players():
+    async def run():
+        db = asyncDatabase()
+        analytics.invalidate()
+        width = analytics.COPRESENCE_BUCKET_MINUTES * 60
+        now = datetime.now(timezone.utc)
+        current = datetime.fromtimestamp(now.timestamp() // width * width, timezone.utc)
+
+        # 8 hours of snapshots: the member & an untracked player together, a third player only half the time
+        for step in range(1, 33):
+            bucket = current - timedelta(seconds=step * width)
+            await db.save_roster_sightings("9", bucket, ["member", "mate"] + (["stranger"] if step % 2 else []))
+        await db.save_roster_sightings("9", current - timedelta(seconds=width), ["mate"]) # Duplicate snapshot is skipped
+
+        candidates = await analytics.teammate_candidates(db, "9", ["member"], days=1)
+        assert [battle_id for battle_id, _, _, _ in candidates] == ["mate", "stranger"]
+        battle_id, score, partner, together = candidates[0]
+        assert (score, partner, together) == (1.0, 0, 1.0)
+
+        assert await db.expire_roster_sightings(now + timedelta(seconds=width)) == 32 * 2 + 16
+        await asyncDatabase.close()
+
+    asyncio.run(run())
@@ -0,0 +1,85 @@
+# [!] Group status: roster snapshots against latest sessions
+import asyncio
+import time
+from datetime import datetime, timezone, timedelta
+from lib.battlemetrics import ApiClient
+
+
+def _session(battle_id: str, start: datetime, stop: datetime = None):
+    return {
+        "id": f"session-{battle_id}",
+        "attributes": {"start": start.strftime('%Y-%m-%dT%H:%M:%S.%fZ'), "stop": stop and stop.strftime('%Y-%m-%dT%H:%M:%S.%fZ')},
+        "relationships": {"server": {"data": {"id": "9"}}},
+    }
+
+
+def test_group_status_trusts_whichever_is_newer():
+    async def run():
+        ApiClient._session_cache = None # Empty session cache
+        client = ApiClient()
+        roster_time = datetime.now(timezone.utc) - timedelta(seconds=20)
+        ApiClient._rosters["9"] = (time.monotonic(), {"on": "On"}, roster_time)
+
+        # "cached" was served from the cache & is still open when fetched again, "joined" started after the
+        # roster snapshot, "left" started before it (fetched just now, so it isn't fetched twice)
+        ApiClient._session_cache.set(("9", "cached"), _session("cached", roster_time - timedelta(hours=1)))
+        fetches = []
+        fresh = {
+            "cached": _session("cached", roster_time - timedelta(hours=1)),
+            "joined": _session("joined", roster_time + timedelta(seconds=10)),
+            "left": _session("left", roster_time - timedelta(hours=2)),
+        }
+
+        async def fetch(server_id, battle_ids):
+            fetches.append(sorted(battle_ids))
+            return {battle_id: fresh[battle_id] for battle_id in battle_ids}, {}, 1
+        client._fetch_latest_sessions = fetch
+
+        online, latest, failed, stale = await client.get_group_status(["9"], ["on", "cached", "joined", "left"])
+        assert fetches == [["joined", "left"], ["cached"]]
+        assert online == {"on": "9", "joined": "9"}
+        assert failed == {} and stale == set()
+        for battle_id in ("cached", "left"):
+            assert datetime.fromisoformat(latest[battle_id]["attributes"]["stop"].replace("Z", "+00:00")) == roster_time
+        await ApiClient.close()
+
+    asyncio.run(run())
+
+
+def test_session_fallback_requests_are_capped():
+    async def run():
+        client = ApiClient()
+        battle_ids = [str(battle_id) for battle_id in range(20)]
+        requests = []
+
+        # Two full pages of sessions for player "0" only, with a next page still to come
+        async def get(url, params=None):
+            requests.append(params)
+            start = datetime.now(timezone.utc)
+            return 200, {
+                "data": [{**_session("0", start), "relationships": {"player": {"data": {"id": "0"}}, "server": {"data": {"id": "9"}}}}],
+                "links": {"next": url},
+            }
+        client._get = get
+
+        latest, failed, sent = await client._get_latest_sessions_chunk("9", battle_ids)
+        assert sent == len(requests) == ApiClient.SESSION_BATCH_PAGES + ApiClient.SESSION_FALLBACK_LIMIT
+        assert len(latest) == 1 + ApiClient.SESSION_FALLBACK_LIMIT
+        assert failed == {battle_id: 429 for battle_id in battle_ids[1 + ApiClient.SESSION_FALLBACK_LIMIT:]}
+        await ApiClient.close()
+
+    asyncio.run(run())
+
+
+def test_player_search_with_only_old_matches():
+    async def run():
+        client = ApiClient()
+
+        async def get(url, params=None):
+            return 200, {"data": [{"id": "7", "attributes": {"name": "Old Timer", "updatedAt": "2020-01-01T00:00:00.000Z"}}]}
+        client._get = get
+
+        assert await client.single_player_check("9", "Main", "Old Timer") == ["```[ ] Old Timer : not found on server Main (no match seen in the last month)```"]
+        await ApiClient.close()
+
+    asyncio.run(run())
@@ -0,0 +1,110 @@
+# [!] Database operations: upserts, the legacy schema migration, group renames & the group name cache
+from datetime import datetime, timezone, timedelta
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session
+from lib.db import database, Group, GroupMember, LastCheck, Player, PlayerSession, SessionCursor, GroupNameCache, _group_names, _prepare_schema
+
+
+def test_update_group_last_checked_upserts():
+    db = database()
+    db.add_group_member("raiders", "Alice", "76561198000000001", "1")
+    db.update_group_last_checked("raiders", 1, 3)
+    db.update_group_last_checked("raiders", 2, 4)
+
+    with db.Session() as session:
+        assert [(row.active_count, row.total_count) for row in session.query(LastCheck).all()] == [(2, 4)]
+
+
+def test_save_player_sessions_upserts():
+    db = database()
+    start = datetime(2026, 1, 1, 12, tzinfo=timezone.utc)
+    db.save_player_sessions("9", [{"id": "s1", "battle_id": "1", "start": start, "stop": None}], ["1", "2"])
+    db.save_player_sessions("9", [
+        {"id": "s1", "battle_id": "1", "start": start, "stop": start + timedelta(hours=1)},
+        {"id": "s2", "battle_id": "1", "start": start + timedelta(hours=2), "stop": None},
+    ], ["1", "2"])
+
+    with db.Session() as session:
+        stops = {row.id: row.stop for row in session.query(PlayerSession).all()}
+        cursors = {row.battle_id: row.cursor for row in session.query(SessionCursor).all()}
+    assert stops == {"s1": (start + timedelta(hours=1)).replace(tzinfo=None), "s2": None}
+    assert cursors == {"1": (start + timedelta(hours=2)).replace(tzinfo=None), "2": None}
+
+
+def test_legacy_schema_migration():
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE groups (id INTEGER PRIMARY KEY, name TEXT, member TEXT, steam_id TEXT, battle_id TEXT, date TEXT)"))
+        connection.execute(text("CREATE TABLE last_checked (id INTEGER PRIMARY KEY, group_name TEXT, active_count TEXT, total_count TEXT, date TEXT)"))
+        connection.execute(text(
+            "INSERT INTO groups (name, member, steam_id, battle_id, date) VALUES "
+            "('raiders', 'Alice', '76561198000000001', '1', '2024-01-02'), "
+            "('raiders', 'Bob', '', '2', '2024-01-02'), "
+            "('builders', 'Alice', '76561198000000001', '1', '2024-02-03')"
+        ))
+        connection.execute(text("INSERT INTO last_checked (group_name, active_count, total_count, date) VALUES ('raiders', '1', '2', '2024-01-03 10:00:00'), ('ghosts', '0', '1', '2024-01-03 10:00:00')"))
+        _prepare_schema(connection)
+
+    assert {"groups_legacy", "last_checked_legacy"} <= set(inspect(engine).get_table_names())
+    with Session(engine) as session:
+        members = (
+            session.query(Group.name, Player.name, Player.steam_id, Player.battle_id)
+            .join(GroupMember, GroupMember.group_id == Group.id)
+            .join(Player, Player.id == GroupMember.player_id)
+            .order_by(Group.name, Player.name)
+            .all()
+        )
+        assert members == [
+            ("builders", "Alice", "76561198000000001", "1"),
+            ("raiders", "Alice", "76561198000000001", "1"),
+            ("raiders", "Bob", None, "2"),
+        ]
+        assert session.query(Player).count() == 2
+        assert [(row.active_count, row.total_count) for row in session.query(LastCheck).all()] == [(1, 2)]
+
+    # Running it again leaves the migrated tables alone
+    with engine.begin() as connection:
+        _prepare_schema(connection)
+    with Session(engine) as session:
+        assert session.query(GroupMember).count() == 3
+
+
+def test_rename_updates_group_name_cache():
+    db = database()
+    db.add_group_member("raiders", "Alice", "76561198000000001", "1")
+    db.add_group_member("builders", "Bob", None, "2")
+    db.load_group_names()
+    db.load_group_member_names("raiders")
+
+    assert db.change_group_name("raiders", "builders") == "[-] Group 'builders' already exists"
+    assert db.change_group_name("raiders", "farmers") == "[+] Group name changed from 'raiders' to 'farmers'"
+    assert sorted(_group_names.group_names()) == ["builders", "farmers"]
+    assert _group_names.member_names("farmers") == ["Alice"]
+
+
+def test_group_name_cache_changes_wait_for_commit():
+    db = database()
+    db.add_group_member("raiders", "Alice", "76561198000000001", "1")
+    db.load_group_names()
+
+    with db.Session() as session:
+        GroupNameCache.on_commit(session, _group_names.delete_group, "raiders")
+        session.rollback()
+    assert _group_names.group_names() == ["raiders"]
+
+    with db.Session() as session:
+        GroupNameCache.on_commit(session, _group_names.delete_group, "raiders")
+        session.commit()
+    assert _group_names.group_names() == []
+
+
+def test_steam_cache_times_are_utc():
+    db = database()
+    fetched = datetime.now(timezone.utc)
+    db.save_steam_profiles({"76561198000000001": "Alice"}, fetched)
+    db.save_steam_vanity("alice", "76561198000000001")
+
+    vanities, profiles = db.get_steam_cache()
+    assert vanities == {"alice": "76561198000000001"}
+    assert profiles == {"76561198000000001": ("Alice", fetched)}
+    assert datetime.now(timezone.utc) - profiles["76561198000000001"][1] < timedelta(minutes=1)
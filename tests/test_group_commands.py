@@ -0,0 +1,48 @@
+# [!] Group commands against a group that lost its last member
+import asyncio
+from lib.db import asyncDatabase
+from lib import group_commands
+from conftest import _Interaction
+
+
+def test_empty_group_is_not_reported_missing():
+    async def run():
+        db = group_commands.db
+        await db.add_group_member("raiders", "Alice", "76561198000000001", "1")
+        await db.rem_group_member("raiders", "Alice")
+        assert "raiders" in await db.get_cached_group_names()
+
+        for command, args in (
+            (group_commands.group_check, ("9",)),
+            (group_commands.group_update, ()),
+            (group_commands.group_activity, (30,)),
+            (group_commands.group_teammates, (14,)),
+        ):
+            interaction = _Interaction(1)
+            await command.callback(interaction, "raiders", *args)
+            assert interaction.followup.messages == ["[-] raiders has no members, add one with `/group add`"]
+
+        interaction = _Interaction(1)
+        await group_commands.group_update.callback(interaction, "ghosts")
+        assert interaction.followup.messages == ["[-] group doesnt exist"]
+        await asyncDatabase.close()
+
+    asyncio.run(run())
+
+
+def test_trend_days_clamped_to_hourly_history(monkeypatch):
+    monkeypatch.setenv("HISTORY_HOURLY_DAYS", "10")
+
+    async def run():
+        db = group_commands.db
+        await db.add_group_member("raiders", "Alice", "76561198000000001", "1")
+        await db.record_group_check("raiders", ["1"], [])
+
+        interaction = _Interaction(1)
+        await group_commands.group_trend.callback(interaction, "raiders", 30)
+        message, = interaction.followup.messages
+        assert "(UTC, last 10d)" in message
+        assert message.endswith("*\\* hourly history is kept for 10d (`HISTORY_HOURLY_DAYS`), showing the last 10d instead of 30d*")
+        await asyncDatabase.close()
+
+    asyncio.run(run())